@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Import time benchmark of the pyspd package.
+
+Each statement is timed within a fresh interpreter, so nothing is
+already imported, keeping the median of the repeats. Importing
+pyspd must not import any of the heavy modules, which are only imported
+on first use of the objects needing them.
+
+Usage:
+------
+python benchmarks/import_time.py --output import_time.json
+python benchmarks/import_time.py --max-seconds 0.05
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from collections import OrderedDict
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+# Statements timed, the first being the import of the package alone
+STATEMENTS = OrderedDict([
+    ("import", "import pyspd"),
+    ("actors", "import pyspd; pyspd.SystemOperator"),
+    ("model", "import pyspd; pyspd.SPDModel"),
+    ("analysis", "import pyspd; pyspd.Analytics")])
+
+# Modules which importing pyspd alone must not import
+HEAVY = ("numpy", "pandas", "scipy", "pulp", "highspy")
+
+# Reports the time taken and the modules imported by a statement
+PROBE = """
+import sys, time, json
+begin = time.time()
+%s
+duration = time.time() - begin
+print(json.dumps([duration, sorted(sys.modules)]))
+"""
+
+
+def measure(statement, repeat=5):
+    """ Median time taken by a statement in a fresh interpreter, and the
+    modules it imported
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [ROOT] + [p for p in [env.get("PYTHONPATH")] if p])
+
+    times, modules = [], []
+    for r in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, "-c", PROBE % statement], env=env)
+        duration, modules = json.loads(output.decode("utf-8"))
+        times.append(duration)
+    times.sort()
+    return times[len(times) // 2], times, modules
+
+
+def heavy_modules(modules):
+    """ The heavy modules among those imported """
+    return sorted(set(m.split(".")[0] for m in modules) & set(HEAVY))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="File to write the results to")
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="Fail if importing pyspd takes longer")
+    args = parser.parse_args(argv)
+
+    results = OrderedDict([
+        ("python", platform.python_version()),
+        ("statements", OrderedDict())])
+    for name, statement in STATEMENTS.items():
+        median, times, modules = measure(statement, args.repeat)
+        results["statements"][name] = OrderedDict([
+            ("statement", statement),
+            ("time", median),
+            ("times", times),
+            ("heavy_modules", heavy_modules(modules))])
+        print("%-10s %.4fs %s" % (name, median,
+                                  " ".join(heavy_modules(modules))))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    package = results["statements"]["import"]
+    failed = False
+    if package["heavy_modules"]:
+        print("Importing pyspd imported %s" %
+              ", ".join(package["heavy_modules"]))
+        failed = True
+    if args.max_seconds is not None and package["time"] > args.max_seconds:
+        print("Importing pyspd took %.4fs, more than %.4fs" %
+              (package["time"], args.max_seconds))
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Scaling benchmark of the model on seeded synthetic networks.
+
+Every combination of the network sizes given is generated, iterated,
+built, solved and parsed, timing each phase and measuring the memory it
+allocates. The results are written as JSON so that two runs may be
+compared to catch performance regressions.
+
+Usage:
+------
+python benchmarks/scaling.py --nodes 10 50 100 --instances 1 50 \
+    --output scaling.json
+python benchmarks/scaling.py --output current.json --compare scaling.json
+
+"""
+
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from collections import OrderedDict
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# C Libraries
+import numpy as np
+import pulp
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                os.pardir))
+
+import pyspd
+from pyspd import SPDModel, Analytics, synthetic_network
+
+# The phases of every case, in order
+PHASES = ("network", "iterator", "create_lp", "solve_lp", "analytics")
+
+# The dimensions of a case, in order
+DIMENSIONS = ("nodes", "stations_per_node", "reserve_zones", "risk_branches",
+              "instances")
+
+# Format version of the results
+VERSION = 1
+
+
+def run_case(case, backend="pulp", seed=0, memory=False):
+    """ Run every phase of a case once
+
+    Parameters
+    ----------
+    case: dict
+        The value of each dimension
+    backend: str, default "pulp"
+        Backend of the SPDModel
+    seed: int, default 0
+        Seed of the synthetic network
+    memory: bool, default False
+        Measure the peak memory allocated by each phase, which slows
+        every phase down
+
+    Returns
+    -------
+    phases: OrderedDict
+        (seconds, peak bytes) of each phase, the bytes being None when
+        memory is not measured
+    size: OrderedDict
+        The rows, columns and status of the solved model
+
+    """
+    phases = OrderedDict()
+    SO = _measure(phases, "network", memory, synthetic_network,
+                  nodes=case["nodes"],
+                  stations_per_node=case["stations_per_node"],
+                  reserve_zones=case["reserve_zones"],
+                  risk_branches=case["risk_branches"], seed=seed)
+
+    if case["instances"] > 1:
+        _measure(phases, "iterator", memory, SO.create_iterator,
+                 SO.stations[0], "energy_price",
+                 np.linspace(0, 150, case["instances"]))
+    else:
+        _measure(phases, "iterator", memory, SO.create_iterator)
+
+    # The bundled CBC of pulp, as used by SPDModel.full_run
+    solver = pulp.PULP_CBC_CMD(msg=False) if backend == "pulp" else None
+    SPD = SPDModel(SO, backend=backend)
+    _measure(phases, "create_lp", memory, SPD.create_lp)
+    _measure(phases, "solve_lp", memory, SPD.solve_lp, solver)
+    _measure(phases, "analytics", memory, _analytics, SPD)
+
+    if backend == "highs":
+        rows, columns = SPD.matrix.A.shape
+    else:
+        rows, columns = len(SPD.lp.constraints), len(SPD.lp.variables())
+    size = OrderedDict([("rows", rows), ("columns", columns),
+                        ("status", SPD.status)])
+    return phases, size
+
+
+def _analytics(SPD):
+    analysis = Analytics(SPD)
+    analysis.final_price_df
+    analysis.final_dispatch_df
+    return analysis
+
+
+def _measure(phases, name, memory, func, *args, **kargs):
+    """ Call the function, recording its duration and peak allocation """
+    gc.collect()
+    if memory:
+        tracemalloc.start()
+    begin = time.time()
+    result = func(*args, **kargs)
+    duration = time.time() - begin
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    phases[name] = (duration, peak)
+    return result
+
+
+def benchmark(cases, backend="pulp", seed=0, repeat=3, memory=True):
+    """ Run every case, keeping the fastest of the repeated timings
+
+    The memory is measured by a further run of each case, so the
+    overhead of tracing allocations does not affect the timings.
+
+    Returns
+    -------
+    results: list
+        The dimensions, size and phases of each case
+
+    """
+    memory = memory and tracemalloc is not None
+    results = []
+    for case in cases:
+        runs = [run_case(case, backend, seed) for r in range(repeat)]
+        peaks = None
+        if memory:
+            peaks = run_case(case, backend, seed, memory=True)[0]
+
+        phases = OrderedDict()
+        for name in PHASES:
+            times = [phase[name][0] for phase, size in runs]
+            phases[name] = OrderedDict([
+                ("time", min(times)),
+                ("times", times),
+                ("peak_memory", peaks[name][1] if peaks else None)])
+
+        result = OrderedDict(case)
+        result.update(runs[-1][1])
+        result["total"] = sum(p["time"] for p in phases.values())
+        result["phases"] = phases
+        results.append(result)
+        _report(result)
+    return results
+
+
+def environment():
+    """ Description of the machine and libraries the benchmark ran on """
+    import pandas
+    return OrderedDict([
+        ("python", platform.python_version()),
+        ("implementation", platform.python_implementation()),
+        ("platform", platform.platform()),
+        ("processor", platform.processor()),
+        ("pyspd", pyspd.__version__),
+        ("numpy", np.__version__),
+        ("pandas", pandas.__version__),
+        ("pulp", getattr(pulp, "__version__", None)),
+        ("time", time.strftime("%Y-%m-%dT%H:%M:%S"))])
+
+
+def compare(results, baseline, threshold=1.25, minimum=0.01):
+    """ Compare the phase timings of each case against a baseline run
+
+    Parameters
+    ----------
+    results, baseline: dict
+        The output of two runs
+    threshold: float, default 1.25
+        Ratio of the times above which a phase has regressed
+    minimum: float, default 0.01
+        Phases faster than this many seconds in both runs are ignored
+
+    Returns
+    -------
+    regressions: list
+        (case, phase, baseline time, time) of each regressed phase
+
+    """
+    previous = dict((_key(case), case) for case in baseline["cases"])
+    regressions = []
+    for case in results["cases"]:
+        other = previous.get(_key(case))
+        if other is None:
+            continue
+        for name in PHASES:
+            new = case["phases"][name]["time"]
+            old = other["phases"][name]["time"]
+            if max(new, old) < minimum:
+                continue
+            if new > old * threshold:
+                regressions.append((_key(case), name, old, new))
+    return regressions
+
+
+def _key(case):
+    return tuple(case[d] for d in DIMENSIONS)
+
+
+def _report(result):
+    times = " ".join("%s=%.3fs" % (name, phase["time"])
+                     for name, phase in result["phases"].items())
+    print("%s rows=%d columns=%d %s total=%.3fs" % (
+        " ".join("%s=%s" % (d, result[d]) for d in DIMENSIONS),
+        result["rows"], result["columns"], times, result["total"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--stations-per-node", type=int, nargs="+",
+                        default=[2])
+    parser.add_argument("--reserve-zones", type=int, nargs="+", default=[2])
+    parser.add_argument("--risk-branches", type=int, nargs="+", default=[1])
+    parser.add_argument("--instances", type=int, nargs="+", default=[1, 20])
+    parser.add_argument("--backend", default="pulp",
+                        choices=SPDModel.backends)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Do not measure the memory of each phase")
+    parser.add_argument("--output", help="File to write the results to")
+    parser.add_argument("--compare", help="Results of a previous run to "
+                        "compare against, failing on any regression")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Ratio of the times counted as a regression")
+    args = parser.parse_args(argv)
+
+    cases = [OrderedDict(zip(DIMENSIONS, values)) for values in
+             itertools.product(args.nodes, args.stations_per_node,
+                               args.reserve_zones, args.risk_branches,
+                               args.instances)]
+
+    results = OrderedDict([
+        ("version", VERSION),
+        ("environment", environment()),
+        ("settings", OrderedDict([("backend", args.backend),
+                                  ("seed", args.seed),
+                                  ("repeat", args.repeat)])),
+        ("cases", benchmark(cases, args.backend, args.seed, args.repeat,
+                            not args.no_memory))])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for key, name, old, new in regressions:
+            print("Regression %s %s: %.3fs -> %.3fs" % (
+                " ".join("%s=%s" % item for item in zip(DIMENSIONS, key)),
+                name, old, new))
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,17 +2,77 @@
 # -*- coding: utf-8 -*-
 # flake8: noqa
 
+"""
+The public objects of pyspd are imported lazily, each module and its
+dependencies (numpy, pandas, pulp and the solvers) being imported the
+first time one of its objects is used, so importing pyspd is cheap for
+short lived workers which may not need all of them.
+
+The modules import each other relatively, e.g. "from .registry import
+hooks", so each is only ever imported as a submodule of the package and
+shares a single copy of its state, such as the hook registry.
+
+"""
+
+import sys
+from types import ModuleType
+
 __author__ = 'Nigel Cleland'
 __email__ = 'nigel.cleland@gmail.com'
 __version__ = '0.1.0'
 
-from actors import (SystemOperator,
-                    Station,
-                    Company,
-                    Node,
-                    ReserveZone,
-                    Branch,
-                    InterruptibleLoad)
+# The public objects of each module
+_exports = (
+    ('actors', ('SystemOperator', 'Station', 'Company', 'Node',
+                'ReserveZone', 'Branch', 'InterruptibleLoad')),
+    ('model', ('SPDModel',)),
+    ('merit', ('MeritOrder',)),
+    ('adaptive', ('AdaptiveSweep',)),
+    ('cache', ('SolutionCache', 'CachedModel')),
+    ('matrix', ('LPMatrix',)),
+    ('presolve', ('Presolve',)),
+    ('profiling', ('Profiler',)),
+    ('registry', ('hooks', 'HookRegistry')),
+    ('parameters', ('ParameterStore',)),
+    ('analysis', ('Analytics',)),
+    ('profits', ('ProfitEngine',)),
+    ('sensitivity', ('Sensitivity',)),
+    ('storage', ('ResultWriter', 'ResultSet')),
+    ('runner', ('SweepRunner', 'SweepChunk')),
+    ('scenarios', ('ScenarioGrid', 'ScenarioTable')),
+    ('synthetic', ('synthetic_network',)),
+    ('costs', ('LinearCost', 'QuadraticCost', 'PiecewiseLinearCost',
+               'evaluate_costs')))
+
+# The module defining each public object
+_modules = dict((name, module) for module, names in _exports
+                for name in names)
+
+__all__ = [name for module, names in _exports for name in names]
+
+
+class _LazyModule(ModuleType):
+    """ The pyspd package, importing the module defining a public
+    object on first access
+    """
+
+    def __getattr__(self, name):
+        module = _modules.get(name)
+        if module is None:
+            raise AttributeError("module %r has no attribute %r" %
+                                 (self.__name__, name))
+        qualified = '.'.join([self.__name__, module])
+        __import__(qualified)
+        value = getattr(sys.modules[qualified], name)
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(__all__))
+
 
-from model import SPDModel
-from analysis import Analytics
+# Replace this module, keeping a reference so its globals stay alive
+_package = _LazyModule(__name__, __doc__)
+_package.__dict__.update(sys.modules[__name__].__dict__)
+_package._module = sys.modules[__name__]
+sys.modules[__name__] = _package
@@ -0,0 +1,13 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Run the command line batch runner with python -m pyspd.
+
+"""
+
+import sys
+
+from pyspd.cli import main
+
+sys.exit(main())
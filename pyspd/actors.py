@@ -7,6 +7,11 @@ from collections import defaultdict
 # C Imports
 import numpy as np
 import pandas as pd
+
+from .parameters import ParameterStore
+from .costs import LinearCost, series_cost
+from .profiling import tracer
+from .scenarios import Scenarios, ScenarioGrid, table_scenarios
 # ----------------------------------------------------------------------------
 # SYSTEM OPERATOR
 # ----------------------------------------------------------------------------
@@ -42,8 +47,10 @@ class SystemOperator(object):
         at once to assess the benefits of a particular strategy over
         a particular run.
 
-        This is a user exposed function and must be called whenever a
-        run is being created.
+        This is a user exposed function, without which a model solves a
+        single dispatch. The parameters of every instance are held
+        in the columnar ParameterStore self.parameters, the actor itself
+        is not modified.
 
         Parameters
         ----------
@@ -57,26 +64,141 @@ class SystemOperator(object):
 
         """
 
-        self.itinstances = []
+        if actor:
+            scenarios = Scenarios([(actor, variable)], [list(varrange)])
+            return self.load_scenarios(scenarios)
+
+        # Do a single dispatch
+        self.itinstances = ["Single"]
         self.itdispatches = {}
+        self._create_parameters({}, pd.Index(self.itinstances))
+        return self
 
-        if actor:
-            for value in varrange:
-                itname = '_'.join([actor.name, variable, str(value)])
-                self.itinstances.append(itname)
-                actor.__dict__[variable] = value
-                self._add_dispatch(itname)
+    def create_grid(self, axes, chunksize=1000):
+        """ Create a lazily generated grid of scenarios, the Cartesian
+        product of several axes. The grid is consumed one chunk at a
+        time through sweep, so very large grids are solved in bounded
+        memory. The actors are never modified.
+
+        Parameters
+        ----------
+        axes: list
+            The (actor, variable, values) of each axis
+        chunksize: int, default 1000
+            The maximum number of scenarios solved at once
+
+        Returns
+        -------
+        grid: ScenarioGrid
+
+        """
+        return ScenarioGrid(axes, chunksize=chunksize)
+
+    def create_scenarios(self, table):
+        """ Create one instance for each row of a DataFrame of scenarios,
+        all of which are solved at once. Each column overrides one
+        parameter of one actor, missing values keep the current value
+        of the parameter. The results are indexed by the index of the
+        table. The actors are not modified.
+
+        Usage:
+        ------
+        table = pd.DataFrame({("Haywards", "demand"): [150, 180],
+                              ("Roxburgh", "energy_price"): [30, np.nan]},
+                             index=["Base", "Peak"])
+        SO.create_scenarios(table)
+
+        Parameters
+        ----------
+        table: DataFrame
+            One row per scenario with (actor name, variable) columns
+
+        """
+        return self.load_scenarios(table_scenarios(self, table))
+
+    def sweep(self, grid):
+        """ Load each chunk of a ScenarioGrid or ScenarioTable in turn,
+        yielding the chunk once it is the current set of instances
+
+        Usage:
+        ------
+        for scenarios in SO.sweep(grid):
+            SPD = SPDModel(SO)
+            SPD.full_run()
+
+        """
+        for scenarios in grid:
+            self.load_scenarios(scenarios)
+            yield scenarios
 
-        else:
-            # Do a single dispatch
-            itname = "Single"
-            self.itinstances.append(itname)
+    def load_scenarios(self, scenarios):
+        """ Make a chunk of Scenarios the current set of instances
 
-            self._add_dispatch(itname)
+        Parameters
+        ----------
+        scenarios: Scenarios
+            The values of the varied parameters in each instance
+
+        """
+        self.itinstances = scenarios.instances
+        self.itdispatches = {}
+        self._create_parameters(scenarios.overrides, scenarios.index)
+        return self
+
+    def ensure_parameters(self):
+        """ The ParameterStore of the current instances, creating a
+        single dispatch when no iterator has been created
+
+        Returns
+        -------
+        parameters: ParameterStore
+
+        """
+        if getattr(self, 'parameters', None) is None:
+            self.create_iterator()
+        return self.parameters
 
+    def parameter_dicts(self, profiler=None):
+        """ Create the name keyed parameter lists and dictionaries for
+        every instance, as used by the pulp Linear Program.
+
+        These are only created on request, from the values held in the
+        ParameterStore.
+
+        Parameters
+        ----------
+        profiler: Profiler, default None
+            Records the dispatch of each instance as a phase
+
+        """
+        self.ensure_parameters()
+        if self._parameter_dicts:
+            return self
+
+        self._create_empty_parameters()
+        trace = tracer(profiler, self)
+        for k, itname in enumerate(self.itinstances):
+            if trace is None:
+                self._add_dispatch(itname, k)
+            else:
+                with trace.phase("_add_dispatch", "parameters",
+                                 instance=itname, position=k):
+                    self._add_dispatch(itname, k)
+
+        self._parameter_dicts = True
         return self
 
-    def _add_dispatch(self, itname):
+    def _create_parameters(self, overrides, index):
+        """ Create the columnar parameter store for the current
+        instances, discarding any parameter dictionaries
+        """
+        self.parameters = ParameterStore(self, self.itinstances, overrides,
+                                         index)
+        self._create_empty_parameters()
+        self._parameter_dicts = False
+        return self
+
+    def _add_dispatch(self, itname, k):
         """ Convenience wrapper, calls each of the parameter functons
         Acts as a hidden API.
 
@@ -84,74 +206,81 @@ class SystemOperator(object):
         ----------
         itname: str
             The iterable name to be applied
+        k: int
+            Position of the instance in the ParameterStore
         """
 
-        self._station_parameters(itname)
-        self._interruptible_load_parameters(itname)
-        self._node_parameters(itname)
-        self._transmission_parameters(itname)
+        self._station_parameters(itname, k)
+        self._interruptible_load_parameters(itname, k)
+        self._node_parameters(itname, k)
+        self._transmission_parameters(itname, k)
         self._rezerve_zone_parameters(itname)
 
-    def _station_parameters(self, itname):
+    def _station_parameters(self, itname, k):
         """ Hidden function will create a number of lists and dictionaries
         containing information about the Linear Program to be passed
         to the model.
 
         """
-        for station in self.stations:
+        values = self._instance_values('stations', k)
+        for i, station in enumerate(self.stations):
             name = '_'.join([itname, station.name])
             self.energy_station_names.append(name)
-            self.energy_station_capacity[name] = station.energy_offer
-            self.energy_station_price[name] = station.energy_price
-            self.energy_station_risk[name] = station.risk
+            self.energy_station_capacity[name] = values['energy_offer'][i]
+            self.energy_station_price[name] = values['energy_price'][i]
+            self.energy_station_risk[name] = values['risk'][i]
 
             self.reserve_station_names.append(name)
-            self.reserve_station_capacity[name] = station.reserve_offer
-            self.reserve_station_price[name] = station.reserve_price
-            self.reserve_station_proportion[name] = station.reserve_proportion
+            self.reserve_station_capacity[name] = values['reserve_offer'][i]
+            self.reserve_station_price[name] = values['reserve_price'][i]
+            self.reserve_station_proportion[name] = values[
+                'reserve_proportion'][i]
 
             self.reserve_spinning_stations.append(name)
-            self.total_station_capacity[name] = station.capacity
+            self.total_station_capacity[name] = values['capacity'][i]
 
-    def _interruptible_load_parameters(self, itname):
+    def _interruptible_load_parameters(self, itname, k):
         """ Hidden function will create a number of lists and dictionaries
         containing information about the Linear Program to be passed
         to the model.
 
         """
-        for IL in self.interruptible_loads:
+        values = self._instance_values('interruptible_loads', k)
+        for i, IL in enumerate(self.interruptible_loads):
             name = '_'.join([itname, IL.name])
             self.reserve_IL_names.append(name)
-            self.reserve_IL_capacity[name] = IL.reserve_offer
-            self.reserve_IL_price[name] = IL.reserve_price
+            self.reserve_IL_capacity[name] = values['reserve_offer'][i]
+            self.reserve_IL_price[name] = values['reserve_price'][i]
 
             self.reserve_station_names.append(name)
-            self.reserve_station_price[name] = IL.reserve_price
-            self.reserve_station_capacity[name] = IL.reserve_offer
+            self.reserve_station_price[name] = values['reserve_price'][i]
+            self.reserve_station_capacity[name] = values['reserve_offer'][i]
 
-    def _node_parameters(self, itname):
+    def _node_parameters(self, itname, k):
         """ Hidden function will create a number of lists and dictionaries
         containing information about the Linear Program to be passed
         to the model.
 
         """
-        for node in self.nodes:
+        values = self._instance_values('nodes', k)
+        for i, node in enumerate(self.nodes):
             name = '_'.join([itname, node.name])
             self.node_names.append(name)
-            self.nodal_demand[name] = node.demand
+            self.nodal_demand[name] = values['demand'][i]
 
             # Nodal Stations
             for station in node.stations:
                 stat_name = '_'.join([itname, station.name])
                 self.nodal_stations[name].append(stat_name)
 
-    def _transmission_parameters(self, itname):
+    def _transmission_parameters(self, itname, k):
         """ Hidden function will create a number of lists and dictionaries
         containing information about the Linear Program to be passed
         to the model.
 
         """
-        for branch in self.branches:
+        values = self._instance_values('branches', k)
+        for i, branch in enumerate(self.branches):
             name = '_'.join([itname, branch.name])
             sn_name = '_'.join([itname, branch.sending_node.name])
             rn_name = '_'.join([itname, branch.receiving_node.name])
@@ -161,12 +290,12 @@ class SystemOperator(object):
             self.node_flow_map[sn_name].append(name)
             self.node_flow_map[rn_name].append(name)
 
-            self.branch_capacity[name] = branch.capacity
+            self.branch_capacity[name] = values['capacity'][i]
 
             self.node_flow_direction[sn_name][name] = 1
             self.node_flow_direction[rn_name][name] = -1
 
-            if branch.risk:
+            if values['risk'][i]:
                 sn_rz_name = '_'.join([itname, branch.sending_node.RZ.name])
                 rn_rz_name = '_'.join([itname, branch.receiving_node.RZ.name])
 
@@ -178,6 +307,13 @@ class SystemOperator(object):
                     self.reserve_zone_flow_direction[sn_rz_name][name] = -1
                     self.reserve_zone_flow_direction[rn_rz_name][name] = 1
 
+    def _instance_values(self, group, k):
+        """ Python values of the parameters of an actor group in
+        instance k of the ParameterStore
+        """
+        return dict((parameter, values[k].tolist()) for parameter, values
+                    in self.parameters.values[group].items())
+
     def _rezerve_zone_parameters(self, itname):
         """ Hidden function will create a number of lists and dictionaries
         containing information about the Linear Program to be passed
@@ -207,6 +343,26 @@ class SystemOperator(object):
         self.station_names = []
         self.station_map = {}
 
+        self.nodes = []
+        self.node_map = {}
+
+        self.reserve_zones = []
+
+        self.interruptible_loads = []
+        self.interruptible_load_names = []
+        self.interruptible_load_map = {}
+
+        self.branches = []
+        self.branch_map = {}
+
+        self._create_empty_parameters()
+        return self
+
+    def _create_empty_parameters(self):
+        """ Initialises the empty parameter lists and dictionaries
+        which are filled by _add_dispatch
+
+        """
         self.energy_station_names = []
         self.reserve_station_names = []
         self.energy_station_price = {}
@@ -217,15 +373,12 @@ class SystemOperator(object):
         self.total_station_capacity = {}
         self.energy_station_risk = {}
 
-        self.nodes = []
         self.node_names = []
-        self.node_map = {}
         self.node_flow_direction = defaultdict(dict)
         self.node_flow_map = defaultdict(list)
         self.nodal_stations = defaultdict(list)
         self.nodal_demand = {}
 
-        self.reserve_zones = []
         self.reserve_zone_names = []
         self.reserve_zone_generators = defaultdict(list)
         self.reserve_zone_reserve = defaultdict(list)
@@ -234,17 +387,11 @@ class SystemOperator(object):
         self.reserve_zone_flow_direction = defaultdict(dict)
         self.reserve_spinning_stations = []
 
-        self.interruptible_loads = []
-        self.interruptible_load_names = []
-        self.interruptible_load_map = {}
-
         self.reserve_IL_names = []
         self.reserve_IL_capacity = {}
         self.reserve_IL_price = {}
 
-        self.branches = []
         self.branch_names = []
-        self.branch_map = {}
         self.branch_capacity = {}
         return self
 
@@ -534,8 +681,8 @@ class Station(object):
         self.SO = SO
         SO._add_station(self)
 
-        self.energy_cost_func = lambda x: 0
-        self.reserve_cost_func = lambda x: 0
+        self.energy_cost_func = LinearCost(0)
+        self.reserve_cost_func = LinearCost(0)
 
     def add_energy_offer(self, price, offer):
         """ Adds an Energy Offer to the station
@@ -571,11 +718,29 @@ class Station(object):
         return self
 
     def add_energy_cost_func(self, func):
+        """ Set the cost of the energy dispatch of the Station
+
+        Parameters
+        ----------
+        func: CostModel, callable
+            A LinearCost, QuadraticCost or PiecewiseLinearCost is
+            evaluated for every instance at once, any other callable
+            is called with each dispatch in turn
 
+        """
         self.energy_cost_func = func
 
     def add_reserve_cost_func(self, func):
+        """ Set the cost of the reserve dispatch of the Station
 
+        Parameters
+        ----------
+        func: CostModel, callable
+            A LinearCost, QuadraticCost or PiecewiseLinearCost is
+            evaluated for every instance at once, any other callable
+            is called with each dispatch in turn
+
+        """
         self.reserve_cost_func = func
 
     def calculate_profits(self):
@@ -616,11 +781,13 @@ class Station(object):
         self.total_revenue.name = self._name("Total Revenue")
 
     def _energy_cost(self):
-        self.energy_cost = self.energy_dispatch.apply(self.energy_cost_func)
+        self.energy_cost = series_cost(self.energy_cost_func,
+                                       self.energy_dispatch)
         self.energy_cost.name = self._name("Energy Cost")
 
     def _reserve_cost(self):
-        self.reserve_cost = self.reserve_dispatch.apply(self.reserve_cost_func)
+        self.reserve_cost = series_cost(self.reserve_cost_func,
+                                        self.reserve_dispatch)
         self.reserve_cost.name = self._name("Reserve Cost")
 
     def _total_cost(self):
@@ -675,7 +842,7 @@ class InterruptibleLoad(object):
         self.name = name
         self.node = Node
         self.company = Company
-        self.reserve_cost_func = lambda x: 0
+        self.reserve_cost_func = LinearCost(0)
 
         self.SO = SO
         Node._add_interruptible_load(self)
@@ -700,6 +867,14 @@ class InterruptibleLoad(object):
         return self
 
     def add_reseve_cost_func(self, func):
+        """ Set the cost of the reserve dispatch of the Interruptible Load
+
+        Parameters
+        ----------
+        func: CostModel, callable
+            Evaluated for every instance at once if a CostModel
+
+        """
         self.reserve_cost_func = func
 
     def calculate_profits(self):
@@ -726,7 +901,8 @@ class InterruptibleLoad(object):
         self.total_revenue.name = self._name("Total Revenue")
 
     def _reserve_cost(self):
-        self.reserve_cost = self.reserve_dispatch.apply(self.reserve_cost_func)
+        self.reserve_cost = series_cost(self.reserve_cost_func,
+                                        self.reserve_dispatch)
         self.reserve_cost.name = self._name("Reserve Cost")
 
     def _total_cost(self):
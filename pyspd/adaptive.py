@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Adaptive sweep of a single offer parameter, locating the breakpoints of
+the prices and dispatch instead of solving a dense grid.
+
+"""
+
+from collections import OrderedDict
+
+# C Libraries
+import numpy as np
+import pandas as pd
+
+from .model import ResultModel, invalidate_analysis
+from .parameters import ParameterStore
+from .scenarios import Scenarios
+
+
+class AdaptiveSweep(ResultModel):
+    """AdaptiveSweep
+
+    The prices and dispatch of a Linear Program are piecewise constant
+    or piecewise linear in a single parameter. Starting from a coarse
+    set of samples the sweep splits only the intervals over which the
+    results change, until each interval either follows a single linear
+    piece or is narrower than the tolerance, in which case it contains
+    a breakpoint. Each interval is split at a third and two thirds of
+    the way across and follows a single piece only when both points lie
+    on the line between its ends, as a step in the merit order at the
+    middle of an interval leaves a single midpoint on the line. All of
+    the interior points of a round are solved at once.
+
+    The samples bounding the pieces form a compact piecewise
+    representation from which evaluate reconstructs the results for any
+    set of values, which are then read through Analytics exactly as for
+    an SPDModel, including the price and profit frames.
+
+    A piece which begins and ends between two of the initial samples
+    is not found, so the initial samples should be no further apart
+    than the narrowest piece of interest.
+
+    Usage:
+    ------
+    sweep = AdaptiveSweep(SystemOperator, manapouri, "energy_price",
+                          0, 500).run()
+    sweep.breakpoints
+    sweep.evaluate(np.arange(0, 500))
+    Analytics(sweep).final_price_df
+
+    Parameters
+    ----------
+    ISO: SystemOperator
+        The System Operator containing the dispatch to be solved
+    actor: Node, Station, InterruptibleLoad, Branch
+        The actor whose parameter is varied
+    variable: str
+        The name of the parameter, e.g. 'energy_price'
+    lower, upper: float
+        The range of the parameter to sweep
+    samples: int, default 5
+        The number of evenly spaced initial samples
+    tolerance: float, default 1e-3
+        The width to which each breakpoint is located
+    families: list, default None
+        The result families which define a change, defaults to the
+        energy and reserve prices and dispatch
+    max_solves: int, default 1000
+        Stop splitting once this many values have been solved
+    options:
+        Further keyword arguments of the highs SPDModel solving the
+        samples, e.g. processes or presolve
+
+    """
+
+    backend = "adaptive"
+
+    # Results compared to decide whether an interval has changed
+    compared = ("Energy_Price", "Reserve_Price", "Energy_Total",
+                "Reserve_Total")
+
+    # Absolute difference below which two results are the same
+    atol = 1e-6
+
+    # Positions of the interior points solved within each interval
+    fractions = (1. / 3, 2. / 3)
+
+    def __init__(self, ISO, actor, variable, lower, upper, samples=5,
+                 tolerance=1e-3, families=None, max_solves=1000, **options):
+        super(AdaptiveSweep, self).__init__()
+        if not upper > lower:
+            raise ValueError("The upper value must exceed the lower value")
+        if samples < 2:
+            raise ValueError("At least two initial samples are required")
+
+        self.ISO = ISO
+        self.actor = actor
+        self.variable = variable
+        self.lower = float(lower)
+        self.upper = float(upper)
+        self.samples = samples
+        self.tolerance = tolerance
+        self.families = list(families or self.compared)
+        self.max_solves = max_solves
+        self.options = options
+        self.solution_time = {'build': 0, 'transfer': 0, 'solve': 0}
+        self._store = None
+
+    @property
+    def store(self):
+        """ ParameterStore of the values last evaluated """
+        if self._store is None:
+            raise ValueError("Call evaluate before reading the results")
+        return self._store
+
+    def run(self):
+        """ Publically exposed API
+        Split the range until every breakpoint is located
+
+        Returns
+        -------
+        self.points: array
+            The sorted values bounding each piece
+        self.values: OrderedDict
+            The value by actor array of every result family at the points
+        self.jumps: array
+            Whether each interval between the points contains a breakpoint
+        self.solves: int
+            The number of values solved
+
+        """
+        points = np.linspace(self.lower, self.upper, self.samples)
+        values = self._solve(points)
+        self.solves = len(points)
+
+        # Intervals still to be resolved, as positions into the points
+        linear = np.zeros(len(points) - 1, dtype=bool)
+        pending = np.ones(len(points) - 1, dtype=bool)
+        inner = len(self.fractions)
+        while True:
+            left, right = np.flatnonzero(pending), np.flatnonzero(pending) + 1
+            same = self._same(values, left, right)
+            narrow = points[right] - points[left] <= self.tolerance
+            linear[left[same]] = True
+
+            split = ~same & ~narrow
+            budget = (self.max_solves - self.solves) // inner
+            if not split.any() or budget <= 0:
+                break
+            left, right = left[split][:budget], right[split][:budget]
+
+            # The interior points of each interval, in order
+            fractions = np.asarray(self.fractions)
+            width = points[right] - points[left]
+            interior = points[left][:, None] + width[:, None] * fractions
+            interior_values = self._solve(interior.ravel())
+            self.solves += interior.size
+
+            # Linear when every interior point lies on the line between
+            # the ends
+            on_line = np.ones(len(left), dtype=bool)
+            for k, fraction in enumerate(fractions):
+                interpolated = OrderedDict(
+                    (f, v[left] + fraction * (v[right] - v[left]))
+                    for f, v in values.items())
+                solved = OrderedDict((f, v[k::inner])
+                                     for f, v in interior_values.items())
+                on_line &= self._close(solved, interpolated)
+
+            points, values, linear, pending = self._insert(
+                points, values, linear, left, interior, interior_values,
+                on_line)
+
+        self.points, self.values = points, values
+        self.jumps = ~linear
+        self._compact()
+        return self
+
+    @property
+    def breakpoints(self):
+        """ Location of each breakpoint, the middle of the interval
+        known to contain it
+        """
+        return (self.points[:-1][self.jumps] +
+                self.points[1:][self.jumps]) / 2
+
+    @property
+    def pieces(self):
+        """ DataFrame of the intervals between the points and whether
+        each follows a linear piece or contains a breakpoint
+        """
+        return pd.DataFrame({'start': self.points[:-1],
+                             'stop': self.points[1:],
+                             'breakpoint': self.jumps},
+                            columns=['start', 'stop', 'breakpoint'])
+
+    def evaluate(self, varrange):
+        """ Reconstruct the results at each value without solving.
+        Within a linear piece the results are interpolated, within an
+        interval containing a breakpoint the results of the nearer end
+        are taken.
+
+        Parameters
+        ----------
+        varrange: iterable
+            The values of the parameter to reconstruct, each within the
+            range swept
+
+        """
+        x = np.asarray(list(varrange), dtype=float)
+        if ((x < self.lower) | (x > self.upper)).any():
+            raise ValueError("Values must lie within %s and %s" %
+                             (self.lower, self.upper))
+
+        points = self.points
+        left = np.clip(np.searchsorted(points, x, side='right') - 1,
+                       0, len(points) - 2)
+        weight = (x - points[left]) / (points[left + 1] - points[left])
+        weight = np.where(self.jumps[left], np.round(weight), weight)
+
+        self.results = OrderedDict(
+            (family, v[left] + weight[:, None] * (v[left + 1] - v[left]))
+            for family, v in self.values.items())
+
+        scenarios = self._scenarios(x)
+        self._store = ParameterStore(self.ISO, scenarios.instances,
+                                     scenarios.overrides, scenarios.index)
+        self.status = "Optimal"
+
+        invalidate_analysis(self)
+        return self
+
+    def _scenarios(self, x):
+        return Scenarios([(self.actor, self.variable)], [x])
+
+    def _solve(self, x):
+        """ Solve the values as the instances of a single model
+
+        Returns
+        -------
+        values: OrderedDict
+            Value by actor array of every result family
+
+        """
+        scenarios = self._scenarios(x)
+        store = ParameterStore(self.ISO, scenarios.instances,
+                               scenarios.overrides, scenarios.index)
+        model = self.solve_store(store, **self.options)
+
+        if model.status != "Optimal":
+            raise ValueError("The sweep could not be solved, status %s" %
+                             model.status)
+        for phase, duration in model.solution_time.items():
+            self.solution_time[phase] += duration or 0
+        return OrderedDict((family, model.result_array(family))
+                           for family in self.result_families)
+
+    def _close(self, a, b):
+        """ Whether each row of two sets of results agree """
+        close = np.ones(len(a[self.families[0]]), dtype=bool)
+        for family in self.families:
+            close &= np.isclose(a[family], b[family], rtol=0,
+                                atol=self.atol).all(axis=1)
+        return close
+
+    def _same(self, values, left, right):
+        """ Whether the results at each pair of points agree """
+        return self._close(OrderedDict((f, v[left]) for f, v in
+                                       values.items()),
+                           OrderedDict((f, v[right]) for f, v in
+                                       values.items()))
+
+    def _insert(self, points, values, linear, left, interior,
+                interior_values, on_line):
+        """ Insert the interior points after the left end of their
+        intervals, every part of an interval being linear when the
+        interior points lie on the line and pending otherwise
+
+        """
+        inner = interior.shape[1]
+        positions = np.repeat(left + 1, inner)
+        points = np.insert(points, positions, interior.ravel())
+        values = OrderedDict((f, np.insert(v, positions, interior_values[f],
+                                           axis=0))
+                             for f, v in values.items())
+
+        # Each split interval becomes inner + 1, the rest are resolved
+        previous = np.arange(len(linear))
+        moved = previous + inner * np.searchsorted(left, previous)
+        first = left + inner * np.arange(len(left))
+
+        resolved = np.zeros(len(points) - 1, dtype=bool)
+        resolved[moved] = linear
+        pending = np.zeros(len(points) - 1, dtype=bool)
+        for k in range(inner + 1):
+            resolved[first + k] = on_line
+            pending[first + k] = ~on_line
+        return points, values, resolved, pending
+
+    def _compact(self):
+        """ Drop the points inside linear pieces which lie on the line
+        between their neighbours
+        """
+        points, values, jumps = self.points, self.values, self.jumps
+        keep = [0]
+        for i in range(1, len(points) - 1):
+            previous = keep[-1]
+            if jumps[i - 1] or jumps[i]:
+                keep.append(i)
+                continue
+            weight = ((points[i] - points[previous]) /
+                      (points[i + 1] - points[previous]))
+            line = OrderedDict(
+                (f, (v[previous] + weight * (v[i + 1] - v[previous]))[None])
+                for f, v in values.items())
+            here = OrderedDict((f, v[i][None]) for f, v in values.items())
+            if not self._close(here, line)[0]:
+                keep.append(i)
+        keep.append(len(points) - 1)
+        keep = np.array(keep)
+
+        intervals = np.array([jumps[keep[k]:keep[k + 1]].any()
+                              for k in range(len(keep) - 1)], dtype=bool)
+        self.points = points[keep]
+        self.values = OrderedDict((f, v[keep]) for f, v in values.items())
+        self.jumps = intervals
+
+if __name__ == '__main__':
+    pass
@@ -1,90 +1,184 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import pulp
-import time
-from collections import defaultdict
+from collections import OrderedDict
 
 # C Libraries
 import pandas as pd
 import numpy as np
 
+from .profits import ProfitEngine
+from .sensitivity import Sensitivity
+from .storage import ResultWriter
+from .profiling import tracer
+
 class Analytics(object):
-    """docstring for Analytics"""
+    """Analytics
+
+    Lazy view of the results of a solved SPDModel. The solution of each
+    result family is extracted into an instance by actor array the
+    first time it is needed and every DataFrame is built on first
+    access and cached, so a workflow which only needs the energy prices
+    never pays for the dispatch and flows.
+
+    Re-solving the model invalidates the cached results.
+
+    Usage:
+    ------
+    analysis = Analytics(SPD)
+    analysis.final_price_df
+    analysis.master
+
+    Parameters
+    ----------
+    SPD: SPDModel
+        The solved model
+
+    """
+
+    # Result families contained in each of the cached DataFrames
+    frames = OrderedDict([
+        ('final_price_df', ("Energy_Price", "Reserve_Price")),
+        ('final_dispatch_df', ("Energy_Total", "Reserve_Total")),
+        ('branch_flows', ("Transmission_Total",)),
+        ('reserve_df', ("Reserve_Price", "Reserve_Risk")),
+        ('master', ("Energy_Price", "Reserve_Price", "Energy_Total",
+                    "Reserve_Total", "Transmission_Total", "Reserve_Risk"))])
+
     def __init__(self, SPD):
         super(Analytics, self).__init__()
-        self.lp = SPD.lp
+        self.SPD = SPD
         self.ISO = SPD.ISO
         SPD.ISO.Analysis = self
-        self._parse_result()
-        #self.create_price_df()
-        #self.create_dispatch_df()
-        #self.create_reserve_df()
-        #self.create_flow_df()
-        #self.create_master()
+        self.invalidate()
 
+    def invalidate(self):
+        """ Discard every cached result, called by the SPDModel whenever
+        it is re-solved
+        """
+        self.lp = getattr(self.SPD, 'lp', None)
+        self.store = self.SPD.store
+        self._solution = OrderedDict()
+        self._frames = {}
+        self._profits = None
+        self._sensitivity = None
+
+    @property
+    def solution(self):
+        """ Instance by actor array of every result family """
+        for family in self.SPD.result_families:
+            self.family(family)
+        return self._solution
+
+    def family(self, family):
+        """ Instance by actor array of the solution of a single result
+        family, extracted on first access.
+
+        Parameters
+        ----------
+        family: str
+            The result family, e.g. "Energy_Price"
+
+        """
+        if family not in self._solution:
+            trace = tracer(getattr(self.SPD, 'profiler', None), self)
+            if trace is None:
+                self._extract(family)
+            else:
+                with trace.phase("family", "analytics", family=family):
+                    self._extract(family)
+        return self._solution[family]
+
+    def _extract(self, family):
+        if self.SPD.backend == "pulp":
+            self._extract_lp(self.SPD.result_families[family][1])
+        else:
+            self._solution[family] = self.SPD.result_array(family)
+
+    @property
+    def master(self):
+        """ DataFrame containing information about the entire system """
+        return self._frame('master')
+
+    @property
+    def final_price_df(self):
+        """ DataFrame of the final energy and reserve prices indexed by
+        the actor variable
+        """
+        return self._frame('final_price_df')
+
+    @property
+    def final_dispatch_df(self):
+        """ DataFrame of the final energy and reserve dispatches of the
+        different units
+        """
+        return self._frame('final_dispatch_df')
+
+    @property
+    def branch_flows(self):
+        """ DataFrame of Transmission Flows """
+        return self._frame('branch_flows')
+
+    @property
+    def reserve_df(self):
+        """ DataFrame of Reserve prices and requirements """
+        return self._frame('reserve_df')
+
+    @property
+    def profits(self):
+        """ ProfitEngine containing the revenue, cost and profit of every
+        unit and company
+        """
+        if self._profits is None:
+            self._profits = ProfitEngine(self)
+        return self._profits
+
+    @property
+    def sensitivity(self):
+        """ Sensitivity of the prices and dispatch to every offer,
+        demand and branch capacity, highs backend only
+        """
+        if self._sensitivity is None:
+            self._sensitivity = Sensitivity(self)
+        return self._sensitivity
+
+    def save(self, directory, profits=True):
+        """ Write every result family, and the profits, to a directory
+        of .npy blocks which may be reloaded lazily with ResultSet.
+        Saving to a directory which already holds results adds these
+        instances as a new block.
+
+        Parameters
+        ----------
+        directory: str
+            Directory to write to
+        profits: bool, default True
+            Also write the unit and company revenue, cost and profit
+
+        """
+        return ResultWriter(directory, profits=profits).append(self)
 
     def create_master(self):
         """ Create a DataFrame containing information about
         the entire system
         """
-
-        prices, dispatch, risk, flows = (None, None, None, None)
-        try:
-            prices = self._parse_to_df([self.final_energy_prices,
-                                    self.final_reserve_prices],
-                                    parse_type="Constraint")
-        except:
-            pass
-        try:
-            dispatch = self._parse_to_df([self.final_energy_dispatch,
-                                      self.final_reserve_dispatch],
-                                      parse_type="Variable")
-        except:
-            pass
-        try:
-            risk = self._parse_to_df([self.final_risk_requirements],
-                                 parse_type="Variable")
-        except:
-            pass
-        try:
-            flows = self._parse_to_df([self.final_branch_flow],
-                                  parse_type="Variable")
-        except:
-            pass
-
-        self.master = pd.concat([prices, dispatch, flows, risk], axis=1)
+        return self.master
 
     def create_flow_df(self):
         """ Create a DataFrame of Transmission Flows
         """
-
-        self.branch_flows = self._parse_to_df([self.final_branch_flow],
-                                              parse_type="Variable")
+        return self.branch_flows
 
     def create_reserve_df(self):
         """ Create a DataFrame of Reserve prices and requirements
         """
-
-        prices = self._parse_to_df([self.final_reserve_prices],
-                                    parse_type="Constraint")
-        requirement = self._parse_to_df([self.final_risk_requirements],
-                                         parse_type="Variable")
-
-        self.reserve_df = pd.concat([prices, requirement], axis=1)
+        return self.reserve_df
 
     def create_dispatch_df(self):
         """ Create a DataFrame of Energy and Reserve Dispatches
         Based upon the solution to the dispatch and different instances
         passed.
 
-        Parameters
-        ----------
-        self.final_energy_dispatch: dict
-            Dictionary of the final energy dispatches
-        self.final_reserve_dispatch: dict
-            Dictionary of the final reserve dispatches
-
         Returns
         -------
         self.final_dispatch_df: DataFrame
@@ -92,159 +186,153 @@ class Analytics(object):
             different units
 
         """
-        self.final_dispatch_df = self._parse_to_df([self.final_energy_dispatch,
-                                                 self.final_reserve_dispatch],
-                                                 parse_type="Variable")
+        return self.final_dispatch_df
 
     def create_price_df(self):
         """ Create a DataFrame of Energy and Reserve Prices
         Based upon the solution to the dispatch and the different
-        instances passed. Apply an index to sort by the changing variable
-        in question.
-
-        Parameters
-        ----------
-        self.final_energy_prices: dict
-            Dictionary of the final energy prices
-        self.final_reserve_prices: dict
-            Dictionary of the final reserve prices
+        instances passed, indexed by the changing variable in question.
 
         Returns
         -------
         self.final_price_df: DataFrame
-            DataFrame of the final energy and reserve prices sorted by
+            DataFrame of the final energy and reserve prices with
             the actor variable as the index
 
         """
+        return self.final_price_df
 
-        self.final_price_df = self._parse_to_df([self.final_energy_prices,
-                                                 self.final_reserve_prices],
-                                                 parse_type="Constraint")
-
-    def _parse_to_df(self, dicts, parse_type="Constraint"):
-        """ Parse one or more dictionary objects (contained in a list)
-        to a DataFrame. Will iterate through the objects to create
-        one large dictionary, and then parse that to a dict of dicts
-        which are then used to create the DataFrame.
+    def result_frame(self, families=None):
+        """ Create a DataFrame of one or more result families indexed by
+        instance, with (actor, quantity) MultiIndex columns. The frame is
+        assembled in bulk from the solution arrays and the index of the
+        ParameterStore, no names are parsed.
 
         Parameters
         ----------
-        dicts: list, iterable
-            List of dictionaries to be parsed
-        parse_type: string, "Constraint" or "Variable"
-            Whether to use the constraint or variable parser
+        families: list, default None
+            Result families to include, e.g. ["Energy_Price"]. Defaults
+            to every family in SPDModel.result_families
 
         Returns
         -------
         df: DataFrame
+
+        """
+        if families is None:
+            families = list(self.SPD.result_families)
+
+        columns, values = [], []
+        for family in families:
+            group, kind = self.SPD.result_families[family]
+            quantity = family.replace('_', ' ')
+            columns.extend((name, quantity)
+                           for name in self.store.names[group])
+            values.append(self.family(family))
+
+        columns = pd.MultiIndex.from_tuples(columns,
+                                            names=['actor', 'quantity'])
+        return pd.DataFrame(np.hstack(values), index=self.store.index,
+                            columns=columns)
+
+    @property
+    def final_energy_prices(self):
+        """ Energy Prices keyed by constraint name """
+        return self._result_dict("Energy_Price")
+
+    @property
+    def final_reserve_prices(self):
+        """ Reserve Prices keyed by constraint name """
+        return self._result_dict("Reserve_Price")
+
+    @property
+    def final_energy_dispatch(self):
+        """ Energy Dispatch keyed by variable name """
+        return self._result_dict("Energy_Total")
+
+    @property
+    def final_reserve_dispatch(self):
+        """ Reserve Dispatch keyed by variable name """
+        return self._result_dict("Reserve_Total")
+
+    @property
+    def final_branch_flow(self):
+        """ Branch Flows keyed by variable name """
+        return self._result_dict("Transmission_Total")
+
+    @property
+    def final_risk_requirements(self):
+        """ Risk requirements keyed by variable name """
+        return self._result_dict("Reserve_Risk")
+
+    def _frame(self, name):
+        """ Cached DataFrame with the flat "<actor> <quantity>" column
+        names used by the actors to query their results.
         """
+        if name not in self._frames:
+            trace = tracer(getattr(self.SPD, 'profiler', None), self)
+            if trace is None:
+                self._frames[name] = self._flat_frame(name)
+            else:
+                with trace.phase(name, "analytics"):
+                    self._frames[name] = self._flat_frame(name)
+        return self._frames[name]
 
-        if len(dicts) >= 2:
-            pairings, rest = dicts[0].copy(), dicts[1:]
-            for d in rest:
-                pairings.update(d)
-        else:
-            pairings = dicts[0].copy()
+    def _flat_frame(self, name):
+        df = self.result_frame(self.frames[name])
+        df.columns = [' '.join(column) for column in df.columns.values]
+        return df
 
-        sample_dict = defaultdict(dict)
+    def _empty(self, family):
+        """ Preallocate the instance by actor array of a result family """
+        group, kind = self.SPD.result_families[family]
+        return np.full((len(self.store), len(self.store.names[group])),
+                       np.nan)
 
-        for key, value in pairings.iteritems():
-            if parse_type == "Constraint":
-                keydict = self._parse_constraint_key(key)
-            else:
-                keydict = self._parse_variable_key(key.name)
+    def _extract_lp(self, kind):
+        """ Extract every variable or every constraint family of the
+        pulp problem in a single pass, using the positions recorded in
+        SPDModel.lp_index as the problem was built.
 
-            ind_key = ' '.join([keydict['iter-actor'],
-                                keydict['iter-actor-var'].title()])
-            name = ' '.join([keydict['result-actor'], keydict['variable']])
-            if value == None:
-                value = np.nan
-            else:
-                value = float(value)
-            sample_dict[name][keydict['var-value']] = value
+        Parameters
+        ----------
+        kind: str, "Variable" or "Constraint"
+            Which of the two passes to make
 
-        df = pd.DataFrame(sample_dict)
-        df.index.name = ind_key
-        df.index = df.index.astype(int)
-        df.sort_index(inplace=True)
+        """
+        index = self.SPD.lp_index
+        families = [f for f, (group, k) in self.SPD.result_families.items()
+                    if k == kind]
+        arrays = dict((family, self._empty(family)) for family in families)
+        flat = dict((family, values.reshape(-1))
+                    for family, values in arrays.items())
+
+        if kind == "Variable":
+            elements = ((v.name, v.varValue) for v in self.lp.variables())
+        else:
+            elements = ((name, c.pi) for name, c in
+                        self.lp.constraints.items())
 
-        return df
+        for name, value in elements:
+            position = index.get(name)
+            if position is not None and value is not None:
+                flat[position[0]][position[1]] = value
 
-    def _parse_variable_key(self, key):
-        """ Function to Parse the key and return the result as a dictionary
-        for indexing.
-        """
-
-        tup = key.split('_')
-        keydict = {'iter-actor': tup[2],
-                   'iter-actor-var': ' '.join(tup[3:5]),
-                   'var-value': tup[5],
-                   'result-actor': "_".join(tup[6:]),
-                   'variable': ' '.join(tup[:2])
-                    }
-        return keydict
-
-
-    def _parse_constraint_key(self, key):
-        """ Function to Parse the key and return the result as a dictionary
-        for indexing.
-        """
-
-        tup = key.split('_')
-        keydict = {'iter-actor': tup[0],
-                   'iter-actor-var': ' '.join(tup[1:3]),
-                   'var-value': tup[3],
-                   'result-actor': tup[4],
-                   'variable': ' '.join(tup[-2:])
-                    }
-        return keydict
-
-    def _parse_result(self):
-        """ Parse the Results of the solved Linear Program.
-        Must be called after solving it.
-
-        """
-        self._parse_risk()
-        self._parse_energy_prices()
-        self._parse_reserve_prices()
-        self._parse_branch_flow()
-        self._parse_reserve_dispatch()
-        self._parse_energy_dispatch()
-
-    def _parse_energy_prices(self):
-        """ Parse The Energy Prices """
-        neg_prices = self._condict("Energy_Price")
-        self.final_energy_prices = {k: v*-1 for k, v in neg_prices.iteritems()}
-
-    def _parse_reserve_prices(self):
-        """ Parse the Reserve Prices """
-        self.final_reserve_prices = self._condict("Reserve_Price")
-
-    def _parse_energy_dispatch(self):
-        """ Parse the Energy Dispatch """
-        self.final_energy_dispatch = self._vardict("Energy_Total")
-
-    def _parse_reserve_dispatch(self):
-        """ Parse the Reserve Dispatch """
-        self.final_reserve_dispatch = self._vardict('Reserve_Total')
-
-    def _parse_branch_flow(self):
-        """ Parse the Branch Flows """
-        self.final_branch_flow = self._vardict('Transmission_Total')
-
-    def _parse_risk(self):
-        """ Parse the Risk parameters """
-        self.final_risk_requirements = self._vardict("Reserve_Risk")
-
-    def _vardict(self, condition):
-        """ Generic method for extracting values from variables """
-        return {n: n.varValue for n in self.lp.variables()
-                if condition in n.name}
-
-    def _condict(self, condition):
-        """ Generic method for extracting values from constraints """
-        return {n: self.lp.constraints[n].pi
-                for n in self.lp.constraints if condition in n}
+        if "Energy_Price" in arrays:
+            arrays["Energy_Price"] *= -1
+        self._solution.update(arrays)
+
+    def _result_dict(self, family):
+        """ Generic method for creating a dictionary of the results of
+        a family, keyed by the name of the pulp variable or constraint
+        """
+        group, kind = self.SPD.result_families[family]
+        names = self.store.instance_names(group)
+        if kind == "Variable":
+            names = ['_'.join([family, n]) for n in names]
+        else:
+            names = ['_'.join([n, family]) for n in names]
+        return dict(zip(names, self.family(family).ravel().tolist()))
 
 if __name__ == '__main__':
     pass
@@ -0,0 +1,310 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Disk backed cache of solved instances, keyed by a fingerprint of the
+parameters of each instance.
+
+"""
+
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+
+# C Libraries
+import numpy as np
+
+from .model import ResultModel, invalidate_analysis
+
+
+class SolutionCache(object):
+    """SolutionCache
+
+    Content addressed store of the results of individual instances. The
+    key of an instance is a hash of the network topology and the value
+    of every parameter the Linear Program is built from in that
+    instance, so identical dispatches share an entry whatever they are
+    called and wherever they were solved.
+
+    Each entry holds every result family of one instance as a single
+    .npy vector. When the entries exceed max_bytes the least recently
+    used are evicted.
+
+    Usage:
+    ------
+    cache = SolutionCache("/tmp/pyspd")
+    CachedModel(SystemOperator, cache).full_run()
+    cache.hits, cache.misses
+
+    Parameters
+    ----------
+    directory: str
+        Directory holding the entries, created if necessary
+    max_bytes: int, default 1GB
+        Size above which the least recently used entries are evicted
+
+    """
+
+    # Changing the layout of an entry must change the fingerprints
+    version = 1
+
+    def __init__(self, directory, max_bytes=2 ** 30):
+        super(SolutionCache, self).__init__()
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+    def stats(self):
+        """ Counters and size of the cache """
+        entries = self._entries()
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': len(entries),
+                'bytes': sum(size for path, size, used in entries)}
+
+    def fingerprints(self, store):
+        """ Fingerprint of every instance of a ParameterStore, see
+        fingerprint_instances
+
+        Parameters
+        ----------
+        store: ParameterStore
+            The instances to fingerprint
+
+        Returns
+        -------
+        fingerprints: list
+            Hex digest of each instance
+
+        """
+        return fingerprint_instances(store, str(self.version))
+
+    def get(self, fingerprint):
+        """ The entry of a fingerprint, or None on a miss """
+        path = self._path(fingerprint)
+        try:
+            with open(path, 'rb') as f:
+                entry = np.load(f)
+        except (IOError, OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        os.utime(path, None)
+        return entry
+
+    def put(self, fingerprint, entry, evict=True):
+        """ Store an entry, evicting the least recently used entries if
+        the cache becomes too large
+
+        Parameters
+        ----------
+        fingerprint: str
+            The fingerprint of the instance
+        entry: array
+            The results of the instance
+        evict: bool, default True
+            Evict immediately, when adding many entries evict may be
+            called once afterwards instead
+
+        """
+        handle, temporary = tempfile.mkstemp(dir=self.directory,
+                                             suffix='.tmp')
+        with os.fdopen(handle, 'wb') as f:
+            np.save(f, np.asarray(entry, dtype=float))
+        os.rename(temporary, self._path(fingerprint))
+        if evict:
+            self.evict()
+
+    def evict(self):
+        """ Remove the least recently used entries until the cache is no
+        larger than max_bytes
+        """
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for path, size, used in entries)
+        for path, size, used in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def clear(self):
+        """ Remove every entry and reset the counters """
+        for path, size, used in self._entries():
+            os.remove(path)
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, fingerprint):
+        return os.path.join(self.directory, fingerprint + '.npy')
+
+    def _entries(self):
+        """ (path, size, last used) of every entry """
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npy'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, status.st_size, status.st_mtime))
+        return entries
+
+
+class CachedModel(ResultModel):
+    """CachedModel
+
+    Serves the instances of a System Operator from a SolutionCache,
+    solving only the instances which miss with a highs SPDModel on a
+    subset of the ParameterStore. Nothing is built or solved when every
+    instance hits.
+
+    Usage:
+    ------
+    model = CachedModel(SystemOperator, SolutionCache("/tmp/pyspd"))
+    model.full_run()
+    Analytics(model).final_price_df
+
+    Parameters
+    ----------
+    ISO: SystemOperator
+        The System Operator containing the dispatch to be solved
+    cache: SolutionCache
+        The cache to read from and add the solved instances to
+    options:
+        Further keyword arguments of the highs SPDModel solving the
+        misses, e.g. processes or presolve
+
+    """
+
+    backend = "cached"
+
+    def __init__(self, ISO, cache, **options):
+        super(CachedModel, self).__init__()
+        self.ISO = ISO
+        self.cache = cache
+        self.options = options
+        self.solution_time = {'build': None, 'transfer': None, 'solve': None}
+
+    def full_run(self, solver=None):
+        """ Convenience function to serve or solve every instance """
+        self.solve()
+        return self
+
+    def solve(self):
+        """ Read every instance from the cache, solving the misses
+
+        Returns
+        -------
+        self.cached: array
+            Whether each instance was served from the cache
+        self.status: str
+            "Optimal", or the status of the model solving the misses
+
+        """
+        store = self.store
+        sizes = [len(store.names[group])
+                 for group, kind in self.result_families.values()]
+        self.results = OrderedDict(
+            (family, np.full((len(store), size), np.nan))
+            for family, size in zip(self.result_families, sizes))
+        self._bounds = np.cumsum([0] + sizes)
+
+        self.fingerprints = self.cache.fingerprints(store)
+        self.cached = np.zeros(len(store), dtype=bool)
+        for k, fingerprint in enumerate(self.fingerprints):
+            entry = self.cache.get(fingerprint)
+            if entry is not None and len(entry) == self._bounds[-1]:
+                self._unpack(k, entry)
+                self.cached[k] = True
+
+        self.status = "Optimal"
+        misses = np.flatnonzero(~self.cached)
+        if len(misses):
+            self._solve_misses(misses)
+
+        invalidate_analysis(self)
+        return self
+
+    def _unpack(self, k, entry):
+        for f, family in enumerate(self.result_families):
+            self.results[family][k] = entry[self._bounds[f]:
+                                            self._bounds[f + 1]]
+
+    def _pack(self, k):
+        return np.concatenate([self.results[family][k]
+                               for family in self.result_families])
+
+    def _solve_misses(self, positions):
+        """ Solve the instances missing from the cache and add every
+        optimal instance to it
+        """
+        store = self.store.take(positions)
+        model = self.solve_store(store, **self.options)
+
+        for family in self.result_families:
+            self.results[family][positions] = model.result_array(family)
+
+        statuses = getattr(model, 'instance_status', None)
+        for j, k in enumerate(positions):
+            status = (statuses[store.instances[j]] if statuses
+                      else model.status)
+            if status == "Optimal":
+                self.cache.put(self.fingerprints[k], self._pack(k),
+                               evict=False)
+        self.cache.evict()
+
+        self.status = model.status
+        self.solution_time = dict(model.solution_time)
+        self.model = model
+
+
+def fingerprint_instances(store, salt=""):
+    """ Fingerprint of every instance of a ParameterStore, a hash of the
+    network topology and the value of every parameter the Linear
+    Program is built from in the instance, whatever it is called
+
+    Parameters
+    ----------
+    store: ParameterStore
+        The instances to fingerprint
+    salt: str, default ""
+        Prefix of every hash, e.g. the layout version of a cache
+
+    Returns
+    -------
+    fingerprints: list
+        Hex digest of each instance
+
+    """
+    topology = hashlib.sha1(salt.encode('utf-8'))
+    for group in ('stations', 'interruptible_loads', 'nodes',
+                  'branches', 'reserve_zones'):
+        topology.update(repr(store.names[group]).encode('utf-8'))
+    for index in (store.node_zone, store.station_node, store.load_node,
+                  store.branch_sending, store.branch_receiving):
+        topology.update(np.ascontiguousarray(index,
+                                             dtype=np.int64).tobytes())
+
+    values = np.ascontiguousarray(np.hstack(
+        [np.asarray(store.values[group][parameter], dtype=float)
+         for group, parameters in store.parameters.items()
+         for parameter in parameters])).reshape(len(store), -1)
+
+    fingerprints = []
+    for row in values:
+        digest = topology.copy()
+        digest.update(row.tobytes())
+        fingerprints.append(digest.hexdigest())
+    return fingerprints
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,298 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Command line batch runner, solving every scenario of a scenario file
+against a network file and streaming the results to a directory.
+
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+# C Libraries
+import pandas as pd
+
+from .actors import (SystemOperator, Station, Company, Node, ReserveZone,
+                    Branch, InterruptibleLoad)
+from .costs import LinearCost, QuadraticCost
+from .model import SPDModel
+from .profiling import Profiler
+from .runner import SweepRunner
+from .scenarios import table_scenarios
+from .storage import ResultWriter, ResultSet
+
+
+def load_network(path):
+    """ Create a System Operator from a JSON network definition
+
+    The definition lists the reserve zones and companies by name and
+    each node, branch, station and interruptible load by the keyword
+    arguments of its constructor, the other actors being referred to by
+    name. Stations may have an "energy" offer of {"price", "offer"} and
+    a "reserve" offer of {"price", "offer", "proportion"}, interruptible
+    loads a "reserve" offer of {"price", "offer"}. The "energy_cost" and
+    "reserve_cost" are either the slope of a LinearCost or the keyword
+    arguments of a LinearCost or QuadraticCost.
+
+    Usage:
+    ------
+    {"reserve_zones": ["North", "South"],
+     "companies": ["Meridian"],
+     "nodes": [{"name": "Benmore", "zone": "South", "demand": 140},
+               {"name": "Haywards", "zone": "North", "demand": 150}],
+     "branches": [{"sending": "Benmore", "receiving": "Haywards",
+                   "capacity": 1000, "risk": true}],
+     "stations": [{"name": "Manapouri", "node": "Benmore",
+                   "company": "Meridian", "capacity": 400,
+                   "energy": {"price": 25, "offer": 125},
+                   "reserve": {"price": 100, "offer": 300,
+                               "proportion": 1.0}}],
+     "interruptible_loads": [{"name": "Tiwai", "node": "Benmore",
+                              "company": "Meridian",
+                              "reserve": {"price": 15, "offer": 80}}]}
+
+    Parameters
+    ----------
+    path: str
+        The JSON network definition
+
+    Returns
+    -------
+    SO: SystemOperator
+
+    """
+    with open(path) as f:
+        definition = json.load(f, object_pairs_hook=OrderedDict)
+
+    SO = SystemOperator()
+    zones = dict((name, ReserveZone(name, SO))
+                 for name in definition.get('reserve_zones', []))
+    companies = dict((name, Company(name))
+                     for name in definition.get('companies', []))
+
+    nodes = {}
+    for item in definition.get('nodes', []):
+        nodes[item['name']] = Node(item['name'], SO,
+                                   _lookup(zones, item['zone'], 'zone'),
+                                   demand=item.get('demand', 0))
+
+    for item in definition.get('branches', []):
+        Branch(SO, _lookup(nodes, item['sending'], 'node'),
+               _lookup(nodes, item['receiving'], 'node'),
+               capacity=item.get('capacity', 0),
+               risk=item.get('risk', False))
+
+    for item in definition.get('stations', []):
+        station = Station(item['name'], SO,
+                          _lookup(nodes, item['node'], 'node'),
+                          _lookup(companies, item['company'], 'company'),
+                          capacity=item.get('capacity', 0),
+                          risk=item.get('risk', True))
+        if 'energy' in item:
+            station.add_energy_offer(item['energy']['price'],
+                                     item['energy']['offer'])
+        if 'reserve' in item:
+            station.add_reserve_offer(item['reserve']['price'],
+                                      item['reserve']['offer'],
+                                      item['reserve']['proportion'])
+        if 'energy_cost' in item:
+            station.add_energy_cost_func(_cost(item['energy_cost']))
+        if 'reserve_cost' in item:
+            station.add_reserve_cost_func(_cost(item['reserve_cost']))
+
+    for item in definition.get('interruptible_loads', []):
+        load = InterruptibleLoad(item['name'], SO,
+                                 _lookup(nodes, item['node'], 'node'),
+                                 _lookup(companies, item['company'],
+                                         'company'))
+        if 'reserve' in item:
+            load.add_reserve_offer(item['reserve']['price'],
+                                   item['reserve']['offer'])
+        if 'reserve_cost' in item:
+            load.add_reseve_cost_func(_cost(item['reserve_cost']))
+
+    return SO
+
+
+def _lookup(actors, name, kind):
+    try:
+        return actors[name]
+    except KeyError:
+        raise ValueError("Unknown %s %s in the network definition" %
+                         (kind, name))
+
+
+def _cost(definition):
+    """ Cost model of a cost definition """
+    if not isinstance(definition, dict):
+        return LinearCost(definition)
+    if 'quadratic' in definition:
+        return QuadraticCost(**definition)
+    return LinearCost(**definition)
+
+
+class ScenarioFile(object):
+    """ScenarioFile
+
+    A CSV file of scenarios, read one chunk at a time so a file larger
+    than memory may be swept. Each column is headed "<actor>.<parameter>"
+    and the first column labels each scenario. Missing values keep the
+    value of the network.
+
+    Usage:
+    ------
+    scenario,Haywards.demand,Roxburgh.energy_price
+    Base,150,30
+    Peak,180,
+
+    Parameters
+    ----------
+    SO: SystemOperator
+        The System Operator containing the actors
+    path: str
+        The CSV file
+    chunksize: int, default 1000
+        The maximum number of scenarios in each chunk
+
+    """
+
+    def __init__(self, SO, path, chunksize=1000):
+        super(ScenarioFile, self).__init__()
+        self.SO = SO
+        self.path = path
+        self.chunksize = chunksize
+
+    def __iter__(self):
+        return self.chunks()
+
+    def chunks(self):
+        """ Generate the scenarios one chunk at a time """
+        start = 0
+        for table in pd.read_csv(self.path, index_col=0,
+                                 chunksize=self.chunksize):
+            table.columns = [tuple(column.rsplit('.', 1))
+                             for column in table.columns]
+            yield table_scenarios(self.SO, table, start=start)
+            start += len(table)
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(
+        prog='pyspd', description="Solve every scenario of a scenario file "
+        "against a network and write the prices, dispatch and profits "
+        "to a results directory, readable with pyspd.ResultSet.")
+    parser.add_argument('network', help="JSON network definition")
+    parser.add_argument('scenarios', help="CSV file of scenarios")
+    parser.add_argument('output', help="Directory to write the results to")
+    parser.add_argument('--backend', default="highs",
+                        choices=SPDModel.backends)
+    parser.add_argument('--processes', type=int, default=None,
+                        help="Solve the instances of each chunk across "
+                        "this many processes, highs backend only")
+    parser.add_argument('--chunksize', type=int, default=1000,
+                        help="Scenarios solved at once")
+    parser.add_argument('--presolve', action='store_true',
+                        help="Presolve each chunk, highs backend only")
+    parser.add_argument('--no-profits', action='store_true',
+                        help="Do not write the unit and company profits")
+    parser.add_argument('--resume', action='store_true',
+                        help="Resume an interrupted run, solving only the "
+                        "scenarios not yet in the output directory")
+    parser.add_argument('--profile', action='store_true',
+                        help="Report the time of each phase of every "
+                        "chunk")
+    parser.add_argument('--trace', default=None,
+                        help="Write the phases to this Chrome trace file, "
+                        "implies --profile")
+    parser.add_argument('--quiet', action='store_true',
+                        help="Only print the summary")
+    return parser
+
+
+def main(argv=None):
+    """ Console entry point """
+    parser = create_parser()
+    args = parser.parse_args(argv)
+
+    options = {}
+    if args.processes:
+        options['processes'] = args.processes
+    if args.presolve:
+        options['presolve'] = True
+    profiler = None
+    if args.profile or args.trace:
+        profiler = options['profile'] = Profiler()
+
+    manifest = os.path.join(args.output, ResultSet.manifest_name)
+    if os.path.exists(manifest) and not args.resume:
+        parser.error("%s already holds results, use --resume to add to "
+                     "them" % args.output)
+
+    try:
+        SO = load_network(args.network)
+        scenarios = ScenarioFile(SO, args.scenarios, args.chunksize)
+        writer = ResultWriter(args.output, profits=not args.no_profits)
+        runner = SweepRunner(SO, scenarios, backend=args.backend, frames=(),
+                             checkpoint=writer, **options)
+        summary = run(runner, args.quiet)
+    except (IOError, OSError, ValueError) as error:
+        sys.stderr.write("pyspd: error: %s\n" % error)
+        return 1
+
+    report(summary, profiler)
+    if args.trace:
+        profiler.trace(args.trace)
+    return 0 if summary['failed'] == 0 else 2
+
+
+def run(runner, quiet=False):
+    """ Solve every chunk, printing the progress of each
+
+    Returns
+    -------
+    summary: OrderedDict
+        The number of scenarios solved and failed, the wall time and the
+        total time of each phase
+
+    """
+    begin = time.time()
+    phases = OrderedDict((phase, 0.0) for phase in
+                         ('build', 'transfer', 'solve', 'total'))
+    scenarios = failed = 0
+    for chunk in runner:
+        scenarios += len(chunk)
+        failed += sum(status != "Optimal"
+                      for status in chunk.instance_status)
+        for phase in phases:
+            phases[phase] += chunk.solution_time.get(phase) or 0
+        if not quiet:
+            total = chunk.solution_time['total']
+            print("chunk %d: scenarios %d-%d %s %.3fs %.1f scenarios/sec" % (
+                chunk.number, chunk.start, chunk.stop, chunk.status, total,
+                len(chunk) / total if total else float('inf')))
+
+    return OrderedDict([('scenarios', scenarios), ('failed', failed),
+                        ('skipped', len(runner.completed) - scenarios),
+                        ('wall', time.time() - begin),
+                        ('phases', phases)])
+
+
+def report(summary, profiler=None):
+    """ Print the throughput and the time of each phase """
+    wall = summary['wall']
+    print("scenarios: %d solved, %d not optimal, %d already complete" % (
+        summary['scenarios'], summary['failed'], summary['skipped']))
+    print("throughput: %.1f scenarios/sec over %.3fs" % (
+        summary['scenarios'] / wall if wall else 0.0, wall))
+    print("phases: " + " ".join("%s=%.3fs" % item
+                                for item in summary['phases'].items()))
+    if profiler is not None:
+        print(profiler.report().to_string())
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Vectorised cost models for Stations and Interruptible Loads.
+
+A cost model is described entirely by coefficient arrays, so the cost of
+every unit for every instance of an iterator may be evaluated in a single
+NumPy operation. Cost models remain callable on a single dispatch so they
+may be used anywhere the original cost functions were used.
+
+"""
+
+# C Libraries
+import numpy as np
+import pandas as pd
+
+
+class CostModel(object):
+    """CostModel
+
+    Base class of the vectorised cost models.
+
+    """
+
+    def __call__(self, dispatch):
+        cost = self.evaluate(np.asarray(dispatch, dtype=float))
+        return cost if np.ndim(cost) else float(cost)
+
+    def evaluate(self, dispatch):
+        """ Cost of an array of dispatches
+
+        Parameters
+        ----------
+        dispatch: array
+            Dispatch of the unit
+
+        """
+        return evaluate_costs([self], np.asarray(dispatch)[..., None])[..., 0]
+
+
+class PolynomialCost(CostModel):
+    """PolynomialCost
+
+    Cost which is a polynomial of the dispatch,
+    c(x) = a0 + a1 * x + a2 * x ** 2 + ...
+
+    Usage:
+    ------
+    PolynomialCost([100, 25, 0.5])
+
+    Parameters
+    ----------
+    coefficients: array
+        Polynomial coefficients, lowest order first
+
+    """
+
+    def __init__(self, coefficients):
+        super(PolynomialCost, self).__init__()
+        self.coefficients = np.atleast_1d(np.asarray(coefficients,
+                                                     dtype=float))
+
+
+class LinearCost(PolynomialCost):
+    """LinearCost
+
+    Cost with a constant marginal cost, c(x) = intercept + slope * x
+
+    Parameters
+    ----------
+    slope: float
+        Marginal cost of the dispatch
+    intercept: float, default 0
+        Fixed cost
+
+    """
+
+    def __init__(self, slope, intercept=0):
+        super(LinearCost, self).__init__([intercept, slope])
+
+
+class QuadraticCost(PolynomialCost):
+    """QuadraticCost
+
+    Cost with a linearly increasing marginal cost,
+    c(x) = intercept + slope * x + quadratic * x ** 2
+
+    Parameters
+    ----------
+    quadratic: float
+        Coefficient of the squared dispatch
+    slope: float, default 0
+        Coefficient of the dispatch
+    intercept: float, default 0
+        Fixed cost
+
+    """
+
+    def __init__(self, quadratic, slope=0, intercept=0):
+        super(QuadraticCost, self).__init__([intercept, slope, quadratic])
+
+
+class PiecewiseLinearCost(CostModel):
+    """PiecewiseLinearCost
+
+    Cost with a stepped marginal cost. Each segment begins at its
+    breakpoint with the marginal cost of its slope and ends at the next
+    breakpoint, the final segment is unbounded.
+
+    Usage:
+    ------
+    PiecewiseLinearCost([0, 100, 200], [10, 20, 40])
+
+    Parameters
+    ----------
+    breakpoints: array
+        Increasing dispatch at which each segment begins
+    slopes: array
+        Marginal cost of each segment
+    intercept: float, default 0
+        Cost at and below the first breakpoint
+
+    """
+
+    def __init__(self, breakpoints, slopes, intercept=0):
+        super(PiecewiseLinearCost, self).__init__()
+        self.breakpoints = np.atleast_1d(np.asarray(breakpoints, dtype=float))
+        self.slopes = np.atleast_1d(np.asarray(slopes, dtype=float))
+        self.intercept = float(intercept)
+
+        if len(self.breakpoints) != len(self.slopes):
+            raise ValueError("Each breakpoint requires a slope")
+        if np.any(np.diff(self.breakpoints) <= 0):
+            raise ValueError("Breakpoints must be increasing")
+
+    @property
+    def widths(self):
+        return np.append(np.diff(self.breakpoints), np.inf)
+
+
+def evaluate_costs(funcs, dispatch):
+    """ Evaluate the cost of every unit for every instance.
+
+    Units sharing a kind of cost model are evaluated together in a
+    single NumPy operation on stacked coefficient arrays. Any other
+    callable is applied to each dispatch of its unit in turn.
+
+    Parameters
+    ----------
+    funcs: list
+        Cost model or callable of each unit
+    dispatch: array
+        Dispatch with the units along the last axis
+
+    Returns
+    -------
+    costs: array
+        Cost of each dispatch, the same shape as dispatch
+
+    """
+    dispatch = np.asarray(dispatch, dtype=float)
+    costs = np.zeros(dispatch.shape)
+
+    polynomial = [i for i, f in enumerate(funcs)
+                  if isinstance(f, PolynomialCost)]
+    piecewise = [i for i, f in enumerate(funcs)
+                 if isinstance(f, PiecewiseLinearCost)]
+    callables = [i for i, f in enumerate(funcs)
+                 if not isinstance(f, CostModel)]
+
+    if polynomial:
+        costs[..., polynomial] = _polynomial_costs(
+            [funcs[i] for i in polynomial], dispatch[..., polynomial])
+    if piecewise:
+        costs[..., piecewise] = _piecewise_costs(
+            [funcs[i] for i in piecewise], dispatch[..., piecewise])
+    for i in callables:
+        costs[..., i] = np.reshape([funcs[i](x) for x in
+                                    dispatch[..., i].ravel()],
+                                   dispatch.shape[:-1])
+
+    return costs
+
+
+def series_cost(func, dispatch):
+    """ Evaluate the cost of a Series of dispatches of a single unit
+
+    Parameters
+    ----------
+    func: CostModel, callable
+        Cost of the unit
+    dispatch: Series
+        Dispatch of the unit in each instance
+
+    """
+    values = evaluate_costs([func], dispatch.values[:, None])[:, 0]
+    return pd.Series(values, index=dispatch.index)
+
+
+def _polynomial_costs(models, dispatch):
+    """ Horner's method over the padded coefficients of each unit """
+    order = max(len(m.coefficients) for m in models)
+    coefficients = np.zeros((order, len(models)))
+    for i, model in enumerate(models):
+        coefficients[:len(model.coefficients), i] = model.coefficients
+
+    costs = np.broadcast_to(coefficients[-1], dispatch.shape).copy()
+    for j in range(order - 2, -1, -1):
+        costs *= dispatch
+        costs += coefficients[j]
+    return costs
+
+
+def _piecewise_costs(models, dispatch):
+    """ Sum of the clipped segments of each unit, shorter curves are
+    padded with empty segments
+    """
+    segments = max(len(m.slopes) for m in models)
+    shape = (len(models), segments)
+    breakpoints = np.zeros(shape)
+    widths = np.zeros(shape)
+    slopes = np.zeros(shape)
+    intercepts = np.array([m.intercept for m in models])
+    for i, model in enumerate(models):
+        n = len(model.slopes)
+        breakpoints[i, :n] = model.breakpoints
+        widths[i, :n] = model.widths
+        slopes[i, :n] = model.slopes
+
+    quantity = np.clip(dispatch[..., None] - breakpoints, 0, widths)
+    return intercepts + (quantity * slopes).sum(axis=-1)
+
+if __name__ == '__main__':
+    pass
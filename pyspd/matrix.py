@@ -0,0 +1,561 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Sparse matrix form of the linear program.
+
+"""
+
+from collections import OrderedDict
+
+# C Libraries
+import numpy as np
+import scipy.sparse as sp
+
+from .profiling import run_steps, tracer
+
+
+class LPBlock(object):
+    """LPBlock
+
+    A self contained piece of the sparse matrix form, with the same
+    attributes as LPMatrix. Used to solve a single instance of an
+    iterator on its own.
+
+    """
+    def __init__(self, cost, A, row_lower, row_upper, col_lower, col_upper):
+        super(LPBlock, self).__init__()
+        self.cost = cost
+        self.A = A
+        self.row_lower = row_lower
+        self.row_upper = row_upper
+        self.col_lower = col_lower
+        self.col_upper = col_upper
+
+    @property
+    def num_rows(self):
+        return self.A.shape[0]
+
+    @property
+    def num_cols(self):
+        return self.A.shape[1]
+
+
+class LPMatrix(object):
+    """LPMatrix
+
+    Sparse matrix representation of the SPD Linear Program. Mirrors the
+    constraint families built by SPDModel.create_lp, but assembles them
+    with vectorised operations on the columnar ParameterStore of the
+    System Operator rather than individual pulp objects.
+
+    The problem is stored as
+
+    min c^{T}x
+    row_lower \le Ax \le row_upper
+    col_lower \le x \le col_upper
+
+    With A held as a CSR matrix. Names for the rows and columns are only
+    generated when they are asked for. The iterator instance each row
+    and column belongs to is held in row_instance and col_instance.
+
+    Usage:
+    ------
+    matrix = LPMatrix(SystemOperator)
+    matrix.build()
+    matrix.A, matrix.cost, matrix.row_lower, matrix.row_upper
+
+    Parameters
+    ----------
+    ISO: SystemOperator
+        The System Operator containing the dispatch
+    store: ParameterStore, default None
+        The parameters to build from, defaults to ISO.parameters
+
+    """
+
+    # Introduce a buffer to ensure the duals work
+    eps = 0.00000001
+
+    def __init__(self, ISO, store=None):
+        super(LPMatrix, self).__init__()
+        self.ISO = ISO
+        self.store = ISO.ensure_parameters() if store is None else store
+
+    # The steps of build, in order
+    steps = ('_setup_matrix', '_create_columns', '_obj_function',
+             '_nodal_demand', '_energy_offers', '_reserve_offers',
+             '_transmission_offer', '_reserve_proportion',
+             '_reserve_combined', '_generator_risk', '_transmission_risk',
+             '_reserve_dispatch', '_assemble')
+
+    def build(self, profiler=None):
+        """ Publically exposed API
+        Creates the columns, cost vector and every constraint family
+        before assembling them into the CSR constraint matrix.
+
+        Parameters
+        ----------
+        profiler: Profiler, default None
+            Records each step as a phase
+
+        """
+        return run_steps(self, self.steps, "create_matrix",
+                         tracer(profiler, self), self._size)
+
+    def _size(self):
+        """ Rows and columns added to the buffers so far """
+        return self._num_rows, self._num_cols
+
+    @property
+    def num_rows(self):
+        return self.A.shape[0]
+
+    @property
+    def num_cols(self):
+        return self.A.shape[1]
+
+    def column_names(self, block=None):
+        """ Generate the pulp style names of every column, in order
+
+        Parameters
+        ----------
+        block: str, default None
+            Only generate the names for a single block of columns
+
+        """
+        blocks = [block] if block else list(self.columns)
+        names = []
+        for block in blocks:
+            names.extend('_'.join([block, name]) for name in
+                         self.store.instance_names(self.column_keys[block]))
+        return names
+
+    def row_names(self, family=None):
+        """ Generate the pulp style names of every row, in order
+
+        Parameters
+        ----------
+        family: str, default None
+            Only generate the names for a single family of rows
+
+        """
+        families = [family] if family else list(self.families)
+        names = []
+        for family in families:
+            groups, instance, actors = self.row_keys[family]
+            parts = [self._instance_name(g, instance, a)
+                     for g, a in zip(groups, actors)]
+            names.extend('_'.join(list(key) + [family])
+                         for key in zip(*parts))
+        return names
+
+    def family_rows(self, family, actor):
+        """ Rows of a family belonging to an actor, one per instance.
+        Only valid for families with a single row per actor.
+
+        """
+        groups = self.row_keys[family][0]
+        count = len(self.store.names[groups[0]])
+        return (self.families[family].start + actor +
+                np.arange(len(self.store)) * count)
+
+    def block_columns(self, block, actor):
+        """ Columns of a block belonging to an actor, one per instance """
+        count = len(self.store.names[self.column_keys[block]])
+        return (self.columns[block].start + actor +
+                np.arange(len(self.store)) * count)
+
+    def split(self):
+        """ Split the matrix into one independent block per instance
+
+        Returns
+        -------
+        rows: list
+            Row indices of each block within the full matrix
+        cols: list
+            Column indices of each block within the full matrix
+        blocks: list
+            LPBlock for each instance, in the order of the instances
+
+        """
+        num_instances = len(self.store)
+        rows = group_instances(self.row_instance, num_instances)
+        cols = group_instances(self.col_instance, num_instances)
+
+        blocks = [LPBlock(self.cost[c], self.A[r][:, c],
+                          self.row_lower[r], self.row_upper[r],
+                          self.col_lower[c], self.col_upper[c])
+                  for r, c in zip(rows, cols)]
+        return rows, cols, blocks
+
+    def _instance_name(self, group, instance, actor):
+        """ Generate "<instance>_<actor>" names for index arrays """
+        instances = self.store.instances
+        names = self.store.names[group]
+        return ['_'.join([instances[i], names[a]])
+                for i, a in zip(instance, actor)]
+
+    def _setup_matrix(self):
+        """ Initialise the empty buffers each constraint family writes to
+        """
+        self.columns = OrderedDict()
+        self.column_keys = OrderedDict()
+
+        self.families = OrderedDict()
+        self.row_keys = OrderedDict()
+
+        self._rows = []
+        self._cols = []
+        self._data = []
+        self._lower = []
+        self._upper = []
+        self._num_rows = 0
+        self._num_cols = 0
+        return self
+
+    def _grid(self, group):
+        """ Instance and actor index of every actor in every instance,
+        ordered by instance then actor
+        """
+        count = len(self.store.names[group])
+        instance = np.repeat(np.arange(len(self.store)), count)
+        actor = np.tile(np.arange(count), len(self.store))
+        return instance, actor
+
+    def _add_block(self, block, group, lower, upper):
+        """ Add a block of columns, one per actor per instance, sharing
+        the same bounds
+        """
+        size = len(self.store) * len(self.store.names[group])
+        self.columns[block] = slice(self._num_cols, self._num_cols + size)
+        self.column_keys[block] = group
+        self._num_cols += size
+        return (np.repeat(float(lower), size), np.repeat(float(upper), size),
+                self._grid(group)[0])
+
+    def _col(self, block, instance, actor):
+        """ Map instance and actor index arrays to column indices """
+        count = len(self.store.names[self.column_keys[block]])
+        return self.columns[block].start + instance * count + actor
+
+    def _add_rows(self, family, keys, rows, cols, data, lower, upper):
+        """ Add a family of rows to the buffers
+
+        Parameters
+        ----------
+        family: str
+            Name of the constraint family, used as the name suffix
+        keys: tuple
+            The actor groups, instance index and tuple of actor index
+            arrays identifying each row of the family
+        rows: array
+            Family local row index of each non zero element
+        cols: array
+            Column index of each non zero element
+        data: array
+            Value of each non zero element
+        lower, upper: array
+            Row bounds for each row in the family
+
+        """
+        size = len(keys[1])
+        begin = self._num_rows
+        self.families[family] = slice(begin, begin + size)
+        self.row_keys[family] = keys
+
+        self._rows.append(np.asarray(rows, dtype=np.int64) + begin)
+        self._cols.append(np.asarray(cols, dtype=np.int64))
+        self._data.append(np.asarray(data, dtype=float))
+        self._lower.append(np.broadcast_to(np.asarray(lower, dtype=float),
+                                           (size,)))
+        self._upper.append(np.broadcast_to(np.asarray(upper, dtype=float),
+                                           (size,)))
+        self._num_rows += size
+        return self
+
+    def _add_actor_rows(self, family, group, entries, lower, upper):
+        """ Add a family with one row per actor of a group per instance
+
+        Parameters
+        ----------
+        entries: list
+            (block, value) pairs giving the non zero elements of each
+            row, in the column of the same actor and instance. Values
+            may be scalars or arrays aligned with the rows.
+
+        """
+        instance, actor = self._grid(group)
+        local = np.arange(len(actor))
+
+        rows = np.concatenate([local for block, value in entries])
+        cols = np.concatenate([self._col(block, instance, actor)
+                               for block, value in entries])
+        data = np.concatenate([np.broadcast_to(value, local.shape)
+                               for block, value in entries])
+
+        self._add_rows(family, ((group,), instance, (actor,)),
+                       rows, cols, data, lower, upper)
+
+    def _create_columns(self):
+        """ Create the column blocks for each variable type, in the same
+        order and with the same bounds as SPDModel._create_variables
+
+        """
+        bounds = [
+            self._add_block("Energy_Total", 'stations', 0, np.inf),
+            self._add_block("Reserve_Total", 'reserve_providers', 0, np.inf),
+            self._add_block("Transmission_Total", 'branches',
+                            -np.inf, np.inf),
+            self._add_block("Nodal_Injection", 'nodes', -np.inf, np.inf),
+            self._add_block("Reserve_Risk", 'reserve_zones', 0, np.inf)]
+
+        self.col_lower = np.concatenate([b[0] for b in bounds])
+        self.col_upper = np.concatenate([b[1] for b in bounds])
+        self.col_instance = np.concatenate([b[2] for b in bounds])
+
+    def _station_values(self, parameter):
+        return self.store.values['stations'][parameter]
+
+    def _provider_values(self, parameter):
+        """ Reserve parameter for the stations followed by the loads """
+        return np.hstack([self.store.values['stations'][parameter],
+                          self.store.values['interruptible_loads'][parameter]])
+
+    def _obj_function(self):
+        """ Objective Function
+
+        min \sum_i p_{g,i}g_{i} + \sum_j p_{r,j}r_{j}
+        """
+        self.cost = np.zeros(self._num_cols)
+        self.cost[self.columns["Energy_Total"]] = \
+            self._station_values('energy_price').ravel()
+        self.cost[self.columns["Reserve_Total"]] = \
+            self._provider_values('reserve_price').ravel()
+
+    def _nodal_demand(self):
+        """ Nodal Demand constraints
+
+        Injection_{n} - \sum_{j} g_{j(n)} = - d_{n}
+
+        Injection_{n} - \sum_{t} f_{t(n)} * d_{t(n)} = 0
+
+        """
+        store = self.store
+        num_nodes = len(store.names['nodes'])
+        instance, node = self._grid('nodes')
+        local = np.arange(len(node))
+        keys = (('nodes',), instance, (node,))
+        injection = self._col("Nodal_Injection", instance, node)
+
+        # Net Injections from Energy and Demand
+        s_instance, station = self._grid('stations')
+        rows = np.concatenate([local, s_instance * num_nodes +
+                               store.station_node[station]])
+        cols = np.concatenate([injection, self._col("Energy_Total",
+                                                    s_instance, station)])
+        data = np.concatenate([np.ones(len(local)), -np.ones(len(station))])
+        rhs = store.values['nodes']['demand'].ravel() * -1 - self.eps
+
+        self._add_rows('Energy_Price', keys, rows, cols, data, rhs, rhs)
+
+        # Net Injection from transmission, flows leave the sending node
+        b_instance, branch = self._grid('branches')
+        flow = self._col("Transmission_Total", b_instance, branch)
+        rows = np.concatenate([
+            local,
+            b_instance * num_nodes + store.branch_sending[branch],
+            b_instance * num_nodes + store.branch_receiving[branch]])
+        cols = np.concatenate([injection, flow, flow])
+        data = np.concatenate([np.ones(len(local)), -np.ones(len(branch)),
+                               np.ones(len(branch))])
+
+        self._add_rows('Nodal_Transmission', keys, rows, cols, data, 0, 0)
+
+    def _energy_offers(self):
+        """Energy offer constraints
+
+        g_{i} \le g_{max, i}
+
+        """
+        upper = self._station_values('energy_offer').ravel() + self.eps
+
+        self._add_actor_rows('Total_Energy', 'stations',
+                             [("Energy_Total", 1.0)], -np.inf, upper)
+
+    def _reserve_offers(self):
+        """ Reserve Offer constraints
+
+        r_{j} \le r_{max, j}
+
+        """
+        upper = self._provider_values('reserve_offer').ravel() + self.eps
+
+        self._add_actor_rows('Total_Reserve', 'reserve_providers',
+                             [("Reserve_Total", 1.0)], -np.inf, upper)
+
+    def _transmission_offer(self):
+        """ Transmission Offer constraints
+
+        f_{t} \le f_{max, t}
+
+        f_{t} \ge -f_{max, t}
+
+        """
+        bcapacity = self.store.values['branches']['capacity'].ravel()
+
+        self._add_actor_rows('Pos_flow', 'branches',
+                             [("Transmission_Total", 1.0)],
+                             -np.inf, bcapacity)
+        self._add_actor_rows('Neg_flow', 'branches',
+                             [("Transmission_Total", 1.0)],
+                             bcapacity * -1, np.inf)
+
+    def _reserve_proportion(self):
+        """ Reserve Proportion Constraints
+
+        r_{i} - k_{i}g_{i} \le 0
+
+        Stations come first amongst the reserve providers, so share
+        their actor index with the reserve columns.
+
+        """
+        rprop = self._station_values('reserve_proportion').ravel()
+
+        self._add_actor_rows('Reserve_Proportion', 'stations',
+                             [("Reserve_Total", 1.0),
+                              ("Energy_Total", rprop * -1)],
+                             -np.inf, 0)
+
+    def _reserve_combined(self):
+        """ Reserve total capacity constraints
+
+        r_{i} + g_{i} \le g_{capacity, i}
+
+        """
+        upper = self._station_values('capacity').ravel() + self.eps
+
+        self._add_actor_rows('Total_Capacity', 'stations',
+                             [("Reserve_Total", 1.0),
+                              ("Energy_Total", 1.0)],
+                             -np.inf, upper)
+
+    def _generator_risk(self):
+        """ Risk for generators
+
+        Risk_{r} - g_{i(r)} \ge 0
+
+        """
+        instance, station = self._grid('stations')
+        risk = self._station_values('risk').ravel()
+        instance, station = instance[risk], station[risk]
+        zone = self.store.station_zone[station]
+
+        order = np.lexsort((station, zone, instance))
+        instance, station, zone = instance[order], station[order], zone[order]
+        local = np.arange(len(station))
+
+        rows = np.concatenate([local, local])
+        cols = np.concatenate([self._col("Reserve_Risk", instance, zone),
+                               self._col("Energy_Total", instance, station)])
+        data = np.concatenate([np.ones(len(local)), -np.ones(len(local))])
+
+        self._add_rows('Generator_Risk',
+                       (('reserve_zones', 'stations'), instance,
+                        (zone, station)),
+                       rows, cols, data, self.eps, np.inf)
+
+    def _transmission_risk(self):
+        """ Risk for a Transmission line
+
+        Risk_{r} - f_{t(r)} * d_{t(r)} \ge 0
+
+        A risk setting branch between two zones sets the risk in both,
+        with a direction of -1 for the sending zone and 1 for the
+        receiving zone.
+
+        """
+        store = self.store
+        instance, branch = self._grid('branches')
+        sending = store.node_zone[store.branch_sending[branch]]
+        receiving = store.node_zone[store.branch_receiving[branch]]
+        risk = (store.values['branches']['risk'].ravel() &
+                (sending != receiving))
+        instance, branch = instance[risk], branch[risk]
+
+        instance = np.concatenate([instance, instance])
+        branch = np.concatenate([branch, branch])
+        zone = np.concatenate([sending[risk], receiving[risk]])
+        direction = np.repeat([-1.0, 1.0], len(branch) // 2)
+
+        order = np.lexsort((branch, zone, instance))
+        instance, branch = instance[order], branch[order]
+        zone, direction = zone[order], direction[order]
+        local = np.arange(len(branch))
+
+        rows = np.concatenate([local, local])
+        cols = np.concatenate([self._col("Reserve_Risk", instance, zone),
+                               self._col("Transmission_Total", instance,
+                                         branch)])
+        data = np.concatenate([np.ones(len(local)), direction * -1])
+
+        self._add_rows('Transmission_Risk',
+                       (('reserve_zones', 'branches'), instance,
+                        (zone, branch)),
+                       rows, cols, data, self.eps, np.inf)
+
+    def _reserve_dispatch(self):
+        """ Total Reserve Dispatch
+
+        \sum_{j(r)} r_{j} - Risk_{r} \ge 0
+
+        """
+        store = self.store
+        num_zones = len(store.names['reserve_zones'])
+        instance, zone = self._grid('reserve_zones')
+        p_instance, provider = self._grid('reserve_providers')
+        provider_zone = np.concatenate([store.station_zone, store.load_zone])
+        local = np.arange(len(zone))
+
+        rows = np.concatenate([p_instance * num_zones +
+                               provider_zone[provider], local])
+        cols = np.concatenate([self._col("Reserve_Total", p_instance,
+                                         provider),
+                               self._col("Reserve_Risk", instance, zone)])
+        data = np.concatenate([np.ones(len(provider)), -np.ones(len(zone))])
+
+        self._add_rows('Reserve_Price',
+                       (('reserve_zones',), instance, (zone,)),
+                       rows, cols, data, self.eps, np.inf)
+
+    def _assemble(self):
+        """ Compile the buffered families into the CSR constraint matrix
+        and the row bound vectors
+
+        """
+        rows = np.concatenate(self._rows)
+        cols = np.concatenate(self._cols)
+        data = np.concatenate(self._data)
+
+        self.A = sp.coo_matrix((data, (rows, cols)),
+                               shape=(self._num_rows,
+                                      self._num_cols)).tocsr()
+        self.row_lower = np.concatenate(self._lower).copy()
+        self.row_upper = np.concatenate(self._upper).copy()
+
+        # Every row holds at least one column of its own instance
+        self.row_instance = self.col_instance[self.A.indices[
+            self.A.indptr[:-1]]]
+
+        del self._rows, self._cols, self._data, self._lower, self._upper
+        return self
+
+
+def group_instances(instance, num_instances):
+    """ Group positions by their instance """
+    order = np.argsort(instance, kind='mergesort')
+    bounds = np.searchsorted(instance[order], np.arange(num_instances + 1))
+    return [order[bounds[i]:bounds[i + 1]] for i in range(num_instances)]
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Merit order dispatch of uncongested instances without a Linear Program.
+
+"""
+
+import time
+from collections import OrderedDict
+
+# C Libraries
+import numpy as np
+
+from .matrix import LPMatrix
+from .model import ResultModel, invalidate_analysis
+
+
+class MeritOrder(ResultModel):
+    """MeritOrder
+
+    Fast dispatch engine for instances in which neither transmission nor
+    co-optimised reserve can bind. Energy is cleared for every qualifying
+    instance at once by sorting the energy offers by price and filling
+    the total demand, the marginal offer setting a single price at
+    every node. Every other instance is solved by an SPDModel.
+
+    An instance qualifies when:
+        no station or branch sets a reserve risk, so reserve is not
+        co-optimised with energy,
+        the network is a spanning tree, so the branch flows follow from
+        the nodal injections, and no flow reaches its branch capacity,
+        and the offers cover the demand.
+
+    Without a risk no reserve is required, so none is dispatched and
+    the reserve prices are zero, as in the Linear Program.
+
+    Usage:
+    ------
+    engine = MeritOrder(SystemOperator)
+    engine.full_run()
+    Analytics(engine).final_price_df
+
+    Parameters
+    ----------
+    ISO: SystemOperator
+        The System Operator containing the dispatch to be solved
+    fallback: str, default "highs"
+        Backend of the SPDModel solving the instances which do not
+        qualify, the model solves a subset of the ParameterStore so
+        this must be "highs"
+
+    """
+
+    backend = "merit"
+
+    def __init__(self, ISO, fallback="highs"):
+        super(MeritOrder, self).__init__()
+        self.ISO = ISO
+        self.fallback = fallback
+        self.solution_time = {'build': None, 'transfer': None, 'solve': None}
+
+    def full_run(self, solver=None):
+        """ Convenience function to clear every instance """
+        self.solve()
+        return self
+
+    def solve(self):
+        """ Clear the qualifying instances by merit order and solve the
+        remainder with the fallback SPDModel
+
+        Returns
+        -------
+        self.qualified: array
+            Whether each instance was cleared by merit order
+        self.status: str
+            "Optimal", or the status of the fallback model
+
+        """
+        begin = time.time()
+        store = self.store
+        self.results = OrderedDict(
+            (family, np.zeros((len(store), len(store.names[group]))))
+            for family, (group, kind) in self.result_families.items())
+
+        self.qualified = self._clear() & self._uncongested()
+        self.status = "Optimal"
+        self.solution_time['solve'] = time.time() - begin
+
+        fallback = np.flatnonzero(~self.qualified)
+        if len(fallback):
+            self._solve_fallback(fallback)
+
+        invalidate_analysis(self)
+        return self
+
+    def _clear(self):
+        """ Fill the total demand of each instance from the energy
+        offers sorted by price
+
+        Returns
+        -------
+        cleared: array
+            Whether the offers of each instance cover the demand
+
+        """
+        store = self.store
+        stations = store.values['stations']
+        num_nodes = len(store.names['nodes'])
+
+        price = stations['energy_price']
+        if not price.shape[1]:
+            return np.zeros(len(store), dtype=bool)
+
+        quantity = np.clip(np.minimum(stations['energy_offer'],
+                                      stations['capacity']), 0, None)
+        demand = store.values['nodes']['demand']
+        total = demand.sum(axis=1) + num_nodes * LPMatrix.eps
+
+        order = np.argsort(price, axis=1, kind='mergesort')
+        rows = np.arange(len(store))[:, None]
+        offers = quantity[rows, order]
+        cumulative = np.cumsum(offers, axis=1)
+        fill = np.clip(total[:, None] - (cumulative - offers), 0, offers)
+
+        dispatch = np.zeros(price.shape)
+        dispatch[rows, order] = fill
+
+        cleared = cumulative[:, -1] >= total
+        marginal = np.argmax(cumulative >= total[:, None], axis=1)
+        marginal_price = price[rows[:, 0], order[rows[:, 0], marginal]]
+
+        injection = -demand - LPMatrix.eps
+        for station, node in enumerate(store.station_node):
+            injection[:, node] += dispatch[:, station]
+
+        self.results['Energy_Total'][:] = dispatch
+        self.results['Nodal_Injection'][:] = injection
+        self.results['Energy_Price'][:] = marginal_price[:, None]
+
+        # Reserve is not co-optimised when nothing sets a risk
+        risk = stations['risk'].any(axis=1)
+        branches = store.values['branches']['risk']
+        crosses = (store.node_zone[store.branch_sending] !=
+                   store.node_zone[store.branch_receiving])
+        risk |= (branches & crosses).any(axis=1)
+
+        return cleared & ~risk
+
+    def _uncongested(self):
+        """ Branch flows of each instance from the nodal injections
+
+        Returns
+        -------
+        uncongested: array
+            Whether every flow of each instance is below its capacity
+
+        """
+        store = self.store
+        num_nodes = len(store.names['nodes'])
+        num_branches = len(store.names['branches'])
+        if num_branches != num_nodes - 1:
+            return np.zeros(len(store), dtype=bool)
+        if num_branches == 0:
+            return np.ones(len(store), dtype=bool)
+
+        # Flows leave the sending node, the first node is the reference
+        incidence = np.zeros((num_nodes, num_branches))
+        branches = np.arange(num_branches)
+        incidence[store.branch_sending, branches] = 1
+        incidence[store.branch_receiving, branches] = -1
+        try:
+            inverse = np.linalg.inv(incidence[1:])
+        except np.linalg.LinAlgError:
+            return np.zeros(len(store), dtype=bool)
+
+        flow = self.results['Nodal_Injection'][:, 1:].dot(inverse.T)
+        self.results['Transmission_Total'][:] = flow
+
+        capacity = store.values['branches']['capacity']
+        return (np.abs(flow) < capacity - LPMatrix.eps).all(axis=1)
+
+    def _solve_fallback(self, positions):
+        """ Solve the instances which do not qualify as a Linear Program
+        and merge the results
+        """
+        model = self.solve_store(self.store.take(positions),
+                                 backend=self.fallback)
+
+        for family in self.result_families:
+            self.results[family][positions] = model.result_array(family)
+        self.status = model.status
+        for phase, duration in model.solution_time.items():
+            self.solution_time[phase] = ((self.solution_time[phase] or 0) +
+                                         (duration or 0))
+        self.model = model
+
+if __name__ == '__main__':
+    pass
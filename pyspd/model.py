@@ -6,12 +6,70 @@ Overall Model for the linear program.
 
 """
 
+import multiprocessing
 import pulp
 import time
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 
 # C Libraries
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+
+from .matrix import LPMatrix
+from .presolve import Presolve
+from .profiling import Profiler, run_steps, tracer
+
+# The HiGHS bindings, imported by load_highspy on first use
+highspy = None
+_highspy_loaded = False
+
+
+def load_highspy():
+    """ Import highspy the first time a model is solved with the highs
+    backend rather than when pyspd is imported
+
+    Returns
+    -------
+    highspy: module
+        Or None when highspy is not installed, in which case
+        scipy.optimize.linprog is used instead
+
+    """
+    global highspy, _highspy_loaded
+    if not _highspy_loaded:
+        try:
+            import highspy as module
+        except ImportError:
+            module = None
+        highspy, _highspy_loaded = module, True
+    return highspy
+
+
+def load_linprog():
+    """ Import scipy.optimize.linprog, which solves the highs backend
+    when highspy is not installed. Solving with HiGHS requires scipy 1.6
+    or later.
+    """
+    import scipy
+    from scipy.optimize import linprog
+    version = tuple(int(part) for part in
+                    scipy.__version__.split('.')[:2] if part.isdigit())
+    if version < (1, 6):
+        raise ValueError("The highs backend requires highspy or scipy 1.6 "
+                         "or later, found scipy %s" % scipy.__version__)
+    return linprog
+
+
+def invalidate_analysis(model):
+    """ Discard the results cached by the Analytics of the System
+    Operator if they were read from the model, as it has been solved
+    again
+    """
+    analysis = getattr(model.ISO, 'Analysis', None)
+    if analysis is not None and analysis.SPD is model:
+        analysis.invalidate()
+
 
 class SPDModel(object):
     """SPDModel
@@ -27,15 +85,111 @@ class SPDModel(object):
     solver.solve_lp()
     solver.parse_result()
 
+    The Linear Program may also be compiled to a sparse matrix form
+    with create_matrix. The pulp problem remains the reference
+    implementation for cross checking results.
+
+    Parameters
+    ----------
+    ISO: SystemOperator
+        The System Operator containing the dispatch to be solved
+    backend: str, "pulp" or "highs", default "pulp"
+        Solve through a pulp problem and an external solver, or solve
+        the sparse matrix form in process with the HiGHS solver
+    processes: int, default None
+        Solve each instance of an iterator as its own Linear Program
+        across a pool of this many processes, highs backend only.
+        By default all of the instances are solved as one problem.
+    store: ParameterStore, default None
+        Solve the instances of this store instead of the parameters of
+        the System Operator, highs backend only. The model is then not
+        made the SPD of the System Operator.
+    presolve: bool, default False
+        Remove the rows which can never bind and the columns which can
+        never be dispatched before solving, highs backend only. What
+        was removed is reported by self.presolved.
+    profile: bool or Profiler, default False
+        Record the time, size and memory of each phase of building,
+        solving and parsing the model in self.profiler, a new Profiler
+        when True. The registered hooks are fired for the same phases
+        whether or not the model is profiled.
+
     """
-    def __init__(self, ISO):
+    backends = ("pulp", "highs")
+
+    # The steps of create_lp with the pulp backend, in order
+    steps = ('_setup_lp', '_create_variables', '_obj_function',
+             '_nodal_demand', '_energy_offers', '_reserve_offers',
+             '_transmission_offer', '_reserve_proportion',
+             '_reserve_combined', '_generator_risk', '_transmission_risk',
+             '_reserve_dispatch')
+
+    # Families of results, by the actor group indexing them and whether
+    # they are read from the variables or the constraint duals
+    result_families = OrderedDict([
+        ('Energy_Total', ('stations', 'Variable')),
+        ('Reserve_Total', ('reserve_providers', 'Variable')),
+        ('Transmission_Total', ('branches', 'Variable')),
+        ('Nodal_Injection', ('nodes', 'Variable')),
+        ('Reserve_Risk', ('reserve_zones', 'Variable')),
+        ('Energy_Price', ('nodes', 'Constraint')),
+        ('Reserve_Price', ('reserve_zones', 'Constraint'))])
+
+    # Actor parameters which resolve may patch in place, by the
+    # SystemOperator list holding the actors
+    incremental_parameters = {
+        'stations': ('energy_price', 'energy_offer', 'reserve_price',
+                     'reserve_offer', 'reserve_proportion', 'capacity'),
+        'interruptible_loads': ('reserve_price', 'reserve_offer'),
+        'nodes': ('demand',),
+        'branches': ('capacity',)}
+
+    def __init__(self, ISO, backend="pulp", processes=None, store=None,
+                 presolve=False, profile=False):
         super(SPDModel, self).__init__()
 
-        self.ISO = ISO
-        ISO.SPD = self
+        if backend not in self.backends:
+            raise ValueError("Unknown backend %s, expected one of %s" %
+                             (backend, ', '.join(self.backends)))
+        if processes and backend != "highs":
+            raise ValueError("Decomposed solves require the highs backend")
+        if store is not None and backend != "highs":
+            raise ValueError("Solving a ParameterStore requires the highs "
+                             "backend")
+        if presolve and backend != "highs":
+            raise ValueError("Presolve requires the highs backend")
 
-    def full_run(self, solver=pulp.PULP_CBC_CMD()):
-        """ Convenience function to compile a full run """
+        self.ISO = ISO
+        if store is None:
+            ISO.SPD = self
+        self.backend = backend
+        self.processes = processes
+        self.presolve = presolve
+        self.presolved = None
+        self.solution_time = {'build': None, 'transfer': None, 'solve': None}
+        if profile is True:
+            profile = Profiler()
+        self.profiler = profile or None
+
+        self._store = store
+        self._highs = None
+        self._snapshot = {}
+        self._structure = None
+        self._kept = set()
+
+    @property
+    def store(self):
+        """ ParameterStore of the instances being solved """
+        if self._store is not None:
+            return self._store
+        return self.ISO.ensure_parameters()
+
+    def full_run(self, solver=None):
+        """ Convenience function to compile a full run, with
+        pulp.PULP_CBC_CMD() as the default solver of the pulp backend
+        """
+        if solver is None and self.backend == "pulp":
+            solver = pulp.PULP_CBC_CMD()
         self.create_lp()
         self.solve_lp(solver)
 
@@ -45,30 +199,432 @@ class SPDModel(object):
         function and adding all of the necessary constraints.
         This exists as a wrapper around a number of hidden functions.
 
+        With the highs backend this creates the sparse matrix form instead.
+
         """
-        self._setup_lp()
-        self._create_variables()
-        self._obj_function()
-        self._nodal_demand()
-        self._energy_offers()
-        self._reserve_offers()
-        self._transmission_offer()
-        self._reserve_proportion()
-        self._reserve_combined()
-        self._generator_risk()
-        self._transmission_risk()
-        self._reserve_dispatch()
+        begin = time.time()
+        trace = tracer(self.profiler, self)
+        if self.backend == "highs":
+            self.create_matrix()
+        elif trace is None:
+            self.ISO.parameter_dicts()
+            run_steps(self, self.steps, "create_lp")
+        else:
+            with trace.phase("parameter_dicts", "create_lp"):
+                self.ISO.parameter_dicts(self.profiler)
+            run_steps(self, self.steps, "create_lp", trace, self._lp_size)
+        self.solution_time['build'] = time.time() - begin
+        self._highs = None
+
+    def create_matrix(self):
+        """ Publically exposed API
+        Creates the sparse matrix form of the Linear program, a CSR
+        constraint matrix with bound and cost vectors, from the same
+        parameters used by create_lp.
+
+        """
+        self.matrix = LPMatrix(self.ISO, self.store).build(self.profiler)
+        if self.presolve:
+            trace = tracer(self.profiler, self)
+            if trace is None:
+                self.presolved = Presolve(self.matrix).run()
+            else:
+                with trace.phase("presolve", "create_matrix"):
+                    self.presolved = Presolve(self.matrix).run()
+        return self
+
+    def _lp_size(self):
+        """ Rows and columns of the pulp problem """
+        return len(self.lp.constraints), len(self.lp.variables())
 
     def write_lp(self, fName=None):
         """ Write the Linear Program to a file """
         self.lp.writeLP(fName)
 
-    def solve_lp(self, solver=pulp.COIN_CMD()):
-        """ Solve the Linear Program including the time taken to solve it """
+    def solve_lp(self, solver=None):
+        """ Solve the Linear Program including the time taken to solve it
+
+        The time taken is reported in solution_time, split into the time
+        to build the problem, to transfer it to the solver and to solve it.
+        The pulp backend writes and reads the solver files within the
+        solve itself, so no separate transfer time is reported.
+
+        Parameters
+        ----------
+        solver: pulp solver, default pulp.COIN_CMD()
+            The external solver to use with the pulp backend, ignored
+            by the highs backend.
+
+        """
+        trace = tracer(self.profiler, self)
+        if trace is None:
+            self._solve(solver)
+        else:
+            with trace.phase("solve_lp", "solve", backend=self.backend):
+                self._solve(solver)
+
+        # An explicit store is never re-solved, so nothing is tracked
+        if self._store is None:
+            self._snapshot = self._parameter_snapshot()
+            self._structure = self._structure_snapshot()
+
+        invalidate_analysis(self)
+
+    def changed_parameters(self):
+        """ Actor parameters which have changed since the last solve
+
+        Returns
+        -------
+        changes: list
+            Tuples of (actor, parameter, old value, new value)
+
+        """
+        actors = self.ISO.parameters.actors
+        return [(actors[group][i], parameter, old, new)
+                for group, i, parameter, old, new in self._changes()]
+
+    def resolve(self, solver=None):
+        """ Incrementally re-solve the Linear Program after changing
+        station, interruptible load, node or branch parameters.
+
+        Only the affected objective coefficients, bounds and right hand
+        sides are patched. The highs backend then warm starts from the
+        previous basis when highspy is available. The pulp backend
+        recreates the pulp problem from the patched parameters.
+
+        The parameters being varied by create_iterator, the risk flags and
+        the set of actors cannot be patched and require create_iterator
+        to be called again.
+
+        Parameters
+        ----------
+        solver: pulp solver, default pulp.COIN_CMD()
+            The external solver to use with the pulp backend
+
+        """
+        if self._store is not None:
+            raise ValueError("Only the parameters of the System Operator "
+                             "may be re-solved")
+        if self._structure != self._structure_snapshot():
+            raise ValueError("The network structure has changed, call "
+                             "create_iterator again to rebuild it")
+
+        begin = time.time()
+        changes = self._changes()
+        if self.presolve:
+            # The live model holds the reduced problem, which changes
+            self._highs = None
+        if self.backend == "highs":
+            for group, i, parameter, old, new in changes:
+                self._patch_parameter(group, i, parameter, new)
+
+        store = self.ISO.parameters
+        self.ISO._create_parameters(self._resolve_overrides(store),
+                                    store.index)
+        self.changes = self.changed_parameters()
+
+        if self.backend == "highs":
+            self.matrix.store = self.ISO.parameters
+            if self.presolve:
+                self.presolved = Presolve(self.matrix).run()
+            self.solution_time['build'] = time.time() - begin
+            self.solve_lp(solver)
+        else:
+            self.create_lp()
+            self.solve_lp(solver)
+        return self
+
+    def result_array(self, family):
+        """ Instance by actor array of the solution of a result family
+        of the sparse matrix form, energy prices being positive.
+
+        Parameters
+        ----------
+        family: str
+            The result family, e.g. "Energy_Price"
+
+        """
+        group, kind = self.result_families[family]
+        shape = (len(self.store), len(self.store.names[group]))
+        if kind == "Variable":
+            values = self.primal[self.matrix.columns[family]]
+        else:
+            values = self.dual[self.matrix.families[family]]
+        values = values.reshape(shape).copy()
+        if family == "Energy_Price":
+            values *= -1
+        return values
+
+    def ranging(self):
+        """ Objective and right hand side ranging of the last solve,
+        read from the live HiGHS model without re-solving. Within each
+        range the optimal basis, and so the prices and the dispatch
+        rules, remain the same.
+
+        Ranging requires highspy, installed with the highs extra of
+        pyspd, and a single optimal solve which is not decomposed.
+
+        Returns
+        -------
+        ranging: dict
+            'cost_lower' and 'cost_upper' for every column and
+            'bound_lower' and 'bound_upper' for every row of the matrix
+
+        """
+        if self.backend != "highs":
+            raise ValueError("Ranging requires the highs backend")
+        if load_highspy() is None:
+            raise ValueError("Ranging requires highspy, install it with "
+                             "pip install pyspd[highs]")
+        if self.processes:
+            raise ValueError("Ranging is not available after a decomposed "
+                             "solve, solve without processes")
+        if self._highs is None or getattr(self, 'status', None) is None:
+            raise ValueError("Solve the model before reading the ranging")
+        if self.status != "Optimal":
+            raise ValueError("Ranging requires an optimal solution, the "
+                             "status is %s" % self.status)
+        return highs_ranging(self._highs, self.matrix,
+                             self.presolved if self.presolve else None)
+
+    def _changes(self):
+        """ Compare the current parameters with the last solve
+
+        Returns
+        -------
+        changes: list
+            Tuples of (actor group, actor index, parameter, old, new)
+
+        """
+        if self._store is not None:
+            return []
+        current = self._parameter_snapshot()
+        return [key + (old, current[key])
+                for key, old in self._snapshot.items()
+                if key in current and current[key] != old]
+
+    def _parameter_snapshot(self):
+        """ Record the current value of each patchable actor parameter,
+        by actor group, actor index and parameter.
+
+        Parameters varied by the iterator are not tracked, nor are
+        parameters which have been replaced by something other than a
+        number, e.g. the result Series Station.calculate_profits assigns.
+        Those keep their last value when re-solving.
+
+        """
+        store = self.ISO.parameters
+        varied = set((id(actor), variable)
+                     for actor, variable in store.overrides
+                     if (actor, variable) not in self._kept)
+        snapshot = {}
+        for group, parameters in self.incremental_parameters.items():
+            for i, actor in enumerate(store.actors[group]):
+                for parameter in parameters:
+                    value = getattr(actor, parameter, None)
+                    if ((id(actor), parameter) not in varied and
+                            np.isscalar(value)):
+                        snapshot[(group, i, parameter)] = value
+        return snapshot
+
+    def _resolve_overrides(self, store):
+        """ The overrides of the re-solved ParameterStore, those of the
+        iterator together with the last value of every parameter which
+        is no longer a number and so cannot be read from its actor
+        """
+        overrides = dict((key, values)
+                         for key, values in store.overrides.items()
+                         if key not in self._kept)
+        self._kept = set()
+        for group, parameters in self.incremental_parameters.items():
+            for i, actor in enumerate(store.actors[group]):
+                for parameter in parameters:
+                    key = (actor, parameter)
+                    if (key not in overrides and
+                            not np.isscalar(getattr(actor, parameter, None))):
+                        overrides[key] = store.values[group][parameter][:, i]
+                        self._kept.add(key)
+        return overrides
+
+    def _structure_snapshot(self):
+        """ Record the parts of the network that cannot be patched """
+        ISO = self.ISO
+        return ([len(getattr(ISO, group))
+                 for group in self.incremental_parameters] +
+                [station.risk for station in ISO.stations] +
+                [branch.risk for branch in ISO.branches])
+
+    def _patch_parameter(self, group, actor, parameter, value):
+        """ Patch a single actor parameter in every instance of the
+        matrix and the live HiGHS model.
+        """
+        matrix = self.matrix
+        eps = LPMatrix.eps
+
+        # Interruptible loads follow the stations as reserve providers
+        provider = actor
+        if group == 'interruptible_loads':
+            provider = actor + len(self.ISO.parameters.names['stations'])
+
+        if group == 'nodes':
+            self._patch_rows(matrix.family_rows('Energy_Price', actor),
+                             -value - eps, -value - eps)
+
+        elif group == 'branches':
+            self._patch_rows(matrix.family_rows('Pos_flow', actor),
+                             -np.inf, value)
+            self._patch_rows(matrix.family_rows('Neg_flow', actor),
+                             value * -1, np.inf)
+
+        elif parameter == 'energy_price':
+            self._patch_costs(matrix.block_columns('Energy_Total', actor),
+                              value)
+
+        elif parameter == 'energy_offer':
+            self._patch_rows(matrix.family_rows('Total_Energy', actor),
+                             -np.inf, value + eps)
+
+        elif parameter == 'reserve_price':
+            self._patch_costs(matrix.block_columns('Reserve_Total',
+                                                   provider), value)
+
+        elif parameter == 'reserve_offer':
+            self._patch_rows(matrix.family_rows('Total_Reserve', provider),
+                             -np.inf, value + eps)
+
+        elif parameter == 'reserve_proportion':
+            self._patch_coefficients(
+                matrix.family_rows('Reserve_Proportion', actor),
+                matrix.block_columns('Energy_Total', actor), value * -1)
+
+        elif parameter == 'capacity':
+            self._patch_rows(matrix.family_rows('Total_Capacity', actor),
+                             -np.inf, value + eps)
+
+    def _patch_rows(self, rows, lower, upper):
+        """ Patch the bounds of rows of the matrix """
+        self.matrix.row_lower[rows] = lower
+        self.matrix.row_upper[rows] = upper
+        if self._highs is not None:
+            self._highs.changeRowsBounds(len(rows), rows,
+                                         self.matrix.row_lower[rows],
+                                         self.matrix.row_upper[rows])
+
+    def _patch_costs(self, cols, value):
+        """ Patch objective coefficients of the matrix """
+        self.matrix.cost[cols] = value
+        if self._highs is not None:
+            self._highs.changeColsCost(len(cols), cols,
+                                       self.matrix.cost[cols])
+
+    def _patch_coefficients(self, rows, cols, value):
+        """ Patch elements of the constraint matrix """
+        self.matrix.A[rows, cols] = value
+        if self._highs is not None:
+            for row, col in zip(rows, cols):
+                self._highs.changeCoeff(int(row), int(col), value)
+
+    def _solve(self, solver):
+        """ Solve with the backend of the model """
+        if self.backend == "highs":
+            return self._solve_highs()
+
+        if solver is None:
+            solver = pulp.COIN_CMD()
         begin = time.time()
         self.lp.solve(solver)
-        self.solution_time = time.time() - begin
+        self.solution_time['solve'] = time.time() - begin
+        self.status = pulp.LpStatus[self.lp.status]
+        return self
+
+    def _solve_highs(self):
+        """ Solve the sparse matrix form in process with HiGHS
+
+        Returns
+        -------
+        self.primal: array
+            Value of each column of the matrix
+        self.dual: array
+            Dual value of each row of the matrix, with the same sign
+            convention as the pulp constraint duals
+
+        """
+        if self.processes:
+            return self._solve_decomposed()
+
+        matrix = self.presolved.reduced if self.presolve else self.matrix
+        if load_highspy() is not None:
+            begin = time.time()
+            if self._highs is None:
+                self._highs = highs_model(matrix)
+            self.solution_time['transfer'] = time.time() - begin
+
+            begin = time.time()
+            self._highs.run()
+            self.solution_time['solve'] = time.time() - begin
+
+            solution = highs_solution(self._highs, matrix)
+        else:
+            linprog = load_linprog()
+            begin = time.time()
+            problem, rows = linprog_problem(matrix)
+            self.solution_time['transfer'] = time.time() - begin
+
+            begin = time.time()
+            result = linprog(method='highs', **problem)
+            self.solution_time['solve'] = time.time() - begin
+
+            solution = linprog_solution(matrix, rows, result)
+
+        self.status, self.primal, self.dual = solution
+        if self.presolve:
+            self.primal, self.dual = self.presolved.restore(self.primal,
+                                                            self.dual)
+        return self
 
+    def _solve_decomposed(self):
+        """ Solve each instance of an iterator as its own Linear Program
+        across a pool of processes and merge the solutions back together.
+
+        The instances created by create_iterator share no rows or
+        columns, so the block diagonal matrix splits into one block per
+        instance without loss.
+
+        """
+        begin = time.time()
+        matrix = self.presolved if self.presolve else self.matrix
+        rows, cols, blocks = matrix.split()
+        self.solution_time['transfer'] = time.time() - begin
+
+        begin = time.time()
+        if self.processes == 1:
+            solutions = [solve_block(block) for block in blocks]
+        else:
+            pool = multiprocessing.Pool(self.processes)
+            try:
+                solutions = pool.map(solve_block, blocks)
+            finally:
+                pool.close()
+                pool.join()
+        self.solution_time['solve'] = time.time() - begin
+
+        self.primal = np.full(matrix.num_cols, np.nan)
+        self.dual = np.full(matrix.num_rows, np.nan)
+        self.instance_status = {}
+        for itname, r, c, (status, primal, dual) in zip(
+                self.store.instances, rows, cols, solutions):
+            self.instance_status[itname] = status
+            self.primal[c] = primal
+            self.dual[r] = dual
+
+        if self.presolve:
+            self.primal, self.dual = self.presolved.restore(self.primal,
+                                                            self.dual)
+
+        statuses = set(self.instance_status.values())
+        self.status = statuses.pop() if len(statuses) == 1 else \
+            pulp.LpStatus[pulp.LpStatusNotSolved]
+        return self
 
     def _setup_lp(self):
         """ Setup a Linear Program from a defined ISO instance
@@ -79,6 +635,7 @@ class SPDModel(object):
         # Set up a Linear Program
 
         self.lp = pulp.LpProblem("SPD Dispatch", pulp.LpMinimize)
+        self.lp_index = {}
 
         self.addC = self.lp.addConstraint
         self.SUM = pulp.lpSum
@@ -115,6 +672,29 @@ class SPDModel(object):
         self.reserve_zone_risk = self.lpDict("Reserve_Risk",
                                              self.ISO.reserve_zone_names, 0)
 
+        for family, variables, names in [
+                ("Energy_Total", self.energy_offers,
+                 self.ISO.energy_station_names),
+                ("Reserve_Total", self.reserve_offers,
+                 self.ISO.reserve_station_names),
+                ("Transmission_Total", self.branch_flow,
+                 self.ISO.branch_names),
+                ("Nodal_Injection", self.nodal_injection,
+                 self.ISO.node_names),
+                ("Reserve_Risk", self.reserve_zone_risk,
+                 self.ISO.reserve_zone_names)]:
+            self._index_results(family, [variables[n] for n in names])
+
+    def _index_results(self, family, elements):
+        """ Record the position of pulp variables or constraints within
+        the result arrays of a family, which are ordered by instance
+        then actor in the same way as the parameter lists.
+        Analytics uses this to parse the results without reading names.
+
+        """
+        for position, element in enumerate(elements):
+            self.lp_index[element.name] = (family, position)
+
     def _obj_function(self):
         """ Objective Function
 
@@ -159,22 +739,26 @@ class SPDModel(object):
         # Introduce a buffer to ensure the duals work
         eps = 0.00000001
 
+        prices = []
         for node in node_names:
             n1 = '_'.join([node, 'Energy_Price'])
             n2 = '_'.join([node, 'Nodal_Transmission'])
 
             # Net Injections from Energy and Demand
 
-            self.addC(node_inj[node] == self.SUM([energy_offer[i]
-                                                 for i in nodal_stations[node]]
-                                                 ) - nodal_demand[node] - eps,
-                                                  n1)
+            price = node_inj[node] == self.SUM([energy_offer[i]
+                                               for i in nodal_stations[node]]
+                                               ) - nodal_demand[node] - eps
+            self.addC(price, n1)
+            prices.append(price)
 
             # Net Injection from transmission
 
             self.addC(node_inj[node] == self.SUM([branch_flow[t] *
                         flow_dir[node][t] for t in flow_map[node]]), n2)
 
+        self._index_results('Energy_Price', prices)
+
     def _energy_offers(self):
         """Energy offer constraints
 
@@ -329,11 +913,206 @@ class SPDModel(object):
         # Introduce a buffer to ensure the duals work
         eps = 0.00000001
 
+        prices = []
         for i in rzones:
             name = '_'.join([i, 'Reserve_Price'])
-            self.addC(self.SUM([roffer[j]
-                               for j in rzone_stations[i]]
-                               ) >= rzone_risk[i] +  eps, name)
+            price = self.SUM([roffer[j] for j in rzone_stations[i]]
+                             ) >= rzone_risk[i] + eps
+            self.addC(price, name)
+            prices.append(price)
+
+        self._index_results('Reserve_Price', prices)
+
+
+def highs_model(matrix):
+    """ Pass a sparse matrix form to a new highspy model """
+    lp = highspy.HighsLp()
+    lp.num_col_ = matrix.num_cols
+    lp.num_row_ = matrix.num_rows
+    lp.col_cost_ = matrix.cost
+    lp.col_lower_ = matrix.col_lower
+    lp.col_upper_ = matrix.col_upper
+    lp.row_lower_ = matrix.row_lower
+    lp.row_upper_ = matrix.row_upper
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    lp.a_matrix_.start_ = matrix.A.indptr
+    lp.a_matrix_.index_ = matrix.A.indices
+    lp.a_matrix_.value_ = matrix.A.data
+
+    model = highspy.Highs()
+    model.setOptionValue('output_flag', False)
+    model.passModel(lp)
+    return model
+
+
+def highs_solution(model, matrix):
+    """ Read the status, primal and dual values from a solved highspy model
+
+    Returns
+    -------
+    status: str
+        The pulp status name of the solution
+    primal: array
+        Value of each column of the matrix
+    dual: array
+        Dual value of each row, with the pulp sign convention
+
+    """
+    statuses = {highspy.HighsModelStatus.kOptimal: pulp.LpStatusOptimal,
+                highspy.HighsModelStatus.kInfeasible: pulp.LpStatusInfeasible,
+                highspy.HighsModelStatus.kUnbounded: pulp.LpStatusUnbounded}
+    status = statuses.get(model.getModelStatus(), pulp.LpStatusNotSolved)
+
+    primal = np.full(matrix.num_cols, np.nan)
+    dual = np.full(matrix.num_rows, np.nan)
+    if status == pulp.LpStatusOptimal:
+        solution = model.getSolution()
+        primal[:] = solution.col_value
+        dual[:] = solution.row_dual
+    return pulp.LpStatus[status], primal, dual
+
+
+def highs_ranging(model, matrix, presolved=None):
+    """ Read the ranging of a solved highspy model, see
+    SPDModel.ranging. Rows and columns removed by a presolve have no
+    ranging, the columns being fixed keep an unbounded cost range.
+    """
+    ranging = model.getRanging()
+    if isinstance(ranging, (tuple, list)):
+        ranging = ranging[-1]
+
+    if presolved is None:
+        rows = np.ones(matrix.num_rows, dtype=bool)
+        cols = np.ones(matrix.num_cols, dtype=bool)
+    else:
+        rows, cols = presolved.keep_rows, presolved.keep_cols
+
+    # Recent versions of highspy pad the column ranging to the number
+    # of columns and rows of the model
+    num_cols, num_rows = int(cols.sum()), int(rows.sum())
+
+    result = {'cost_lower': np.full(matrix.num_cols, -np.inf),
+              'cost_upper': np.full(matrix.num_cols, np.inf),
+              'bound_lower': np.full(matrix.num_rows, np.nan),
+              'bound_upper': np.full(matrix.num_rows, np.nan)}
+    result['cost_lower'][cols] = ranging.col_cost_dn.value_[:num_cols]
+    result['cost_upper'][cols] = ranging.col_cost_up.value_[:num_cols]
+    result['bound_lower'][rows] = ranging.row_bound_dn.value_[:num_rows]
+    result['bound_upper'][rows] = ranging.row_bound_up.value_[:num_rows]
+    return result
+
+
+def linprog_problem(matrix):
+    """ Split the rows of the matrix into the equality and upper
+    bounded inequality form expected by scipy.optimize.linprog
+
+    Returns
+    -------
+    problem: dict
+        Keyword arguments for linprog
+    rows: tuple
+        The equality, upper and lower bounded row indices
+
+    """
+    lower, upper = matrix.row_lower, matrix.row_upper
+    equal = lower == upper
+    upper_rows = np.flatnonzero(~equal & np.isfinite(upper))
+    lower_rows = np.flatnonzero(~equal & np.isfinite(lower))
+    equal_rows = np.flatnonzero(equal)
+
+    A_ub = sp.vstack([matrix.A[upper_rows],
+                      matrix.A[lower_rows] * -1]).tocsr()
+    b_ub = np.concatenate([upper[upper_rows], lower[lower_rows] * -1])
+
+    problem = {'c': matrix.cost,
+               'A_ub': A_ub, 'b_ub': b_ub,
+               'A_eq': matrix.A[equal_rows],
+               'b_eq': lower[equal_rows],
+               'bounds': np.column_stack([matrix.col_lower,
+                                          matrix.col_upper])}
+    return problem, (equal_rows, upper_rows, lower_rows)
+
+
+def linprog_solution(matrix, rows, result):
+    """ Map the linprog result back on to the rows of the matrix, see
+    highs_solution for the values returned
+    """
+    statuses = {0: pulp.LpStatusOptimal,
+                2: pulp.LpStatusInfeasible,
+                3: pulp.LpStatusUnbounded}
+    status = statuses.get(result.status, pulp.LpStatusNotSolved)
+
+    primal = np.full(matrix.num_cols, np.nan)
+    dual = np.full(matrix.num_rows, np.nan)
+    if status == pulp.LpStatusOptimal:
+        equal_rows, upper_rows, lower_rows = rows
+        marginals = result.ineqlin.marginals
+        primal[:] = result.x
+        dual[:] = 0
+        dual[equal_rows] = result.eqlin.marginals
+        dual[upper_rows] += marginals[:len(upper_rows)]
+        dual[lower_rows] -= marginals[len(upper_rows):]
+    return pulp.LpStatus[status], primal, dual
+
+
+def solve_block(matrix):
+    """ Solve a sparse matrix form with HiGHS from scratch. Used by the
+    process pool, so must remain a module level function.
+    """
+    if load_highspy() is not None:
+        model = highs_model(matrix)
+        model.run()
+        return highs_solution(model, matrix)
+
+    linprog = load_linprog()
+    problem, rows = linprog_problem(matrix)
+    return linprog_solution(matrix, rows,
+                            linprog(method='highs', **problem))
+
+
+class ResultModel(object):
+    """ResultModel
+
+    Base of the models holding the results of every instance as instance
+    by actor arrays in self.results, which are read through Analytics
+    exactly as for an SPDModel. The instances a model cannot serve
+    itself are solved by solve_store, a highs SPDModel of a subset of
+    the ParameterStore.
+
+    """
+
+    result_families = SPDModel.result_families
+
+    @property
+    def store(self):
+        """ ParameterStore of the instances being solved """
+        return self.ISO.ensure_parameters()
+
+    def result_array(self, family):
+        """ Instance by actor array of the solution of a result family,
+        energy prices being positive.
+
+        Parameters
+        ----------
+        family: str
+            The result family, e.g. "Energy_Price"
+
+        """
+        return self.results[family].copy()
+
+    def solve_store(self, store, backend="highs", **options):
+        """ Solve the instances of a ParameterStore as an SPDModel which
+        is not made the SPD of the System Operator
+
+        Returns
+        -------
+        model: SPDModel
+            The solved model
+
+        """
+        model = SPDModel(self.ISO, backend=backend, store=store, **options)
+        model.full_run()
+        return model
 
 if __name__ == '__main__':
     pass
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Columnar store of the parameters passed to the linear program.
+
+"""
+
+from collections import OrderedDict
+
+# C Libraries
+import numpy as np
+import pandas as pd
+
+
+class ParameterStore(object):
+    """ParameterStore
+
+    Integer indexed, columnar copy of the parameters of every actor in a
+    System Operator for every instance of an iterator. Each parameter is
+    a NumPy array with an instance axis and an actor axis. Parameters
+    which do not vary between instances are a read only broadcast of a
+    single row, so adding instances costs nothing for them.
+
+    The topology of the network, which never varies between instances,
+    is held as integer index arrays into the actor lists.
+
+    Names of the form "<instance>_<actor>" are only generated when asked
+    for through instance_names.
+
+    Usage:
+    ------
+    store = ParameterStore(SystemOperator, ["Single"])
+    store.values['stations']['energy_price']
+
+    Parameters
+    ----------
+    SO: SystemOperator
+        The System Operator containing the actors
+    instances: list
+        Unique name of each instance
+    overrides: dict, default None
+        Mapping of (actor, variable) to an array containing the value
+        of the variable in each instance
+    index: pandas.Index, default None
+        Label of each instance, used to index the results
+
+    """
+
+    # Per instance parameters of each actor group, by the SystemOperator
+    # list holding the actors
+    parameters = OrderedDict([
+        ('stations', ('energy_price', 'energy_offer', 'reserve_price',
+                      'reserve_offer', 'reserve_proportion', 'capacity',
+                      'risk')),
+        ('interruptible_loads', ('reserve_price', 'reserve_offer')),
+        ('nodes', ('demand',)),
+        ('branches', ('capacity', 'risk'))])
+
+    def __init__(self, SO, instances, overrides=None, index=None):
+        super(ParameterStore, self).__init__()
+
+        self.instances = list(instances)
+        if index is None:
+            index = pd.Index(self.instances)
+        self.index = index
+        self.overrides = overrides or {}
+
+        self._create_topology(SO)
+        self._check_overrides()
+        self._create_values(SO)
+
+    def __len__(self):
+        return len(self.instances)
+
+    def instance_names(self, group):
+        """ Generate the "<instance>_<actor>" name of every actor in a
+        group for every instance, ordered by instance then actor.
+
+        Parameters
+        ----------
+        group: str
+            The actor group, e.g. 'stations'. 'reserve_providers' gives
+            the stations followed by the interruptible loads.
+
+        """
+        names = self.names[group]
+        return ['_'.join([itname, name]) for itname in self.instances
+                for name in names]
+
+    def take(self, positions):
+        """ Create a store containing a subset of the instances
+
+        Parameters
+        ----------
+        positions: array
+            Integer positions of the instances to keep
+
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        store = object.__new__(ParameterStore)
+        store.__dict__.update(self.__dict__)
+        store.instances = [self.instances[i] for i in positions]
+        store.index = self.index[positions]
+        store.overrides = dict((k, np.asarray(v)[positions])
+                               for k, v in self.overrides.items())
+        store.values = dict(
+            (group, dict((p, v[positions]) for p, v in values.items()))
+            for group, values in self.values.items())
+        return store
+
+    def _create_topology(self, SO):
+        """ Record the actors and the integer index arrays mapping them
+        on to each other.
+
+        """
+        stations = list(SO.stations)
+        loads = list(SO.interruptible_loads)
+        branches = list(SO.branches)
+
+        # Companies are only known through the units they own
+        companies = []
+        for unit in stations + loads:
+            if not any(unit.company is c for c in companies):
+                companies.append(unit.company)
+
+        self.actors = OrderedDict([
+            ('stations', stations),
+            ('interruptible_loads', loads),
+            ('nodes', list(SO.nodes)),
+            ('branches', branches),
+            ('reserve_zones', list(SO.reserve_zones)),
+            ('companies', companies)])
+
+        self.names = dict((group, [a.name for a in actors])
+                          for group, actors in self.actors.items())
+        self.names['reserve_providers'] = (self.names['stations'] +
+                                           self.names['interruptible_loads'])
+
+        position = dict((group, dict((id(a), i) for i, a in
+                                     enumerate(actors)))
+                        for group, actors in self.actors.items())
+
+        def locate(group, actors):
+            return np.array([position[group][id(a)] for a in actors],
+                            dtype=np.int64)
+
+        self.node_zone = locate('reserve_zones',
+                                [n.RZ for n in self.actors['nodes']])
+        self.station_node = locate('nodes', [s.node for s in stations])
+        self.station_zone = self.node_zone[self.station_node]
+        self.station_company = locate('companies',
+                                      [s.company for s in stations])
+        self.load_node = locate('nodes', [l.node for l in loads])
+        self.load_zone = self.node_zone[self.load_node]
+        self.load_company = locate('companies', [l.company for l in loads])
+        self.branch_sending = locate('nodes',
+                                     [b.sending_node for b in branches])
+        self.branch_receiving = locate('nodes',
+                                       [b.receiving_node for b in branches])
+
+    def _check_overrides(self):
+        """ Ensure each override refers to a known parameter of an actor
+        in the System Operator
+        """
+        for actor, variable in self.overrides:
+            groups = [g for g, actors in self.actors.items()
+                      if any(a is actor for a in actors)]
+            if not any(variable in self.parameters.get(g, ()) for g in groups):
+                raise ValueError("Cannot vary %s of %s" %
+                                 (variable, getattr(actor, 'name', actor)))
+
+    def _create_values(self, SO):
+        """ Create the instance by actor array of every parameter """
+        shape = len(self.instances)
+        self.values = {}
+        for group, parameters in self.parameters.items():
+            actors = self.actors[group]
+            self.values[group] = {}
+            for parameter in parameters:
+                dtype = bool if parameter == 'risk' else float
+                # Overridden values are replaced, and need not be numbers
+                base = np.array([0 if (a, parameter) in self.overrides
+                                 else getattr(a, parameter) for a in actors],
+                                dtype=dtype)
+                self.values[group][parameter] = self._instance_values(
+                    group, parameter, base, shape)
+
+    def _instance_values(self, group, parameter, base, shape):
+        """ Broadcast a parameter over the instances, applying any
+        overrides of the parameter for individual actors.
+
+        """
+        overrides = [(i, np.asarray(values)) for i, actor in
+                     enumerate(self.actors[group])
+                     for (a, p), values in self.overrides.items()
+                     if a is actor and p == parameter]
+
+        if not overrides:
+            return np.broadcast_to(base, (shape, len(base)))
+
+        values = np.tile(base, (shape, 1))
+        for i, override in overrides:
+            values[:, i] = override
+        return values
+
+if __name__ == '__main__':
+    pass
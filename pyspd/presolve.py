@@ -0,0 +1,391 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Presolve of the sparse matrix form, removing the rows which can never
+bind and the columns which can never be dispatched.
+
+"""
+
+from collections import OrderedDict
+
+# C Libraries
+import numpy as np
+
+from .matrix import LPBlock, LPMatrix, group_instances
+
+
+class Presolve(object):
+    """Presolve
+
+    Reduces an LPMatrix before it is passed to the solver. Every row
+    with a single non zero element, other than the protected rows, is
+    treated as a bound on its column and is kept, the remaining
+    reductions are:
+
+        Columns whose bounds leave no room to move, e.g. a station
+        offering no energy or a provider offering no reserve, are fixed
+        and removed along with their bound rows.
+        Rows which hold for every value of their columns within the
+        bounds, e.g. a reserve proportion or total capacity limit which
+        the offers can never reach, are removed.
+        Risk rows dominated by another risk row of the same reserve
+        zone, which always sets at least as large a risk, are removed.
+        Branch limits above the total possible injection are removed
+        when the branch is a bridge of the network, as the flow along
+        it is then the net injection on one side of the branch.
+
+    The nodal balance and reserve dispatch rows are never removed as
+    their duals are the prices.
+
+    A row which can never bind has a zero dual. The dual of a bound row
+    of a fixed column is recovered from the reduced cost of the column
+    when the solution is restored.
+
+    Usage:
+    ------
+    presolve = Presolve(LPMatrix).run()
+    primal, dual = solve(presolve.reduced)
+    primal, dual = presolve.restore(primal, dual)
+
+    Parameters
+    ----------
+    matrix: LPMatrix
+        The sparse matrix form to reduce
+
+    """
+
+    # Rows whose duals are results or which define the network
+    protected = ("Energy_Price", "Nodal_Transmission", "Reserve_Price")
+
+    # Families of risk rows, which may dominate each other
+    risk_families = ("Generator_Risk", "Transmission_Risk")
+
+    # The same buffer the matrix uses to ensure the duals work
+    tolerance = LPMatrix.eps
+
+    def __init__(self, matrix):
+        super(Presolve, self).__init__()
+        self.matrix = matrix
+
+    def run(self):
+        """ Publically exposed API
+        Determine the rows and columns to remove and create the reduced
+        problem.
+
+        Returns
+        -------
+        self.reduced: LPBlock
+            The problem without the removed rows and columns
+        self.keep_rows, self.keep_cols: array
+            Whether each row and column of the matrix is kept
+
+        """
+        A = self.matrix.A.tocsr(copy=True)
+        A.eliminate_zeros()
+        self.A = A
+        self._entry_rows = np.repeat(np.arange(A.shape[0]), np.diff(A.indptr))
+
+        self._implied_bounds()
+        self._fix_columns()
+        self._redundant_rows()
+        self._dominated_risks()
+        self._branch_limits()
+        self._reduce()
+        return self
+
+    @property
+    def num_rows(self):
+        return self.reduced.num_rows
+
+    @property
+    def num_cols(self):
+        return self.reduced.num_cols
+
+    @property
+    def removed_rows(self):
+        """ Number of rows removed from the matrix """
+        return int((~self.keep_rows).sum())
+
+    @property
+    def removed_cols(self):
+        """ Number of columns removed from the matrix """
+        return int((~self.keep_cols).sum())
+
+    def report(self):
+        """ Number of rows removed from each constraint family and
+        columns removed from each block of variables
+
+        Returns
+        -------
+        report: dict
+            'rows' and 'columns', each an OrderedDict of the number
+            removed by family or block
+
+        """
+        matrix = self.matrix
+        rows = OrderedDict((family, int((~self.keep_rows[s]).sum()))
+                           for family, s in matrix.families.items())
+        cols = OrderedDict((block, int((~self.keep_cols[s]).sum()))
+                           for block, s in matrix.columns.items())
+        return {'rows': rows, 'columns': cols}
+
+    def split(self):
+        """ Split the reduced problem into one independent block per
+        instance, see LPMatrix.split. The indices are positions within
+        the reduced problem.
+        """
+        num_instances = len(self.matrix.store)
+        rows = group_instances(self.row_instance, num_instances)
+        cols = group_instances(self.col_instance, num_instances)
+
+        reduced = self.reduced
+        blocks = [LPBlock(reduced.cost[c], reduced.A[r][:, c],
+                          reduced.row_lower[r], reduced.row_upper[r],
+                          reduced.col_lower[c], reduced.col_upper[c])
+                  for r, c in zip(rows, cols)]
+        return rows, cols, blocks
+
+    def restore(self, primal, dual):
+        """ Map the solution of the reduced problem back on to every
+        row and column of the matrix
+
+        Parameters
+        ----------
+        primal: array
+            Value of each column of the reduced problem
+        dual: array
+            Dual value of each row of the reduced problem
+
+        Returns
+        -------
+        primal: array
+            Value of each column of the matrix, fixed columns taking
+            their fixed value
+        dual: array
+            Dual value of each row of the matrix
+
+        """
+        matrix = self.matrix
+        full_primal = np.full(matrix.num_cols, np.nan)
+        full_dual = np.full(matrix.num_rows, np.nan)
+        if np.isnan(primal).any() or np.isnan(dual).any():
+            return full_primal, full_dual
+
+        full_primal[self.keep_cols] = primal
+        full_primal[self.fixed] = self.values[self.fixed]
+
+        full_dual[:] = 0
+        full_dual[self.keep_rows] = dual
+
+        rows, cols, coef = self._fixed_bounds
+        if len(rows):
+            reduced = matrix.cost[cols] - self.A.T.dot(full_dual)[cols]
+            value = reduced / coef
+            binds = (((value < 0) & np.isfinite(matrix.row_upper[rows])) |
+                     ((value > 0) & np.isfinite(matrix.row_lower[rows])))
+            full_dual[rows] = np.where(binds, value, 0)
+        return full_primal, full_dual
+
+    def _implied_bounds(self):
+        """ Tighten the column bounds with every row containing a single
+        non zero element.
+
+        Protected rows are not bounds, e.g. the nodal balance of a node
+        without stations has a single element but its dual is the price,
+        which could not be recovered had its column been fixed.
+
+        """
+        A, matrix = self.A, self.matrix
+        counts = np.diff(A.indptr)
+        self.singleton = (counts == 1) & ~self._protected_rows()
+
+        rows = np.flatnonzero(self.singleton)
+        cols = A.indices[A.indptr[rows]]
+        coef = A.data[A.indptr[rows]]
+
+        lower = np.where(coef > 0, matrix.row_lower[rows],
+                         matrix.row_upper[rows]) / coef
+        upper = np.where(coef > 0, matrix.row_upper[rows],
+                         matrix.row_lower[rows]) / coef
+
+        self.col_lower = matrix.col_lower.copy()
+        self.col_upper = matrix.col_upper.copy()
+        np.maximum.at(self.col_lower, cols, lower)
+        np.minimum.at(self.col_upper, cols, upper)
+
+    def _fix_columns(self):
+        """ Fix the columns whose bounds leave no room to move """
+        width = self.col_upper - self.col_lower
+        self.fixed = (np.isfinite(self.col_lower) & (width >= 0) &
+                      (width <= 2 * self.tolerance))
+        self.values = np.where(self.fixed, self.col_lower, np.nan)
+
+        self.col_lower = np.where(self.fixed, self.values, self.col_lower)
+        self.col_upper = np.where(self.fixed, self.values, self.col_upper)
+
+    def _activity(self, mask=None):
+        """ Smallest and largest value each row may take within the
+        column bounds
+
+        Parameters
+        ----------
+        mask: array, default None
+            Only include the elements of the matrix selected
+
+        """
+        A = self.A
+        data, cols, rows = A.data, A.indices, self._entry_rows
+        if mask is not None:
+            data, cols, rows = data[mask], cols[mask], rows[mask]
+
+        lower = np.where(data > 0, data * self.col_lower[cols],
+                         data * self.col_upper[cols])
+        upper = np.where(data > 0, data * self.col_upper[cols],
+                         data * self.col_lower[cols])
+
+        num_rows = A.shape[0]
+        return (np.bincount(rows, lower, minlength=num_rows),
+                np.bincount(rows, upper, minlength=num_rows))
+
+    def _protected_rows(self):
+        protected = np.zeros(self.A.shape[0], dtype=bool)
+        for family in self.protected:
+            protected[self.matrix.families[family]] = True
+        return protected
+
+    def _redundant_rows(self):
+        """ Remove every row which holds for all values of its columns.
+
+        Bound rows are kept unless their column is fixed, as the bounds
+        they imply were used to find the redundant rows.
+
+        """
+        matrix = self.matrix
+        lower, upper = self._activity()
+        redundant = ((lower >= matrix.row_lower - self.tolerance) &
+                     (upper <= matrix.row_upper + self.tolerance))
+
+        rows = np.flatnonzero(self.singleton)
+        on_fixed = np.zeros(len(redundant), dtype=bool)
+        on_fixed[rows] = self.fixed[self.A.indices[self.A.indptr[rows]]]
+
+        self.keep_rows = ~(redundant & ~self._protected_rows() &
+                           (~self.singleton | on_fixed))
+
+        # A single bound row of each fixed column takes up its dual
+        rows = rows[on_fixed[rows] & ~self.keep_rows[rows]]
+        cols, first = np.unique(self.A.indices[self.A.indptr[rows]],
+                                return_index=True)
+        rows = rows[first]
+        self._fixed_bounds = (rows, self.A.indices[self.A.indptr[rows]],
+                              self.A.data[self.A.indptr[rows]])
+
+    def _dominated_risks(self):
+        """ Remove risk rows which another risk row of the same reserve
+        zone and instance always exceeds.
+
+        Each risk row is Risk_{r} - x \ge b, requiring a risk between
+        b + min(x) and b + max(x). The row with the largest minimum
+        requirement on each Risk column dominates every other row whose
+        maximum requirement is no larger.
+
+        """
+        matrix, A = self.matrix, self.A
+        risk = matrix.columns["Reserve_Risk"]
+        is_risk = (A.indices >= risk.start) & (A.indices < risk.stop)
+
+        rows = np.concatenate([np.arange(matrix.num_rows)[matrix.families[f]]
+                               for f in self.risk_families])
+        rows = rows[self.keep_rows[rows] & ~self.singleton[rows]]
+        if not len(rows):
+            return
+
+        # The Risk column of each risk row
+        entries = np.flatnonzero(is_risk)
+        column = np.full(matrix.num_rows, -1, dtype=np.int64)
+        column[self._entry_rows[entries]] = A.indices[entries]
+        column = column[rows]
+
+        lower, upper = self._activity(~is_risk)
+        minimum = matrix.row_lower[rows] - upper[rows]
+        maximum = matrix.row_lower[rows] - lower[rows]
+
+        # Best row per column, largest minimum then largest maximum
+        order = np.lexsort((-maximum, -minimum, column))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = column[order][1:] != column[order][:-1]
+        best = np.full(matrix.num_cols, -1, dtype=np.int64)
+        best[column[order][first]] = order[first]
+
+        dominated = ((best[column] != np.arange(len(rows))) &
+                     (minimum[best[column]] >= maximum - self.tolerance))
+        self.keep_rows[rows[dominated]] = False
+
+    def _branch_limits(self):
+        """ Remove the flow limits of bridges which exceed the total
+        energy which may be injected in the instance
+        """
+        matrix, store = self.matrix, self.matrix.store
+        energy = matrix.columns["Energy_Total"]
+        total = np.bincount(matrix.col_instance[energy],
+                            self.col_upper[energy], minlength=len(store))
+
+        bridge = bridges(store)
+        for family, sign in (('Pos_flow', 1), ('Neg_flow', -1)):
+            groups, instance, (branch,) = matrix.row_keys[family]
+            s = matrix.families[family]
+            bound = np.where(sign > 0, matrix.row_upper[s],
+                             matrix.row_lower[s]) * sign
+            remove = bridge[branch] & (bound >= total[instance])
+            self.keep_rows[np.arange(s.start, s.stop)[remove]] = False
+
+    def _reduce(self):
+        """ Create the reduced problem from the rows and columns kept """
+        matrix = self.matrix
+        self.keep_cols = ~self.fixed
+        rows, cols = self.keep_rows, self.keep_cols
+
+        # Move the fixed columns on to the row bounds
+        offset = self.A.dot(np.where(self.fixed, self.values, 0))
+
+        self.reduced = LPBlock(matrix.cost[cols], self.A[rows][:, cols],
+                               (matrix.row_lower - offset)[rows],
+                               (matrix.row_upper - offset)[rows],
+                               matrix.col_lower[cols], matrix.col_upper[cols])
+        self.row_instance = matrix.row_instance[rows]
+        self.col_instance = matrix.col_instance[cols]
+
+
+def bridges(store):
+    """ Whether each branch is a bridge of the network, i.e. the only
+    path between its sending and receiving nodes
+
+    Parameters
+    ----------
+    store: ParameterStore
+        The topology of the network
+
+    """
+    sending, receiving = store.branch_sending, store.branch_receiving
+    num_nodes = len(store.names['nodes'])
+
+    def root(parent, node):
+        while parent[node] != node:
+            node = parent[node]
+        return node
+
+    result = np.zeros(len(sending), dtype=bool)
+    for t in range(len(sending)):
+        parent = list(range(num_nodes))
+        for other in range(len(sending)):
+            if other != t:
+                a = root(parent, sending[other])
+                b = root(parent, receiving[other])
+                parent[a] = b
+        result[t] = (root(parent, sending[t]) !=
+                     root(parent, receiving[t]))
+    return result
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,333 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Per phase timing, problem size and memory instrumentation of building,
+solving and parsing a model.
+
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# C Libraries
+import numpy as np
+import pandas as pd
+
+from .registry import hooks
+
+
+class Profiler(object):
+    """Profiler
+
+    Records every phase of a model as it runs: each _add_dispatch
+    instance, each constraint family of create_lp, the solve and each
+    result family and frame parsed by Analytics. For each phase the wall
+    time, the rows and columns it added to the Linear Program and the
+    change in the memory allocated are recorded.
+
+    Phases are only recorded when a Profiler is given to the model.
+    Without a Profiler or any registered hooks a model pays for a
+    single comparison per phase.
+
+    Usage:
+    ------
+    SPD = SPDModel(SystemOperator, profile=Profiler(memory=True))
+    SPD.full_run()
+    Analytics(SPD).final_price_df
+    SPD.profiler.report()
+    SPD.profiler.trace("spd.trace.json")
+
+    Parameters
+    ----------
+    memory: bool, default False
+        Trace the memory allocated by each phase with tracemalloc, which
+        slows every phase down. Ignored where tracemalloc is unavailable.
+
+    """
+
+    columns = ("name", "category", "start", "duration", "rows", "columns",
+               "allocated", "depth", "args")
+
+    def __init__(self, memory=False):
+        super(Profiler, self).__init__()
+        self.memory = bool(memory) and tracemalloc is not None
+        self.events = []
+        self._origin = time.time()
+        self._depth = 0
+        self._tracing = False
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracing = True
+
+    def phase(self, name, category, size=None, **args):
+        """ Context manager recording a single phase
+
+        Parameters
+        ----------
+        name: str
+            The name of the phase, e.g. "_nodal_demand"
+        category: str
+            The stage the phase belongs to, e.g. "create_lp"
+        size: callable, default None
+            Returns the (rows, columns) of the problem, evaluated before
+            and after the phase
+        args:
+            Further values recorded with the phase, e.g. the instance
+
+        """
+        return _Phase(self, None, name, category, size, args)
+
+    def close(self):
+        """ Stop tracing memory if the Profiler started it """
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+        return self
+
+    def clear(self):
+        """ Discard every recorded phase """
+        self.events = []
+        return self
+
+    def frame(self):
+        """ DataFrame of every recorded phase in the order they began,
+        times in seconds and memory in bytes
+        """
+        events = sorted(self.events, key=lambda e: e['start'])
+        return pd.DataFrame(events, columns=list(self.columns))
+
+    def report(self):
+        """ Structured report of the phases
+
+        Returns
+        -------
+        report: DataFrame
+            Indexed by (category, name) with the count, total and
+            largest duration, rows, columns and memory allocated of the
+            phases of each name, in the order they first ran
+
+        """
+        events = self.frame()
+        if events.empty:
+            return pd.DataFrame(columns=['count', 'time', 'max_time', 'rows',
+                                         'columns', 'allocated'])
+        grouped = events.groupby(['category', 'name'], sort=False)
+        return pd.DataFrame({
+            'count': grouped['duration'].count(),
+            'time': grouped['duration'].sum(),
+            'max_time': grouped['duration'].max(),
+            'rows': grouped['rows'].agg(_total),
+            'columns': grouped['columns'].agg(_total),
+            'allocated': grouped['allocated'].agg(_total)},
+            columns=['count', 'time', 'max_time', 'rows', 'columns',
+                     'allocated'])
+
+    def totals(self):
+        """ Total duration of the outermost phases of each category """
+        totals = OrderedDict()
+        for event in sorted(self.events, key=lambda e: e['start']):
+            if event['depth'] == 0:
+                totals[event['category']] = (
+                    totals.get(event['category'], 0) + event['duration'])
+        return totals
+
+    def trace(self, path=None):
+        """ The phases in the Chrome trace event format, which may be
+        opened by chrome://tracing or Perfetto
+
+        Parameters
+        ----------
+        path: str, default None
+            File to write the trace to
+
+        Returns
+        -------
+        trace: dict
+
+        """
+        pid = os.getpid()
+        events = []
+        for event in sorted(self.events, key=lambda e: e['start']):
+            args = OrderedDict(event['args'])
+            for key in ('rows', 'columns', 'allocated'):
+                if event[key] is not None:
+                    args[key] = event[key]
+            events.append(OrderedDict([
+                ('name', event['name']),
+                ('cat', event['category']),
+                ('ph', 'X'),
+                ('ts', event['start'] * 1e6),
+                ('dur', event['duration'] * 1e6),
+                ('pid', pid),
+                ('tid', 0),
+                ('args', args)]))
+        trace = OrderedDict([('traceEvents', events),
+                             ('displayTimeUnit', 'ms')])
+        if path is not None:
+            with open(path, 'w') as f:
+                json.dump(trace, f, default=_plain)
+        return trace
+
+    def _allocated(self):
+        if self.memory and tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[0]
+        return None
+
+
+def tracer(profiler=None, owner=None):
+    """ Tracer recording the phases of an object to its Profiler and
+    firing the registered hooks
+
+    Parameters
+    ----------
+    profiler: Profiler, default None
+        Records the phases
+    owner: object, default None
+        The object running the phases, passed to the hooks
+
+    Returns
+    -------
+    tracer: Tracer
+        Or None when there is neither a Profiler nor any hook, in which
+        case the phases should be run directly
+
+    """
+    if profiler is None and not hooks.active:
+        return None
+    return Tracer(profiler, owner)
+
+
+class Tracer(object):
+    """ Creates the phases of an object, see tracer """
+
+    def __init__(self, profiler=None, owner=None):
+        super(Tracer, self).__init__()
+        self.profiler = profiler
+        self.owner = owner
+
+    def phase(self, name, category, size=None, **args):
+        """ Context manager recording a single phase, see
+        Profiler.phase
+        """
+        return _Phase(self.profiler, self.owner, name, category, size, args)
+
+
+class _Phase(object):
+    """ A single phase being recorded by a Profiler and the hooks """
+
+    def __init__(self, profiler, owner, name, category, size, args):
+        self.profiler = profiler
+        self.owner = owner
+        self.name = name
+        self.category = category
+        self.size = size
+        self.args = args
+
+    def __enter__(self):
+        profiler = self.profiler
+        self.before = self.size() if self.size is not None else None
+        if hooks.active:
+            self.context = dict(self.args, name=self.name,
+                                category=self.category, owner=self.owner,
+                                size=self.before)
+            hooks.fire('before', self.context)
+
+        if profiler is not None:
+            self.depth = profiler._depth
+            profiler._depth += 1
+            self.allocated = profiler._allocated()
+        self.begin = time.time()
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        end = time.time()
+        profiler = self.profiler
+
+        allocated = None
+        if profiler is not None:
+            profiler._depth -= 1
+            allocated = profiler._allocated()
+            if allocated is not None and self.allocated is not None:
+                allocated -= self.allocated
+
+        rows = columns = after = None
+        if self.before is not None:
+            after = self.size()
+            rows, columns = (after[0] - self.before[0],
+                             after[1] - self.before[1])
+
+        if profiler is not None:
+            profiler.events.append({
+                'name': self.name,
+                'category': self.category,
+                'start': self.begin - profiler._origin,
+                'duration': end - self.begin,
+                'rows': rows,
+                'columns': columns,
+                'allocated': allocated,
+                'depth': self.depth,
+                'args': self.args})
+
+        if hooks.active:
+            context = getattr(self, 'context', None)
+            if context is None:
+                context = dict(self.args, name=self.name,
+                               category=self.category, owner=self.owner)
+            context.update(size=after, elapsed=end - self.begin, rows=rows,
+                           columns=columns, error=value)
+            hooks.fire('after', context)
+        return False
+
+
+def run_steps(owner, steps, category, trace=None, size=None):
+    """ Call each of the named methods of an object in turn, recording
+    each as a phase when a Tracer is given. The first step creates the
+    problem, so its size is not recorded.
+
+    Parameters
+    ----------
+    owner: object
+        The object whose methods are called
+    steps: tuple
+        The names of the methods, in order
+    category: str
+        The category of the phases
+    trace: Tracer, default None
+        Records the phases
+    size: callable, default None
+        Returns the (rows, columns) of the problem
+
+    """
+    if trace is None:
+        for step in steps:
+            getattr(owner, step)()
+        return owner
+
+    for k, step in enumerate(steps):
+        with trace.phase(step, category, size if k else None):
+            getattr(owner, step)()
+    return owner
+
+
+def _total(values):
+    """ Sum of the recorded values, NaN when none were recorded """
+    values = values.dropna()
+    return values.sum() if len(values) else np.nan
+
+
+def _plain(value):
+    """ JSON compatible form of numpy values """
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+if __name__ == '__main__':
+    pass
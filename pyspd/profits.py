@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+System wide calculation of the revenue, costs and profits of every unit
+and company.
+
+"""
+
+from collections import OrderedDict
+
+# C Libraries
+import numpy as np
+import pandas as pd
+
+from .costs import evaluate_costs
+
+
+class ProfitEngine(object):
+    """ProfitEngine
+
+    Calculates the revenue, cost and profit of every Station,
+    Interruptible Load and Company for every instance in one pass.
+    Each quantity is a dense instance by unit array, with the units being
+    the stations followed by the interruptible loads. Company totals are
+    a single product with the company membership matrix of the units.
+
+    Usage:
+    ------
+    profits = ProfitEngine(Analytics)
+    profits.company_frame("Meridian")
+
+    Parameters
+    ----------
+    Analysis: Analytics
+        The results of the solved model
+
+    """
+
+    quantities = ("Energy Revenue", "Reserve Revenue", "Total Revenue",
+                  "Energy Cost", "Reserve Cost", "Total Cost",
+                  "Energy Profit", "Reserve Profit", "Total Profit")
+
+    company_quantities = ("Total Revenue", "Total Cost", "Total Profit")
+
+    def __init__(self, Analysis):
+        super(ProfitEngine, self).__init__()
+        self.Analysis = Analysis
+        self.store = Analysis.store
+        self.units = self.store.names['reserve_providers']
+        self.companies = self.store.names['companies']
+
+        self._membership()
+        self.calculate()
+
+    def calculate(self):
+        """ Calculate every quantity of every unit and company """
+        store = self.store
+        stations = len(store.names['stations'])
+        shape = (len(store), len(self.units))
+
+        provider_zone = np.concatenate([store.station_zone, store.load_zone])
+
+        energy_dispatch = np.zeros(shape)
+        energy_dispatch[:, :stations] = self.Analysis.family("Energy_Total")
+        energy_price = np.zeros(shape)
+        energy_price[:, :stations] = self.Analysis.family(
+            "Energy_Price")[:, store.station_node]
+
+        reserve_dispatch = self.Analysis.family("Reserve_Total")
+        reserve_price = self.Analysis.family("Reserve_Price")[:, provider_zone]
+
+        actors = store.actors['stations'] + store.actors['interruptible_loads']
+
+        values = OrderedDict()
+        values["Energy Revenue"] = energy_dispatch * energy_price
+        values["Reserve Revenue"] = reserve_dispatch * reserve_price
+        values["Total Revenue"] = (values["Energy Revenue"] +
+                                   values["Reserve Revenue"])
+
+        values["Energy Cost"] = np.zeros(shape)
+        values["Energy Cost"][:, :stations] = evaluate_costs(
+            [a.energy_cost_func for a in store.actors['stations']],
+            energy_dispatch[:, :stations])
+        values["Reserve Cost"] = evaluate_costs(
+            [a.reserve_cost_func for a in actors], reserve_dispatch)
+        values["Total Cost"] = values["Energy Cost"] + values["Reserve Cost"]
+
+        values["Energy Profit"] = (values["Energy Revenue"] -
+                                   values["Energy Cost"])
+        values["Reserve Profit"] = (values["Reserve Revenue"] -
+                                    values["Reserve Cost"])
+        values["Total Profit"] = values["Total Revenue"] - values["Total Cost"]
+
+        self.unit_values = values
+        self.company_values = OrderedDict(
+            (quantity, values[quantity].dot(self.membership))
+            for quantity in self.company_quantities)
+
+    def unit_frame(self, quantities=None):
+        """ DataFrame of the units indexed by instance, with (unit,
+        quantity) MultiIndex columns
+
+        Parameters
+        ----------
+        quantities: list, default None
+            Quantities to include, defaults to every quantity
+
+        """
+        return self._frame(self.unit_values, self.units,
+                           quantities or self.quantities)
+
+    def company_totals(self, quantities=None):
+        """ DataFrame of the company totals indexed by instance, with
+        (company, quantity) MultiIndex columns
+
+        Parameters
+        ----------
+        quantities: list, default None
+            Quantities to include, defaults to the total revenue, cost
+            and profit
+
+        """
+        return self._frame(self.company_values, self.companies,
+                           quantities or self.company_quantities)
+
+    def company_frame(self, name):
+        """ DataFrame of a single company containing the quantities of
+        each of its units followed by the company totals
+
+        Parameters
+        ----------
+        name: str
+            Name of the Company
+
+        """
+        c = self.companies.index(name)
+        members = np.flatnonzero(self.membership[:, c])
+        units = self.unit_frame()
+        units = units.loc[:, [self.units[u] for u in members]]
+        totals = self.company_totals().loc[:, [name]]
+        return pd.concat([units, totals], axis=1)
+
+    def apply(self):
+        """ Set the unit and company revenue, cost and profit attributes
+        of each Company as calculated by Company.calculate_profit
+        """
+        for c, company in enumerate(self.store.actors['companies']):
+            members = np.flatnonzero(self.membership[:, c])
+            for attr, quantity in (("revenue", "Total Revenue"),
+                                   ("cost", "Total Cost"),
+                                   ("profit", "Total Profit")):
+                columns = [' '.join([self.units[u], quantity])
+                           for u in members]
+                frame = pd.DataFrame(self.unit_values[quantity][:, members],
+                                     index=self.store.index, columns=columns)
+                total = pd.Series(self.company_values[quantity][:, c],
+                                  index=self.store.index)
+                setattr(company, 'unit_' + attr, frame)
+                setattr(company, 'company_profits' if attr == 'profit'
+                        else 'company_' + attr, total)
+
+    def _membership(self):
+        """ Unit by company indicator matrix """
+        owner = np.concatenate([self.store.station_company,
+                                self.store.load_company])
+        self.membership = np.zeros((len(self.units), len(self.companies)))
+        self.membership[np.arange(len(self.units)), owner] = 1
+
+    def _frame(self, values, actors, quantities):
+        """ Assemble a MultiIndex DataFrame from instance by actor arrays """
+        columns = pd.MultiIndex.from_tuples(
+            [(actor, quantity) for actor in actors for quantity in quantities],
+            names=['actor', 'quantity'])
+        data = np.stack([values[q] for q in quantities], axis=-1)
+        return pd.DataFrame(data.reshape(len(self.store), -1),
+                            index=self.store.index, columns=columns)
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Registry of callbacks fired before and after each phase of building,
+solving and parsing a model.
+
+"""
+
+
+class HookRegistry(object):
+    """HookRegistry
+
+    Callbacks registered here are called before and after every phase
+    of every model: each SystemOperator._add_dispatch instance, each
+    constraint family step of SPDModel.create_lp and LPMatrix.build,
+    presolve, solve_lp and each result family and frame parsed by
+    Analytics. They allow metrics to be collected without changing the
+    library.
+
+    Each callback receives a single dict describing the phase:
+
+    name: str
+        The phase, e.g. "_add_dispatch" or "_nodal_demand"
+    category: str
+        "parameters", "create_lp", "create_matrix", "solve" or "analytics"
+    owner: object
+        The SystemOperator, SPDModel, LPMatrix or Analytics running it
+    size: tuple
+        The (rows, columns) of the problem, where known
+    args
+        Further values of the phase, e.g. instance or family
+
+    and after the phase also:
+
+    elapsed: float
+        Wall time of the phase in seconds
+    rows, columns: int
+        The rows and columns added by the phase, where known
+    error: Exception
+        The exception raised by the phase, or None
+
+    While nothing is registered the phases only check the active flag.
+
+    Usage:
+    ------
+    def collect(context):
+        metrics.timing(context["name"], context["elapsed"])
+
+    hooks.register(collect, category="create_lp")
+    ...
+    hooks.unregister(collect)
+
+    """
+
+    whens = ("before", "after")
+
+    def __init__(self):
+        super(HookRegistry, self).__init__()
+        self.clear()
+
+    def register(self, callback, when="after", category=None):
+        """ Register a callback
+
+        Parameters
+        ----------
+        callback: callable
+            Called with the dict describing the phase
+        when: str, "before" or "after", default "after"
+            Whether to call it before or after each phase
+        category: str, default None
+            Only call it for the phases of this category, defaults to
+            every phase
+
+        Returns
+        -------
+        callback: callable
+            The callback registered
+
+        """
+        if when not in self.whens:
+            raise ValueError("Unknown hook %s, expected one of %s" %
+                             (when, ', '.join(self.whens)))
+        self._callbacks[when].append((category, callback))
+        self.active = True
+        return callback
+
+    def unregister(self, callback):
+        """ Remove every registration of a callback """
+        for when in self.whens:
+            self._callbacks[when] = [(c, f) for c, f in self._callbacks[when]
+                                     if f is not callback]
+        self.active = any(self._callbacks.values())
+        return self
+
+    def clear(self):
+        """ Remove every callback """
+        self._callbacks = dict((when, []) for when in self.whens)
+        self.active = False
+        return self
+
+    def fire(self, when, context):
+        """ Call the callbacks registered for the phase """
+        category = context['category']
+        for selected, callback in self._callbacks[when]:
+            if selected is None or selected == category:
+                callback(context)
+
+
+# The registry every model fires
+hooks = HookRegistry()
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Streaming runner solving a sweep of scenarios one chunk at a time,
+optionally checkpointing each chunk so an interrupted sweep may resume.
+
+"""
+
+import copy
+import time
+from collections import OrderedDict
+
+from .model import SPDModel
+from .analysis import Analytics
+from .cache import fingerprint_instances
+from .storage import ResultWriter, ResultSet, instance_status
+
+
+class SweepChunk(object):
+    """SweepChunk
+
+    The results of one chunk of a sweep. Only the requested frames are
+    kept, the model and its Linear Program having been released.
+
+    Attributes
+    ----------
+    number: int
+        Position of the chunk within the sweep
+    start, stop: int
+        Positions of the first scenario and after the last scenario of
+        the chunk within the sweep. When resuming from a checkpoint the
+        scenarios already completed are absent from the chunk.
+    instances: list
+        Unique name of each scenario
+    frames: OrderedDict
+        DataFrame of each requested Analytics frame
+    status: str
+        Solution status of the chunk
+    solution_time: dict
+        Time taken by each phase of the solve
+    instance_status: list
+        Solution status of each scenario
+
+    """
+
+    def __init__(self, number, start, instances, frames, status,
+                 solution_time, stop=None, instance_status=None):
+        super(SweepChunk, self).__init__()
+        self.number = number
+        self.start = start
+        self.stop = start + len(instances) if stop is None else stop
+        self.instances = instances
+        self.frames = frames
+        self.status = status
+        self.solution_time = solution_time
+        if instance_status is None:
+            instance_status = [status] * len(instances)
+        self.instance_status = instance_status
+
+    def __len__(self):
+        return len(self.instances)
+
+    def __getitem__(self, name):
+        return self.frames[name]
+
+
+class SweepRunner(object):
+    """SweepRunner
+
+    Solves a ScenarioGrid or ScenarioTable chunk by chunk, yielding the
+    frames of each chunk as soon as it is solved. The model, its pulp
+    objects and the parameter dictionaries of the System Operator are
+    released before the next chunk is loaded, so memory is bounded by
+    the chunk size rather than the length of the sweep.
+
+    Each chunk may also be written to a sink, any object with an
+    append(Analytics) method such as a ResultWriter.
+
+    With a checkpoint directory every chunk is written there, together
+    with the solution status of each of its scenarios, as soon as it is
+    solved. Running the same sweep against the directory again skips
+    every scenario already recorded and solves only the remainder, so
+    an interrupted sweep resumes where it stopped. With the highs
+    backend a chunk which is not solved to optimality is solved again
+    one scenario at a time, with the same options, so that each scenario
+    records its own status. The pulp backend cannot separate the
+    scenarios of a chunk, which all record the status of the chunk
+    instead. Infeasible scenarios are recorded like any other and are
+    not attempted again on resumption. The results are read back with
+    ResultSet(checkpoint).
+
+    Scenarios are matched to the checkpoint by name, which for a table
+    of scenarios is their position. A fingerprint of the parameters of
+    each scenario is recorded with it, and resuming raises a ValueError
+    when a recorded scenario no longer has the same parameters, e.g.
+    because the table was edited between runs.
+
+    Usage:
+    ------
+    grid = SO.create_grid(axes, chunksize=500)
+    for chunk in SweepRunner(SO, grid, backend="highs"):
+        chunk["final_price_df"]
+
+    Parameters
+    ----------
+    ISO: SystemOperator
+        The System Operator containing the actors
+    scenarios: ScenarioGrid, ScenarioTable
+        The sweep to solve
+    chunksize: int, default None
+        Number of scenarios solved at once, defaults to the chunk size
+        of the scenarios
+    backend: str, default "pulp"
+        Backend of the SPDModel solving each chunk
+    frames: tuple, default ("final_price_df", "final_dispatch_df")
+        The Analytics frames to keep for each chunk
+    sink: object, default None
+        Written to with the Analytics of each chunk
+    checkpoint: str or ResultWriter, default None
+        Directory recording the completed scenarios, resuming from any
+        scenarios it already holds
+    options:
+        Further keyword arguments of the SPDModel, e.g. processes
+
+    """
+
+    # Attributes of the model holding pulp objects or the matrix
+    released = ('lp', 'lp_index', 'addC', 'energy_offers', 'reserve_offers',
+                'branch_flow', 'nodal_injection', 'reserve_zone_risk',
+                'matrix', 'presolved')
+
+    def __init__(self, ISO, scenarios, chunksize=None, backend="pulp",
+                 frames=("final_price_df", "final_dispatch_df"), sink=None,
+                 checkpoint=None, **options):
+        super(SweepRunner, self).__init__()
+        self.ISO = ISO
+        if chunksize is not None:
+            # Chunk a copy, leaving the sweep given unchanged
+            scenarios = copy.copy(scenarios)
+            scenarios.chunksize = chunksize
+        self.scenarios = scenarios
+        self.backend = backend
+        self.frames = tuple(frames)
+        self.sink = sink
+        self.checkpoint = checkpoint
+        self.options = options
+        self.completed = {}
+        self.fingerprints = {}
+
+    def __iter__(self):
+        return self.run()
+
+    def run(self):
+        """ Generate the SweepChunk of each chunk of the sweep in turn,
+        skipping the scenarios already held by the checkpoint
+        """
+        writer = self.checkpoint
+        if writer is not None:
+            if not isinstance(writer, ResultWriter):
+                writer = ResultWriter(writer)
+            self.completed, self.fingerprints = self.recorded(
+                writer.directory)
+
+        stop = 0
+        for number, scenarios in enumerate(self.scenarios):
+            start, stop = stop, stop + len(scenarios)
+            self.ISO.load_scenarios(scenarios)
+            if self.completed:
+                remaining = self._remaining(scenarios)
+                if not remaining:
+                    continue
+                if len(remaining) < len(scenarios):
+                    scenarios = scenarios.take(remaining)
+                    self.ISO.load_scenarios(scenarios)
+
+            yield self.solve_chunk(number, start, scenarios, stop=stop,
+                                   writer=writer)
+
+    def recorded(self, directory):
+        """ Scenarios held by a checkpoint directory
+
+        Returns
+        -------
+        completed: dict
+            Solution status of every scenario, keyed by scenario name
+        fingerprints: dict
+            Fingerprint of the parameters of every scenario, keyed by
+            scenario name
+
+        """
+        try:
+            results = ResultSet(directory)
+        except (IOError, OSError):
+            return {}, {}
+        return (results.completed,
+                dict(zip(results.instances, results.fingerprints)))
+
+    def _remaining(self, scenarios):
+        """ Positions of the loaded scenarios not yet held by the
+        checkpoint, checking that those held have not changed
+        """
+        current = fingerprint_instances(self.ISO.parameters)
+        remaining = []
+        for i, name in enumerate(scenarios.instances):
+            if name not in self.completed:
+                remaining.append(i)
+                continue
+            recorded = self.fingerprints.get(name)
+            if recorded is not None and recorded != current[i]:
+                raise ValueError(
+                    "Scenario %s has changed since it was recorded in the "
+                    "checkpoint, write to a new directory instead of "
+                    "resuming" % name)
+        return remaining
+
+    def solve_chunk(self, number, start, scenarios, stop=None, writer=None):
+        """ Solve the scenarios currently loaded in the System Operator,
+        write them to the sink and the checkpoint and release the model
+
+        Returns
+        -------
+        chunk: SweepChunk
+
+        """
+        begin = time.time()
+        model = SPDModel(self.ISO, backend=self.backend, **self.options)
+        model.full_run()
+        if writer is not None and model.status != "Optimal":
+            model = self._isolate(model)
+        analysis = Analytics(model)
+        status = instance_status(model, analysis.store)
+
+        frames = OrderedDict((name, getattr(analysis, name))
+                             for name in self.frames)
+        if self.sink is not None:
+            self.sink.append(analysis)
+        if writer is not None:
+            writer.append(analysis, status)
+            self.completed.update(zip(analysis.store.instances, status))
+
+        solution_time = dict(model.solution_time)
+        solution_time['total'] = time.time() - begin
+        chunk = SweepChunk(number, start, list(self.ISO.itinstances),
+                           frames, model.status, solution_time, stop=stop,
+                           instance_status=status)
+
+        self._release(model, analysis)
+        return chunk
+
+    def _isolate(self, model):
+        """ Solve each scenario of a failed chunk separately, so that the
+        optimal scenarios keep their results and each failure has its
+        own status. Only a decomposed highs solve separates the
+        scenarios, so the model is returned unchanged by the pulp backend.
+        """
+        if (getattr(model, 'instance_status', None) or
+                self.backend != "highs"):
+            return model
+
+        self._release(model, None)
+        options = dict(self.options, processes=1)
+        model = SPDModel(self.ISO, backend=self.backend, **options)
+        model.full_run()
+        return model
+
+    def _release(self, model, analysis):
+        """ Drop every reference to the model, its Linear Program and
+        the parameter dictionaries built for it
+        """
+        ISO = self.ISO
+        if getattr(ISO, 'SPD', None) is model:
+            ISO.SPD = None
+        if analysis is not None and getattr(ISO, 'Analysis', None) is analysis:
+            ISO.Analysis = None
+        ISO._create_empty_parameters()
+        ISO._parameter_dicts = False
+
+        if analysis is not None:
+            analysis.invalidate()
+            analysis.lp = None
+        for name in self.released:
+            model.__dict__.pop(name, None)
+        model._highs = None
+
+if __name__ == '__main__':
+    pass
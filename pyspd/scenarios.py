@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Lazily generated multi-dimensional scenario grids.
+
+A grid is described by its axes and only materialises the parameter
+values of a bounded chunk of scenarios at a time, so very large sweeps
+may be streamed through the model. A DataFrame of scenarios may also be
+mapped directly on to the actor parameters.
+
+"""
+
+from itertools import islice
+
+# C Libraries
+import numpy as np
+import pandas as pd
+
+from .parameters import ParameterStore
+
+
+class Scenarios(object):
+    """Scenarios
+
+    A materialised chunk of scenarios, the value of each (actor, variable)
+    column in every scenario.
+
+    Parameters
+    ----------
+    columns: list
+        The (actor, variable) pairs which are varied
+    values: list
+        An array of the values of each column, one entry per scenario
+    index: pandas.Index, default None
+        Label of each scenario, defaults to the values of the columns
+    instances: list, default None
+        Unique name of each scenario, defaults to the column values
+
+    """
+
+    def __init__(self, columns, values, index=None, instances=None):
+        super(Scenarios, self).__init__()
+        self.columns = list(columns)
+        self.values = [np.asarray(v) for v in values]
+        self._index = index
+        self._instances = instances
+
+    def __len__(self):
+        return len(self.values[0]) if self.values else 0
+
+    def take(self, positions):
+        """ Create the Scenarios containing a subset of the scenarios
+
+        Parameters
+        ----------
+        positions: array
+            Integer positions of the scenarios to keep
+
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        index = None if self._index is None else self._index[positions]
+        instances = None
+        if self._instances is not None:
+            instances = [self._instances[i] for i in positions]
+        return Scenarios(self.columns, [v[positions] for v in self.values],
+                         index=index, instances=instances)
+
+    @property
+    def overrides(self):
+        """ Mapping of (actor, variable) to the value in each scenario,
+        as used by the ParameterStore
+        """
+        return dict(zip(self.columns, self.values))
+
+    @property
+    def index(self):
+        """ Index of the scenarios by the value of each column """
+        if self._index is not None:
+            return self._index
+        names = [column_label(actor, variable)
+                 for actor, variable in self.columns]
+        if len(self.columns) == 1:
+            return pd.Index(self.values[0], name=names[0])
+        return pd.MultiIndex.from_arrays(self.values, names=names)
+
+    @property
+    def instances(self):
+        """ Unique name of each scenario """
+        if self._instances is not None:
+            return self._instances
+        prefixes = ['_'.join([actor.name, variable])
+                    for actor, variable in self.columns]
+        return ['_'.join('_'.join([prefix, str(value)])
+                         for prefix, value in zip(prefixes, row))
+                for row in zip(*self.values)]
+
+
+class ScenarioGrid(object):
+    """ScenarioGrid
+
+    The Cartesian product of several (actor, variable, values) axes.
+    The scenarios are generated in chunks as they are iterated over
+    and the actors are never modified.
+
+    Usage:
+    ------
+    grid = ScenarioGrid([(manapouri, 'energy_price', np.arange(0, 100)),
+                         (haywards, 'demand', np.arange(100, 200))])
+    for scenarios in grid:
+        SO.load_scenarios(scenarios)
+
+    Parameters
+    ----------
+    axes: list
+        The (actor, variable, values) of each axis
+    chunksize: int, default 1000
+        The maximum number of scenarios in each chunk
+
+    """
+
+    def __init__(self, axes, chunksize=1000):
+        super(ScenarioGrid, self).__init__()
+        self.columns = [(actor, variable) for actor, variable, v in axes]
+        self.axes = [np.asarray(list(values)) for a, v, values in axes]
+        self.shape = tuple(len(values) for values in self.axes)
+        self.chunksize = chunksize
+
+    def __len__(self):
+        return int(np.prod(self.shape, dtype=np.int64))
+
+    def __iter__(self):
+        return self.chunks()
+
+    def chunks(self):
+        """ Generate the scenarios one chunk at a time """
+        for start in range(0, len(self), self.chunksize):
+            yield self.chunk(start, min(start + self.chunksize, len(self)))
+
+    def chunk(self, start, stop):
+        """ Materialise the scenarios at positions start to stop of the
+        product, the last axis varying fastest
+
+        Parameters
+        ----------
+        start: int
+            Position of the first scenario
+        stop: int
+            Position after the last scenario
+
+        """
+        positions = np.unravel_index(np.arange(start, stop), self.shape)
+        return Scenarios(self.columns, [values[p] for values, p in
+                                        zip(self.axes, positions)])
+
+
+class ScenarioTable(object):
+    """ScenarioTable
+
+    A user supplied table of scenarios, the rows of which are consumed
+    lazily in chunks.
+
+    Usage:
+    ------
+    table = ScenarioTable([(manapouri, 'energy_price'),
+                           (haywards, 'demand')],
+                          ((p, d) for p, d in read_scenarios()))
+
+    Parameters
+    ----------
+    columns: list
+        The (actor, variable) pairs which are varied
+    rows: iterable
+        The values of the columns in each scenario, may be a generator
+    chunksize: int, default 1000
+        The maximum number of scenarios in each chunk
+
+    """
+
+    def __init__(self, columns, rows, chunksize=1000):
+        super(ScenarioTable, self).__init__()
+        self.columns = list(columns)
+        self.rows = rows
+        self.chunksize = chunksize
+
+    def __iter__(self):
+        return self.chunks()
+
+    def chunks(self):
+        """ Generate the scenarios one chunk at a time """
+        rows = iter(self.rows)
+        while True:
+            block = list(islice(rows, self.chunksize))
+            if not block:
+                break
+            yield Scenarios(self.columns, [np.array(c) for c in zip(*block)])
+
+
+def table_scenarios(SO, table, start=0):
+    """ Map a DataFrame of scenarios on to the parameters of the actors
+    of a System Operator. Each column is resolved to its actor once and
+    missing values take the current value of the parameter.
+
+    Parameters
+    ----------
+    SO: SystemOperator
+        The System Operator containing the actors
+    table: DataFrame
+        One row per scenario with (actor name, variable) columns, e.g.
+        ("Haywards", "demand"). The index labels the results.
+    start: int, default 0
+        Number of the first scenario, used to name the scenarios of a
+        table read in several pieces
+
+    Returns
+    -------
+    scenarios: Scenarios
+
+    """
+    groups = ParameterStore.parameters
+    actors = dict(((actor.name, variable), actor)
+                  for group, variables in groups.items()
+                  for actor in getattr(SO, group)
+                  for variable in variables)
+
+    columns, values = [], []
+    for column in table.columns:
+        try:
+            name, variable = column
+            actor = actors[(name, variable)]
+        except (KeyError, ValueError, TypeError):
+            raise ValueError("Cannot map column %s on to an actor "
+                             "parameter" % (column,))
+        data = table[column].values
+        columns.append((actor, variable))
+        values.append(np.where(pd.isnull(data), getattr(actor, variable),
+                               data).astype(float))
+
+    instances = ['_'.join(['Scenario', str(start + k)])
+                 for k in range(len(table))]
+    return Scenarios(columns, values, index=table.index, instances=instances)
+
+
+def column_label(actor, variable):
+    """ Label of a varied column, e.g. "Manapouri Energy Price" """
+    return ' '.join([actor.name, variable.replace('_', ' ').title()])
+
+if __name__ == '__main__':
+    pass
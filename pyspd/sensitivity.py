@@ -0,0 +1,225 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Sensitivity of the prices and dispatch to the offers, demand and branch
+capacities, read from the duals and ranging of a single solve.
+
+"""
+
+from collections import OrderedDict
+
+# C Libraries
+import numpy as np
+import pandas as pd
+
+from .matrix import LPMatrix
+
+
+class Sensitivity(object):
+    """Sensitivity
+
+    For every station and interruptible load offer, node demand and
+    branch capacity in every instance reports the current value, the
+    range over which the optimal basis remains the same, the marginal
+    change of the objective with the parameter and the slack of the
+    corresponding constraint.
+
+    Within the range of a price parameter the dispatch and the prices
+    are unchanged. Within the range of a quantity parameter the prices
+    are unchanged and the dispatch moves linearly with the parameter.
+    Each range holds with every other parameter fixed.
+
+    The marginal of a price parameter is the reduced cost of the
+    dispatch, the marginal of a quantity parameter is the dual of its
+    constraint, so the marginal of the demand at a node is the energy
+    price there.
+
+    Ranging is read from the live HiGHS model, which requires highspy
+    and a single solve, see SPDModel.ranging. Without ranging only the
+    values, marginals and slacks are reported, the ranges being NaN.
+
+    Usage:
+    ------
+    sensitivity = Sensitivity(Analytics)
+    sensitivity.frame("demand")
+
+    Parameters
+    ----------
+    Analysis: Analytics
+        The results of a model solved with the highs backend
+    ranging: bool, default True
+        Report the ranges, raising a ValueError when they are not
+        available
+
+    """
+
+    # The sensitivity columns, in order
+    quantities = ("value", "lower", "upper", "marginal", "slack")
+
+    # Parameters reported, by the actor group they belong to
+    parameters = OrderedDict([
+        ('energy_price', 'stations'),
+        ('energy_offer', 'stations'),
+        ('reserve_price', 'reserve_providers'),
+        ('reserve_offer', 'reserve_providers'),
+        ('demand', 'nodes'),
+        ('capacity', 'branches')])
+
+    # Slack below which a constraint is binding
+    tolerance = 1e-6
+
+    def __init__(self, Analysis, ranging=True):
+        super(Sensitivity, self).__init__()
+        SPD = Analysis.SPD
+        if getattr(SPD, 'backend', None) != "highs":
+            raise ValueError("Sensitivity requires a model solved with the "
+                             "highs backend")
+
+        self.Analysis = Analysis
+        self.SPD = SPD
+        self.matrix = SPD.matrix
+        self.store = Analysis.store
+        self.ranged = ranging
+        self.calculate()
+
+    def calculate(self):
+        """ Read the reduced costs, slacks and ranging of every
+        parameter
+
+        Returns
+        -------
+        self.values: OrderedDict
+            For each parameter an OrderedDict of the instance by actor
+            array of each quantity
+
+        """
+        matrix, SPD = self.matrix, self.SPD
+        self.reduced_cost = matrix.cost - matrix.A.T.dot(SPD.dual)
+        self.activity = matrix.A.dot(SPD.primal)
+        self.slack = np.minimum(matrix.row_upper - self.activity,
+                                self.activity - matrix.row_lower)
+
+        self.ranging = SPD.ranging() if self.ranged else None
+
+        eps = LPMatrix.eps
+        self.values = OrderedDict([
+            ('energy_price', self._cost("Energy_Total")),
+            ('energy_offer', self._bound("Total_Energy", 1, -eps)),
+            ('reserve_price', self._cost("Reserve_Total")),
+            ('reserve_offer', self._bound("Total_Reserve", 1, -eps)),
+            ('demand', self._bound("Energy_Price", -1, -eps)),
+            ('capacity', self._capacity())])
+        return self
+
+    def frame(self, parameters=None):
+        """ DataFrame indexed by (instance, actor, parameter) with a
+        column for each quantity
+
+        Parameters
+        ----------
+        parameters: list, default None
+            Parameters to include, e.g. ["demand"], defaults to all
+
+        """
+        if parameters is None:
+            parameters = list(self.parameters)
+        elif isinstance(parameters, str):
+            parameters = [parameters]
+
+        labels, actors, names, data = [], [], [], []
+        for parameter in parameters:
+            group = self.parameters[parameter]
+            count = len(self.store.names[group])
+            labels.extend(label for label in self.store.index
+                          for a in range(count))
+            actors.extend(self.store.names[group] * len(self.store))
+            names.extend([parameter] * (count * len(self.store)))
+            data.append(np.column_stack(
+                [self.values[parameter][q].ravel() for q in self.quantities]))
+
+        index = pd.MultiIndex.from_arrays(
+            [labels, actors, names], names=['instance', 'actor', 'parameter'])
+        return pd.DataFrame(np.vstack(data), index=index,
+                            columns=list(self.quantities))
+
+    def _shape(self, group):
+        return (len(self.store), len(self.store.names[group]))
+
+    def _cost(self, block):
+        """ Sensitivity of the offer price of a block of columns """
+        s = self.matrix.columns[block]
+        shape = self._shape(self.matrix.column_keys[block])
+        ranges = None
+        if self.ranged:
+            ranges = (self.ranging['cost_lower'][s],
+                      self.ranging['cost_upper'][s])
+        lower, upper = self._ranges(ranges, shape)
+        return OrderedDict([
+            ('value', self.matrix.cost[s].reshape(shape)),
+            ('lower', lower),
+            ('upper', upper),
+            ('marginal', self.reduced_cost[s].reshape(shape)),
+            ('slack', np.full(shape, np.nan))])
+
+    def _bound(self, family, sign, shift):
+        """ Sensitivity of the parameter setting the bound of a family
+        of rows, the parameter being sign * bound + shift
+
+        A binding row takes the range of its bound from the ranging,
+        a row with slack may move its bound up to the activity.
+
+        """
+        matrix = self.matrix
+        s = matrix.families[family]
+        shape = self._shape(matrix.row_keys[family][0][0])
+
+        lower, upper = matrix.row_lower[s], matrix.row_upper[s]
+        finite_upper = np.isfinite(upper)
+        bound = np.where(finite_upper, upper, lower)
+        activity, slack = self.activity[s], self.slack[s]
+
+        if self.ranged:
+            binding = slack <= self.tolerance
+            bound_lower = np.where(
+                binding, self.ranging['bound_lower'][s],
+                np.where(finite_upper, activity, -np.inf))
+            bound_upper = np.where(
+                binding, self.ranging['bound_upper'][s],
+                np.where(finite_upper, np.inf, activity))
+            ends = (sign * bound_lower + shift, sign * bound_upper + shift)
+            ranges = (np.minimum(*ends), np.maximum(*ends))
+        else:
+            ranges = None
+        lower, upper = self._ranges(ranges, shape)
+
+        return OrderedDict([
+            ('value', (sign * bound + shift).reshape(shape)),
+            ('lower', lower),
+            ('upper', upper),
+            ('marginal', (sign * self.SPD.dual[s]).reshape(shape)),
+            ('slack', slack.reshape(shape))])
+
+    def _capacity(self):
+        """ Sensitivity of the branch capacities, which bound both the
+        positive and negative flow
+        """
+        positive = self._bound("Pos_flow", 1, 0)
+        negative = self._bound("Neg_flow", -1, 0)
+        return OrderedDict([
+            ('value', positive['value']),
+            ('lower', np.fmax(positive['lower'], negative['lower'])),
+            ('upper', np.fmin(positive['upper'], negative['upper'])),
+            ('marginal', positive['marginal'] + negative['marginal']),
+            ('slack', np.minimum(positive['slack'], negative['slack']))])
+
+    def _ranges(self, ranges, shape):
+        """ Reshape the lower and upper ends of the ranges, NaN when
+        ranging is not reported
+        """
+        if ranges is None:
+            return np.full(shape, np.nan), np.full(shape, np.nan)
+        return ranges[0].reshape(shape), ranges[1].reshape(shape)
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,492 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Columnar persistence of results as blocks of .npy arrays described by a
+JSON manifest, reloaded through memory maps.
+
+"""
+
+import datetime
+import json
+import os
+import tempfile
+from collections import OrderedDict
+
+# C Libraries
+import numpy as np
+import pandas as pd
+
+from .cache import fingerprint_instances
+from .model import SPDModel
+from .profits import ProfitEngine
+
+
+class ResultWriter(object):
+    """ResultWriter
+
+    Writes the results of one or more solved models to a directory.
+    Each call to append adds a block of instances containing one .npy
+    array per result family and profit quantity, with instances as the
+    rows and actors as the columns. The solution status and the
+    fingerprint of the parameters of each instance are recorded with the
+    block.
+
+    The manifest is a file of JSON lines, a header describing the
+    actors followed by one line for each block. A block is appended to
+    the manifest once its arrays are written, so adding a block costs
+    the same however many blocks precede it and a directory is always
+    readable by ResultSet even while a sweep is still adding to it. A
+    block left incomplete by an interrupted write is ignored.
+
+    Usage:
+    ------
+    writer = ResultWriter("results")
+    for scenarios in SO.sweep(grid):
+        SPD = SPDModel(SO, backend="highs")
+        SPD.full_run()
+        writer.append(Analytics(SPD))
+
+    Parameters
+    ----------
+    directory: str
+        Directory to write to, created if necessary. The blocks of an
+        existing manifest are kept and appended to, a ValueError being
+        raised if the results appended do not have the same actors,
+        result families and profits.
+    profits: bool, default True
+        Also write the unit and company revenue, cost and profit
+
+    """
+
+    version = 2
+
+    def __init__(self, directory, profits=True):
+        super(ResultWriter, self).__init__()
+        self.directory = directory
+        self.profits = profits
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self.path = os.path.join(directory, ResultSet.manifest_name)
+        self.manifest = None
+        if os.path.exists(self.path):
+            self.manifest, size = read_manifest(self.path)
+            if size < os.path.getsize(self.path):
+                # Discard a block left incomplete by an interrupted write
+                with open(self.path, 'r+b') as f:
+                    f.truncate(size)
+            if self.manifest['profits'] != profits:
+                raise ValueError(
+                    "%s holds results %s profits, they cannot be appended "
+                    "to with profits=%s" % (
+                        directory, 'with' if self.manifest['profits']
+                        else 'without', profits))
+
+    def __len__(self):
+        if self.manifest is None:
+            return 0
+        return sum(b['stop'] - b['start'] for b in self.manifest['blocks'])
+
+    def append(self, Analysis, status=None):
+        """ Write the results of every instance of a solved model as a
+        new block
+
+        Parameters
+        ----------
+        Analysis: Analytics
+            The results to write
+        status: list, default None
+            The solution status of each instance, defaults to the
+            status of each instance of a decomposed solve or else the
+            status of the model
+
+        """
+        store = Analysis.store
+        if self.manifest is None:
+            self.manifest = self._create_manifest(Analysis)
+        else:
+            self._check_header(Analysis)
+
+        number = len(self.manifest['blocks'])
+        arrays = OrderedDict((family, Analysis.family(family))
+                             for family in self.manifest['families'])
+        if self.manifest['profits']:
+            engine = Analysis.profits
+            for quantity in ProfitEngine.quantities:
+                arrays['Unit ' + quantity] = engine.unit_values[quantity]
+            for quantity in ProfitEngine.company_quantities:
+                arrays['Company ' + quantity] = \
+                    engine.company_values[quantity]
+
+        files = OrderedDict()
+        for key, values in arrays.items():
+            name = '%s.%d.npy' % (key.replace(' ', '_').lower(), number)
+            np.save(os.path.join(self.directory, name),
+                    np.ascontiguousarray(values, dtype=float))
+            files[key] = name
+
+        if status is None:
+            status = instance_status(Analysis.SPD, store)
+
+        levels = [_plain(store.index.get_level_values(i))
+                  for i in range(store.index.nlevels)]
+        start = len(self)
+        block = OrderedDict([
+            ('start', start),
+            ('stop', start + len(store)),
+            ('files', files),
+            ('instances', list(store.instances)),
+            ('status', list(status)),
+            ('fingerprints', fingerprint_instances(store)),
+            ('index_kinds', [kind for kind, labels in levels]),
+            ('index', [labels for kind, labels in levels])])
+        self._append_manifest(block)
+        self.manifest['blocks'].append(block)
+        return self
+
+    def _header(self, Analysis):
+        """ The description of the results shared by every block """
+        store = Analysis.store
+        families = list(SPDModel.result_families)
+        groups = set(group for group, kind in
+                     SPDModel.result_families.values())
+        return OrderedDict([
+            ('families', OrderedDict((family, SPDModel.result_families[
+                family][0]) for family in families)),
+            ('actors', OrderedDict((group, list(store.names[group]))
+                                   for group in sorted(groups))),
+            ('companies', list(store.names['companies'])),
+            ('profits', self.profits),
+            ('index_names', [_plain_name(n) for n in store.index.names])])
+
+    def _check_header(self, Analysis):
+        """ Raise a ValueError unless the results of Analysis may be
+        appended to the manifest
+        """
+        for key, value in self._header(Analysis).items():
+            # Compare as read back from the manifest
+            if json.loads(json.dumps(value)) != self.manifest[key]:
+                raise ValueError(
+                    "The results do not match those held by %s, their %s "
+                    "differ" % (self.directory, key.replace('_', ' ')))
+
+    def _create_manifest(self, Analysis):
+        manifest = self._header(Analysis)
+        manifest['version'] = self.version
+
+        # The header is written atomically, the blocks are appended
+        handle, temporary = tempfile.mkstemp(dir=self.directory,
+                                             suffix='.tmp')
+        with os.fdopen(handle, 'w') as f:
+            f.write(json.dumps(manifest) + '\n')
+        os.rename(temporary, self.path)
+
+        manifest['blocks'] = []
+        return manifest
+
+    def _append_manifest(self, block):
+        """ Append a single block to the manifest """
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(block) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ResultSet(object):
+    """ResultSet
+
+    Read only view of a directory written by ResultWriter. Every block
+    is memory mapped when it is first needed, so a result set larger
+    than memory may be queried by instance range and actor with only
+    the selected values being read.
+
+    Usage:
+    ------
+    results = ResultSet("results")
+    results.frame(["Energy_Price"], start=1000, stop=2000)
+    results.family("Energy_Total", actors=["Manapouri"])
+    results.profits(companies=True)
+
+    Parameters
+    ----------
+    directory: str
+        Directory written by ResultWriter
+
+    """
+
+    manifest_name = 'manifest.jsonl'
+
+    def __init__(self, directory):
+        super(ResultSet, self).__init__()
+        self.directory = directory
+        self.manifest, size = read_manifest(
+            os.path.join(directory, self.manifest_name))
+        self.blocks = self.manifest['blocks']
+        self._maps = {}
+
+    def __len__(self):
+        if not self.blocks:
+            return 0
+        return self.blocks[-1]['stop']
+
+    @property
+    def families(self):
+        return list(self.manifest['families'])
+
+    @property
+    def instances(self):
+        """ Unique name of every instance """
+        return [name for block in self.blocks for name in block['instances']]
+
+    @property
+    def status(self):
+        """ Solution status of every instance """
+        return [status for block in self.blocks
+                for status in block.get('status',
+                                        [None] * len(block['instances']))]
+
+    @property
+    def fingerprints(self):
+        """ Fingerprint of the parameters of every instance, see
+        fingerprint_instances
+        """
+        return [fingerprint for block in self.blocks
+                for fingerprint in block.get(
+                    'fingerprints', [None] * len(block['instances']))]
+
+    @property
+    def completed(self):
+        """ Solution status of every instance, keyed by instance name """
+        return dict(zip(self.instances, self.status))
+
+    def index(self, start=0, stop=None):
+        """ Index of the instances from start to stop """
+        start, stop = self._range(start, stop)
+        names = self.manifest['index_names']
+        levels = [[] for name in names]
+        kinds = [None] * len(names)
+        for block, begin, end in self._blocks(start, stop):
+            for i, values in enumerate(block['index']):
+                levels[i].extend(values[begin:end])
+                kinds[i] = block['index_kinds'][i]
+
+        levels = [_restore(kind, labels, name)
+                  for kind, labels, name in zip(kinds, levels, names)]
+        if len(levels) == 1:
+            return levels[0]
+        return pd.MultiIndex.from_arrays(levels, names=names)
+
+    def family(self, family, start=0, stop=None, actors=None):
+        """ Instance by actor array of a result family or profit quantity
+
+        Parameters
+        ----------
+        family: str
+            The result family, e.g. "Energy_Price", or profit quantity,
+            e.g. "Unit Total Profit" or "Company Total Profit"
+        start, stop: int
+            The range of instances to read
+        actors: list, default None
+            Names of the actors to read, defaults to all
+
+        """
+        start, stop = self._range(start, stop)
+        columns = self._columns(family, actors)
+        parts = [self._map(block, family)[begin:end][:, columns]
+                 for block, begin, end in self._blocks(start, stop)]
+        if not parts:
+            return np.zeros((0, len(columns)))
+        return np.concatenate(parts)
+
+    def frame(self, families=None, start=0, stop=None, actors=None):
+        """ DataFrame of one or more result families indexed by
+        instance with (actor, quantity) MultiIndex columns, as created
+        by Analytics.result_frame
+
+        Parameters
+        ----------
+        families: list, default None
+            Result families to include, defaults to every family
+        start, stop: int
+            The range of instances to read
+        actors: list, default None
+            Names of the actors to include, defaults to all
+
+        """
+        if families is None:
+            families = self.families
+
+        columns, values = [], []
+        for family in families:
+            names = self._names(family)
+            selected = self._columns(family, actors)
+            quantity = family.replace('_', ' ')
+            columns.extend((names[c], quantity) for c in selected)
+            values.append(self.family(family, start, stop, actors))
+
+        columns = pd.MultiIndex.from_tuples(columns,
+                                            names=['actor', 'quantity'])
+        return pd.DataFrame(np.hstack(values), index=self.index(start, stop),
+                            columns=columns)
+
+    def profits(self, quantities=None, start=0, stop=None, actors=None,
+                companies=False):
+        """ DataFrame of the unit or company profit quantities, as
+        created by ProfitEngine.unit_frame and company_totals
+
+        Parameters
+        ----------
+        quantities: list, default None
+            Quantities to include, e.g. ["Total Profit"]
+        start, stop: int
+            The range of instances to read
+        actors: list, default None
+            Names of the units or companies to include
+        companies: bool, default False
+            Read the company totals instead of the units
+
+        """
+        if not self.manifest['profits']:
+            raise ValueError("The results were written without profits")
+        prefix = 'Company ' if companies else 'Unit '
+        if quantities is None:
+            quantities = (ProfitEngine.company_quantities if companies
+                          else ProfitEngine.quantities)
+
+        names = self._names(prefix + quantities[0])
+        selected = self._columns(prefix + quantities[0], actors)
+        data = np.stack([self.family(prefix + q, start, stop, actors)
+                         for q in quantities], axis=-1)
+        columns = pd.MultiIndex.from_tuples(
+            [(names[c], q) for c in selected for q in quantities],
+            names=['actor', 'quantity'])
+        return pd.DataFrame(data.reshape(data.shape[0], -1),
+                            index=self.index(start, stop), columns=columns)
+
+    def _range(self, start, stop):
+        stop = len(self) if stop is None else min(stop, len(self))
+        return max(start, 0), stop
+
+    def _blocks(self, start, stop):
+        """ Each block overlapping the range, with the range of the
+        block to read
+        """
+        for block in self.blocks:
+            if block['stop'] <= start or block['start'] >= stop:
+                continue
+            yield (block, max(start, block['start']) - block['start'],
+                   min(stop, block['stop']) - block['start'])
+
+    def _names(self, family):
+        if family.startswith('Company '):
+            return self.manifest['companies']
+        if family.startswith('Unit '):
+            return self.manifest['actors']['reserve_providers']
+        return self.manifest['actors'][self.manifest['families'][family]]
+
+    def _columns(self, family, actors):
+        names = self._names(family)
+        if actors is None:
+            return list(range(len(names)))
+        position = dict((name, i) for i, name in enumerate(names))
+        return [position[a] for a in actors if a in position]
+
+    def _map(self, block, family):
+        """ Memory map of one array of a block, opened on first use """
+        name = block['files'][family]
+        if name not in self._maps:
+            path = os.path.join(self.directory, name)
+            try:
+                self._maps[name] = np.load(path, mmap_mode='r')
+            except ValueError:
+                # Arrays without any values cannot be mapped
+                self._maps[name] = np.load(path)
+        return self._maps[name]
+
+
+def instance_status(SPD, store):
+    """ Solution status of each instance of a solved model, from a
+    decomposed solve where available
+    """
+    statuses = getattr(SPD, 'instance_status', None)
+    if statuses:
+        return [statuses[name] for name in store.instances]
+    return [SPD.status] * len(store)
+
+
+def read_manifest(path):
+    """ Read a manifest written by ResultWriter
+
+    Returns
+    -------
+    manifest: OrderedDict
+        The header with the list of blocks
+    size: int
+        The number of bytes holding complete lines, a final line
+        without a line ending being an interrupted write
+
+    """
+    with open(path, 'rb') as f:
+        content = f.read()
+
+    size = content.rfind(b'\n') + 1
+    lines = content[:size].decode('utf-8').splitlines()
+    if not lines:
+        raise ValueError("%s holds no results" % path)
+    manifest = json.loads(lines[0], object_pairs_hook=OrderedDict)
+    manifest['blocks'] = [json.loads(line, object_pairs_hook=OrderedDict)
+                          for line in lines[1:]]
+    return manifest, size
+
+
+def _plain(values):
+    """ JSON compatible labels of an index level
+
+    Returns
+    -------
+    kind: str
+        "datetime" or "timedelta" when the labels must be converted
+        back on reading, otherwise "label"
+    labels: list
+
+    """
+    if isinstance(values, pd.DatetimeIndex):
+        return 'datetime', [None if pd.isnull(v) else v.isoformat()
+                            for v in values]
+    if isinstance(values, pd.TimedeltaIndex):
+        return 'timedelta', [None if pd.isnull(v) else v.value
+                             for v in values]
+    return 'label', [_label(v) for v in values.tolist()]
+
+
+def _label(value):
+    """ JSON compatible form of a single label """
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, tuple):
+        return [_label(v) for v in value]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def _restore(kind, labels, name):
+    """ Index of the labels of a level written by _plain """
+    if kind == 'datetime':
+        return pd.DatetimeIndex(pd.to_datetime(labels), name=name)
+    if kind == 'timedelta':
+        return pd.TimedeltaIndex(pd.to_timedelta(labels), name=name)
+    labels = [tuple(v) if isinstance(v, list) else v for v in labels]
+    if any(isinstance(v, tuple) for v in labels):
+        return pd.Index(labels, name=name, tupleize_cols=False)
+    return pd.Index(labels, name=name)
+
+
+def _plain_name(name):
+    return None if name is None else str(name)
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Seeded generator of synthetic networks of any size, used to benchmark
+how the model scales.
+
+"""
+
+# C Libraries
+import numpy as np
+
+from .actors import (SystemOperator, Station, Company, Node, ReserveZone,
+                    Branch, InterruptibleLoad)
+
+
+def synthetic_network(nodes=10, stations_per_node=2, reserve_zones=2,
+                      risk_branches=1, companies=3, seed=None):
+    """ Create a System Operator containing a random but always feasible
+    network. The same seed always creates the same network.
+
+    The nodes are split evenly between the reserve zones and joined in
+    a chain, with a further branch between random pairs of nodes for
+    every fourth node. Each risk branch joins two different reserve
+    zones, either as a further branch or by flagging an existing one.
+    Every node has demand and the given number of stations, each with
+    an energy and a reserve offer, and every reserve zone has an
+    interruptible load able to cover its largest risk, so every dispatch
+    has a solution.
+
+    Usage:
+    ------
+    SO = synthetic_network(nodes=100, stations_per_node=3, seed=1)
+    SO.create_iterator(SO.stations[0], "energy_price", np.arange(0, 100))
+
+    Parameters
+    ----------
+    nodes: int, default 10
+        Number of nodes
+    stations_per_node: int, default 2
+        Number of stations at every node
+    reserve_zones: int, default 2
+        Number of reserve zones, no more than the number of nodes
+    risk_branches: int, default 1
+        Number of risk setting branches, which requires at least two
+        reserve zones
+    companies: int, default 3
+        Number of companies owning the stations
+    seed: int, default None
+        Seed of the random number generator
+
+    Returns
+    -------
+    SO: SystemOperator
+
+    """
+    if nodes < 1 or stations_per_node < 1 or companies < 1:
+        raise ValueError("A network requires at least one node, station "
+                         "and company")
+    if not 1 <= reserve_zones <= nodes:
+        raise ValueError("The number of reserve zones must be between one "
+                         "and the number of nodes")
+    if risk_branches and reserve_zones < 2:
+        raise ValueError("Risk branches must join two reserve zones")
+
+    random = np.random.RandomState(seed)
+    SO = SystemOperator()
+
+    zones = [ReserveZone("RZ%d" % z, SO) for z in range(reserve_zones)]
+    owners = [Company("Company%d" % c) for c in range(companies)]
+
+    demand = random.uniform(50, 200, nodes).round(1)
+    zone_of = np.arange(nodes) * reserve_zones // nodes
+    network = [Node("N%d" % n, SO, zones[zone_of[n]], demand=demand[n])
+               for n in range(nodes)]
+
+    # Generation totals twice the demand, so every station need not run
+    count = nodes * stations_per_node
+    capacity = random.uniform(0.5, 1.5, count)
+    capacity = (capacity * 2 * demand.sum() / capacity.sum()).round(1)
+    energy_price = random.uniform(0, 150, count).round(2)
+    reserve_price = random.uniform(0, 50, count).round(2)
+    reserve_share = random.uniform(0.1, 0.4, count)
+    proportion = random.uniform(0.5, 1.0, count).round(2)
+    ownership = random.randint(0, companies, count)
+
+    for s in range(count):
+        node = network[s // stations_per_node]
+        station = Station("%s_S%d" % (node.name, s % stations_per_node), SO,
+                          node, owners[ownership[s]], capacity=capacity[s])
+        station.add_energy_offer(energy_price[s], capacity[s])
+        station.add_reserve_offer(reserve_price[s],
+                                  round(reserve_share[s] * capacity[s], 1),
+                                  proportion[s])
+
+    # Branches able to carry the whole demand never bind in the chain,
+    # with at most one branch between any pair of nodes
+    limit = round(demand.sum() * 2, 1)
+    branches = {}
+    for n in range(nodes - 1):
+        branches[frozenset((n, n + 1))] = [n, n + 1, limit, False]
+    for b in range(nodes // 4 if nodes > 2 else 0):
+        pair = random.choice(nodes, 2, replace=False)
+        branches.setdefault(frozenset(pair), [pair[0], pair[1], limit,
+                                              False])
+
+    for b in range(risk_branches):
+        for attempt in range(100):
+            first, second = random.choice(reserve_zones, 2, replace=False)
+            pair = (random.choice(np.flatnonzero(zone_of == first)),
+                    random.choice(np.flatnonzero(zone_of == second)))
+            branch = branches.setdefault(frozenset(pair), [
+                pair[0], pair[1], round(demand.mean(), 1), False])
+            if not branch[3]:
+                branch[3] = True
+                break
+        else:
+            raise ValueError("Too many risk branches for the network")
+
+    for key in sorted(branches, key=sorted):
+        sending, receiving, capacity_limit, risk = branches[key]
+        Branch(SO, network[sending], network[receiving],
+               capacity=capacity_limit, risk=risk)
+
+    # An expensive interruptible load covering any risk within its zone
+    for z, zone in enumerate(zones):
+        load = InterruptibleLoad("IL%d" % z, SO,
+                                 network[np.flatnonzero(zone_of == z)[0]],
+                                 owners[z % companies])
+        load.add_reserve_offer(round(random.uniform(100, 300), 2),
+                               round(max(capacity.max(), limit), 1))
+
+    return SO
+
+if __name__ == '__main__':
+    pass
@@ -30,8 +30,21 @@ setup(
     ],
     package_dir={'pyspd': 'pyspd'},
     include_package_data=True,
+    entry_points={
+        'console_scripts': [
+            'pyspd = pyspd.cli:main',
+        ],
+    },
     install_requires=[
+        'numpy>=1.16.5',
+        'scipy>=1.6.0',
+        'pandas>=1.0',
+        'PuLP>=2.0',
     ],
+    extras_require={
+        'highs': ['highspy>=1.5'],
+    },
+    python_requires='>=3.7',
     license="BSD",
     zip_safe=False,
     keywords='pyspd',
@@ -40,11 +53,12 @@ setup(
         'Intended Audience :: Developers',
         'License :: OSI Approved :: BSD License',
         'Natural Language :: English',
-        "Programming Language :: Python :: 2",
-        'Programming Language :: Python :: 2.6',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
+        'Programming Language :: Python :: 3.7',
+        'Programming Language :: Python :: 3.8',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
     ],
     test_suite='tests',
 )
\ No newline at end of file
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Shared fixtures for the `pyspd` tests.
+
+A two island network based upon the example notebook, and the helpers
+shared by the tests solving it.
+"""
+
+import numpy as np
+import pytest
+from pyspd import *
+
+
+def create_network():
+    operator = SystemOperator()
+
+    north_island = ReserveZone("NorthIsland", operator)
+    south_island = ReserveZone("SouthIsland", operator)
+
+    meridian = Company("Meridian")
+    market = Company("Market")
+
+    benmore = Node("Benmore", operator, south_island, demand=140)
+    haywards = Node("Haywards", operator, north_island, demand=150)
+
+    Branch(operator, benmore, haywards, capacity=1000, risk=True)
+
+    manapouri = Station("Manapouri", operator, benmore, meridian, capacity=400)
+    roxburgh = Station("Roxburgh", operator, benmore, market, capacity=400)
+    tiwai = InterruptibleLoad("Tiwai", operator, benmore, market)
+    nzst = InterruptibleLoad("NZST", operator, haywards, market)
+
+    manapouri.add_reserve_offer(100, 300, 1.0)
+    manapouri.add_energy_offer(25, 125)
+
+    roxburgh.add_energy_offer(30, 250)
+    roxburgh.add_reserve_offer(15, 100, 1)
+
+    tiwai.add_reserve_offer(15, 80)
+    nzst.add_reserve_offer(150, 500)
+
+    return operator
+
+
+@pytest.fixture
+def network():
+    return create_network()
+
+
+@pytest.fixture
+def reference_network():
+    return create_network()
+
+
+def sweep(operator, varrange=np.arange(0, 100, 10)):
+    """ Vary the energy price of Manapouri over varrange """
+    manapouri = operator.stations[0]
+    operator.create_iterator(manapouri, "energy_price", varrange)
+    return operator
+
+
+def solve(operator, backend="highs", **options):
+    """ Solve every instance of the System Operator """
+    spd = SPDModel(operator, backend=backend, **options)
+    spd.full_run()
+    return spd
+
+
+def dispatch_cost(analysis):
+    """ Offer cost of the energy and reserve dispatch of each instance """
+    values = analysis.store.values
+    reserve_prices = np.hstack([values['stations']['reserve_price'],
+                                values['interruptible_loads']['reserve_price']])
+    return ((values['stations']['energy_price'] *
+             analysis.family("Energy_Total")).sum(axis=1) +
+            (reserve_prices * analysis.family("Reserve_Total")).sum(axis=1))
+
+
+def assert_same_dispatch(analysis, reference):
+    """ Both solutions must have the same prices and dispatch cost """
+    assert np.allclose(analysis.final_price_df.values,
+                       reference.final_price_df.values, atol=1e-6)
+
+    # Dispatch may differ between offers at the same price, the cost
+    # of the dispatch may not
+    assert np.allclose(dispatch_cost(analysis), dispatch_cost(reference),
+                       atol=1e-6)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_adaptive
+----------------------------------
+
+Tests for the `AdaptiveSweep` breakpoint search.
+"""
+
+import numpy as np
+import pytest
+from pyspd import *
+
+from .conftest import solve, sweep
+
+
+def dense(operator, varrange):
+    analysis = Analytics(solve(sweep(operator, varrange)))
+    analysis.create_price_df()
+    return analysis
+
+
+def test_adaptive_matches_dense(network, reference_network):
+    varrange = np.arange(0, 200, 0.5)
+    manapouri = network.stations[0]
+    sweep = AdaptiveSweep(network, manapouri, "energy_price", 0, 200,
+                          samples=9).run()
+    assert sweep.solves < len(varrange)
+    assert len(sweep.breakpoints)
+
+    adaptive = Analytics(sweep.evaluate(varrange))
+    reference = dense(reference_network, varrange)
+
+    # The results exactly at a breakpoint are not unique
+    near = np.abs(varrange[:, None] - sweep.breakpoints[None]).min(axis=1)
+    valid = near > sweep.tolerance
+
+    assert list(adaptive.final_price_df.index) == list(varrange)
+    assert np.allclose(adaptive.final_price_df.values[valid],
+                       reference.final_price_df.values[valid], atol=1e-6)
+    assert np.allclose(adaptive.profits.company_totals().values[valid],
+                       reference.profits.company_totals().values[valid],
+                       atol=1e-4)
+
+
+def test_adaptive_linear_demand(network):
+    haywards = network.nodes[1]
+    sweep = AdaptiveSweep(network, haywards, "demand", 150, 160,
+                          samples=3).run()
+
+    assert len(sweep.points) == len(sweep.pieces) + 1
+    assert sweep.points[0] == 150 and sweep.points[-1] == 160
+
+    # The points themselves are reconstructed exactly
+    sweep.evaluate(sweep.points)
+    for family, values in sweep.values.items():
+        assert np.allclose(sweep.result_array(family), values)
+
+
+def test_adaptive_range(network):
+    manapouri = network.stations[0]
+    sweep = AdaptiveSweep(network, manapouri, "energy_price", 0, 50,
+                          samples=3).run()
+    with pytest.raises(ValueError):
+        sweep.evaluate([60])
+
+
+def staircase():
+    """ A single node supplied by three equal offers at 10, 20 and 30,
+    without any reserve risk
+    """
+    operator = SystemOperator()
+    zone = ReserveZone("Zone", operator)
+    company = Company("Company")
+    node = Node("Node", operator, zone, demand=150)
+    for name, price in (("Low", 10), ("Middle", 20), ("High", 30)):
+        station = Station(name, operator, node, company, capacity=100,
+                          risk=False)
+        station.add_energy_offer(price, 100)
+        station.add_reserve_offer(0, 0, 0)
+    return operator
+
+
+def test_adaptive_step_at_midpoint():
+    # The price at the middle of the range, 20, lies on the line
+    # between the prices at the ends, 10 and 30
+    operator = staircase()
+    node = operator.nodes[0]
+    sweep = AdaptiveSweep(operator, node, "demand", 50, 250, samples=2,
+                          families=["Energy_Price"]).run()
+
+    assert np.allclose(sweep.breakpoints, [100, 200], atol=sweep.tolerance)
+    sweep.evaluate([75, 125, 175, 225])
+    assert np.allclose(sweep.result_array("Energy_Price").ravel(),
+                       [10, 20, 20, 30])
+
+
+def test_adaptive_without_iterator(network):
+    # No iterator has been created on the network
+    assert getattr(network, 'parameters', None) is None
+    manapouri = network.stations[0]
+    sweep = AdaptiveSweep(network, manapouri, "energy_price", 0, 50,
+                          samples=3).run()
+    assert sweep.solves >= 3
+    assert getattr(network, 'parameters', None) is None
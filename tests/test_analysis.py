@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_analysis
+----------------------------------
+
+Tests for the `Analytics` result extraction.
+"""
+
+import numpy as np
+from pyspd import *
+
+from .conftest import solve, sweep
+
+
+def test_lp_index_covers_families(network):
+    spd = solve(sweep(network), "pulp")
+    families = set(family for family, position in spd.lp_index.values())
+
+    assert families == set(SPDModel.result_families)
+
+
+def test_solution_shape(network):
+    analysis = Analytics(solve(sweep(network), "pulp"))
+    store = network.parameters
+
+    for family, (group, kind) in SPDModel.result_families.items():
+        assert analysis.solution[family].shape == (len(store),
+                                                   len(store.names[group]))
+        assert not np.isnan(analysis.solution[family]).any()
+
+
+def test_solution_matches_backends(network, reference_network):
+    pulp = Analytics(solve(sweep(network), "pulp"))
+    highs = Analytics(solve(sweep(reference_network), "highs"))
+
+    for family in ("Energy_Total", "Energy_Price", "Reserve_Price"):
+        assert np.allclose(pulp.solution[family], highs.solution[family])
+
+
+def test_result_frame(network):
+    analysis = Analytics(solve(sweep(network), "pulp"))
+    frame = analysis.result_frame(["Energy_Price", "Reserve_Total"])
+
+    assert frame.columns.names == ['actor', 'quantity']
+    assert frame.index.name == "Manapouri Energy Price"
+    assert list(frame.index) == list(range(0, 100, 10))
+    assert np.allclose(frame["Benmore", "Energy Price"].values,
+                       analysis.solution["Energy_Price"][:, 0])
+    assert ("Tiwai", "Reserve Total") in frame.columns
+
+
+def test_underscore_names(network):
+    network.nodes[1].name = "Hay_wards"
+    analysis = Analytics(solve(sweep(network), "pulp"))
+    analysis.create_master()
+
+    assert "Hay_wards Energy Price" in analysis.master.columns
+    assert analysis.master["Hay_wards Energy Price"].notnull().all()
+
+
+def test_frames_are_lazy(network):
+    analysis = Analytics(solve(sweep(network), "highs"))
+    assert analysis._solution == {}
+
+    prices = analysis.final_price_df
+    assert set(analysis._solution) == set(["Energy_Price", "Reserve_Price"])
+    assert analysis.final_price_df is prices
+    assert analysis.create_price_df() is prices
+
+
+def test_resolve_invalidates(network):
+    spd = solve(sweep(network), "highs")
+    analysis = Analytics(spd)
+    before = analysis.master["Haywards Energy Price"].copy()
+
+    network.stations[1].add_energy_offer(60, 250)
+    spd.resolve()
+
+    assert analysis._frames == {}
+    assert (analysis.master["Haywards Energy Price"] != before).any()
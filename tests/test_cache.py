@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_cache
+----------------------------------
+
+Tests for the disk backed `SolutionCache`.
+"""
+
+import numpy as np
+from pyspd import *
+
+from .conftest import solve, sweep
+
+
+def test_cache_hits(network, reference_network, tmpdir):
+    cache = SolutionCache(str(tmpdir))
+    first = CachedModel(sweep(network, np.arange(0, 50, 10)), cache)
+    first.full_run()
+    assert cache.misses == 5 and cache.hits == 0
+    assert cache.stats()['entries'] == 5
+
+    # Overlapping instances are served without solving
+    second = CachedModel(sweep(network, np.arange(20, 70, 10)), cache)
+    second.full_run()
+    assert cache.hits == 3 and cache.misses == 7
+    assert list(second.cached) == [True, True, True, False, False]
+
+    spd = solve(sweep(reference_network, np.arange(20, 70, 10)))
+    cached, reference = Analytics(second), Analytics(spd)
+    assert np.allclose(cached.master.values, reference.master.values)
+
+
+def test_cache_all_hits_skip_solve(network, tmpdir):
+    cache = SolutionCache(str(tmpdir))
+    CachedModel(sweep(network, [0, 10]), cache).full_run()
+
+    model = CachedModel(network, cache).full_run()
+    assert model.cached.all()
+    assert not hasattr(model, 'model')
+
+
+def test_fingerprint_ignores_names(network, tmpdir):
+    cache = SolutionCache(str(tmpdir))
+    network.create_iterator()
+    single = cache.fingerprints(network.parameters)
+    sweep(network, [network.stations[0].energy_price, 99])
+    assert cache.fingerprints(network.parameters)[0] == single[0]
+    assert cache.fingerprints(network.parameters)[1] != single[0]
+
+
+def test_cache_eviction(network, tmpdir):
+    cache = SolutionCache(str(tmpdir))
+    CachedModel(sweep(network, [0]), cache).full_run()
+    size = cache.stats()['bytes']
+
+    cache.max_bytes = 2 * size
+    CachedModel(sweep(network, [10, 20, 30]), cache).full_run()
+    assert cache.stats()['entries'] == 2
+
+
+def test_cache_without_iterator(network, reference_network, tmpdir):
+    # No iterator has been created, a single dispatch is solved
+    cache = SolutionCache(str(tmpdir))
+    model = CachedModel(network, cache).full_run()
+    assert model.status == "Optimal"
+    assert cache.misses == 1 and cache.stats()['entries'] == 1
+
+    spd = solve(reference_network)
+    assert np.allclose(Analytics(model).master.values,
+                       Analytics(spd).master.values)
+
+    assert CachedModel(network, cache).full_run().cached.all()
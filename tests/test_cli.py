@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_cli
+----------------------------------
+
+Tests for the command line batch runner.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from pyspd import *
+from pyspd.cli import load_network, main
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+NETWORK = {
+    "reserve_zones": ["NorthIsland", "SouthIsland"],
+    "companies": ["Meridian", "Market"],
+    "nodes": [{"name": "Benmore", "zone": "SouthIsland", "demand": 140},
+              {"name": "Haywards", "zone": "NorthIsland", "demand": 150}],
+    "branches": [{"sending": "Benmore", "receiving": "Haywards",
+                  "capacity": 1000, "risk": True}],
+    "stations": [{"name": "Manapouri", "node": "Benmore",
+                  "company": "Meridian", "capacity": 400,
+                  "energy": {"price": 25, "offer": 125},
+                  "reserve": {"price": 100, "offer": 300, "proportion": 1.0},
+                  "energy_cost": 10},
+                 {"name": "Roxburgh", "node": "Benmore",
+                  "company": "Market", "capacity": 400,
+                  "energy": {"price": 30, "offer": 250},
+                  "reserve": {"price": 15, "offer": 100, "proportion": 1}}],
+    "interruptible_loads": [{"name": "Tiwai", "node": "Benmore",
+                             "company": "Market",
+                             "reserve": {"price": 15, "offer": 80}},
+                            {"name": "NZST", "node": "Haywards",
+                             "company": "Market",
+                             "reserve": {"price": 150, "offer": 500}}]}
+
+
+@pytest.fixture
+def files(tmpdir):
+    network = tmpdir.join("network.json")
+    network.write(json.dumps(NETWORK))
+    scenarios = tmpdir.join("scenarios.csv")
+    scenarios.write("scenario,Haywards.demand,Manapouri.energy_price\n"
+                    "Base,150,25\nPeak,180,\nHigh,200,40\n")
+    return str(network), str(scenarios), str(tmpdir.join("results"))
+
+
+def test_load_network_matches(files, network):
+    operator = load_network(files[0])
+    assert [n.name for n in operator.nodes] == [n.name for n in
+                                                network.nodes]
+    assert [s.name for s in operator.stations] == [s.name for s in
+                                                   network.stations]
+    assert [b.risk for b in operator.branches] == [True]
+
+    operator.create_iterator()
+    spd = SPDModel(operator, backend="highs")
+    spd.full_run()
+    network.create_iterator()
+    reference = SPDModel(network, backend="highs")
+    reference.full_run()
+    assert np.allclose(spd.result_array("Energy_Price"),
+                       reference.result_array("Energy_Price"))
+
+
+def test_main_writes_results(files, capsys):
+    network, scenarios, output = files
+    assert main([network, scenarios, output, "--chunksize", "2"]) == 0
+    printed = capsys.readouterr()[0]
+    assert "scenarios/sec" in printed
+    assert "phases:" in printed
+
+    results = ResultSet(output)
+    assert len(results) == 3
+    assert list(results.index()) == ["Base", "Peak", "High"]
+    assert results.instances == ["Scenario_0", "Scenario_1", "Scenario_2"]
+    assert results.profits(["Total Profit"]).shape == (3, 4)
+    assert results.profits(["Total Profit"], companies=True).shape == (3, 2)
+
+
+def test_main_refuses_existing_results(files):
+    network, scenarios, output = files
+    assert main([network, scenarios, output, "--quiet"]) == 0
+    with pytest.raises(SystemExit):
+        main([network, scenarios, output])
+
+    # Resuming finds every scenario complete
+    assert main([network, scenarios, output, "--resume"]) == 0
+    assert len(ResultSet(output)) == 3
+
+
+def test_main_resume_changed_scenarios(files, tmpdir):
+    network, scenarios, output = files
+    assert main([network, scenarios, output, "--quiet"]) == 0
+
+    tmpdir.join("scenarios.csv").write(
+        "scenario,Haywards.demand,Manapouri.energy_price\n"
+        "Base,150,25\nPeak,190,\nHigh,200,40\n")
+    assert main([network, scenarios, output, "--resume", "--quiet"]) == 1
+    assert len(ResultSet(output)) == 3
+
+
+def test_main_profile_trace(files, tmpdir):
+    network, scenarios, output = files
+    trace = str(tmpdir.join("trace.json"))
+    assert main([network, scenarios, output, "--backend", "pulp",
+                 "--trace", trace, "--quiet"]) == 0
+    with open(trace) as f:
+        assert json.load(f)["traceEvents"]
+
+
+def test_main_invalid_network(files, tmpdir):
+    network, scenarios, output = files
+    broken = tmpdir.join("broken.json")
+    definition = dict(NETWORK, branches=[{"sending": "Benmore",
+                                          "receiving": "Nowhere"}])
+    broken.write(json.dumps(definition))
+    assert main([str(broken), scenarios, output]) == 1
+
+
+def test_module_entry_point(tmpdir):
+    # As installed, only the directory holding the package is on the path
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    output = subprocess.check_output(
+        [sys.executable, "-m", "pyspd", "--help"], env=env, cwd=str(tmpdir))
+    assert b"usage:" in output
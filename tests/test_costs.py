@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_costs
+----------------------------------
+
+Tests for the vectorised cost models.
+"""
+
+import numpy as np
+import pytest
+from pyspd import *
+
+
+def test_linear_cost():
+    cost = LinearCost(25, intercept=100)
+    assert cost(10) == 350
+    assert np.allclose(cost.evaluate([0, 10]), [100, 350])
+
+
+def test_quadratic_cost():
+    cost = QuadraticCost(0.5, slope=2, intercept=1)
+    dispatch = np.arange(5.)
+    assert np.allclose(cost.evaluate(dispatch),
+                       1 + 2 * dispatch + 0.5 * dispatch ** 2)
+
+
+def test_piecewise_cost():
+    cost = PiecewiseLinearCost([0, 100, 200], [10, 20, 40])
+    assert np.allclose(cost.evaluate([-5, 50, 100, 150, 250]),
+                       [0, 500, 1000, 2000, 5000])
+
+
+def test_piecewise_breakpoints():
+    with pytest.raises(ValueError):
+        PiecewiseLinearCost([0, 100], [10])
+    with pytest.raises(ValueError):
+        PiecewiseLinearCost([100, 0], [10, 20])
+
+
+def test_evaluate_costs_matches_callables():
+    funcs = [LinearCost(25), QuadraticCost(0.1, 5),
+             PiecewiseLinearCost([0, 50], [10, 30]),
+             PiecewiseLinearCost([0, 20, 60], [5, 15, 25], intercept=7),
+             lambda x: 3 * x + 1]
+    dispatch = np.random.RandomState(0).uniform(0, 100, (6, len(funcs)))
+
+    costs = evaluate_costs(funcs, dispatch)
+    expected = np.array([[f(x) for f, x in zip(funcs, row)]
+                         for row in dispatch])
+
+    assert costs.shape == dispatch.shape
+    assert np.allclose(costs, expected)
+
+
+def test_station_cost_model(network):
+    manapouri = network.stations[0]
+    manapouri.add_energy_cost_func(LinearCost(10))
+    network.create_iterator(manapouri, "energy_price", np.arange(0, 100, 10))
+    SPD = SPDModel(network)
+    SPD.full_run()
+    Analytics(SPD)
+
+    manapouri.calculate_profits()
+    assert np.allclose(manapouri.energy_cost, 10 * manapouri.energy_dispatch)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_hooks
+----------------------------------
+
+Tests for the `hooks` registry.
+"""
+
+import numpy as np
+import pytest
+from pyspd import *
+
+from .conftest import solve, sweep
+
+
+@pytest.fixture
+def collected():
+    events = []
+
+    def before(context):
+        events.append(("before", context["category"], context["name"],
+                       dict(context)))
+
+    def after(context):
+        events.append(("after", context["category"], context["name"],
+                       dict(context)))
+
+    hooks.register(before, when="before")
+    hooks.register(after)
+    yield events
+    hooks.clear()
+
+
+def run(network, backend="pulp"):
+    spd = solve(sweep(network, np.arange(0, 30, 10)), backend)
+    Analytics(spd).final_price_df
+    return spd
+
+
+def test_hooks_fire_around_each_phase(network, collected):
+    spd = run(network)
+    assert spd.profiler is None
+
+    dispatches = [c for when, category, name, c in collected
+                  if when == "after" and name == "_add_dispatch"]
+    assert [c["instance"] for c in dispatches] == list(network.itinstances)
+    assert all(c["owner"] is network and c["elapsed"] >= 0
+               for c in dispatches)
+
+    steps = [name for when, category, name, c in collected
+             if when == "before" and category == "create_lp"]
+    assert steps == ["parameter_dicts"] + list(SPDModel.steps)
+
+    names = [(when, name) for when, category, name, c in collected
+             if category == "solve"]
+    assert names == [("before", "solve_lp"), ("after", "solve_lp")]
+
+    demand = [c for when, category, name, c in collected
+              if when == "after" and name == "_nodal_demand"][0]
+    assert demand["rows"] == 2 * 3 * len(network.nodes)
+    assert demand["size"][0] == demand["rows"]
+    assert demand["error"] is None
+
+    assert any(category == "analytics" for when, category, name, c
+               in collected)
+
+
+def test_hooks_category(network):
+    seen = []
+    hooks.register(lambda c: seen.append(c["name"]), category="solve")
+    try:
+        run(network, "highs")
+    finally:
+        hooks.clear()
+    assert seen == ["solve_lp"]
+    assert not hooks.active
+
+
+def test_hooks_unregister(network):
+    seen = []
+
+    def collect(context):
+        seen.append(context["name"])
+
+    hooks.register(collect)
+    hooks.unregister(collect)
+    assert not hooks.active
+    run(network)
+    assert seen == []
+
+
+def test_hooks_invalid():
+    with pytest.raises(ValueError):
+        hooks.register(lambda c: None, when="during")
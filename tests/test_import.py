@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_import
+----------------------------------
+
+Tests for the lazy import of the `pyspd` package.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+
+def imported(statement):
+    """ The modules imported by a statement in a fresh interpreter """
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    code = "import sys, json\n%s\nprint(json.dumps(sorted(sys.modules)))"
+    output = subprocess.check_output([sys.executable, "-c", code % statement],
+                                     env=env)
+    return set(json.loads(output.decode("utf-8")))
+
+
+def test_import_is_lazy():
+    modules = imported("import pyspd")
+    for heavy in ("numpy", "pandas", "scipy", "pulp", "pyspd.model",
+                  "pyspd.actors"):
+        assert heavy not in modules
+
+
+def test_first_use_imports_module():
+    modules = imported("import pyspd; pyspd.SystemOperator")
+    assert "pyspd.actors" in modules
+    assert "pulp" not in modules
+
+    # Only ever imported as submodules of the package
+    modules = imported("import pyspd; pyspd.SPDModel")
+    assert "pyspd.model" in modules
+    assert "model" not in modules
+
+
+def test_public_objects():
+    import pyspd
+    model = sys.modules[pyspd.SPDModel.__module__]
+    assert pyspd.SPDModel is model.SPDModel
+    # The package and the modules share a single hook registry
+    profiling = sys.modules[pyspd.Profiler.__module__]
+    assert pyspd.hooks is profiling.hooks
+    assert set(pyspd.__all__) <= set(dir(pyspd))
+    with pytest.raises(AttributeError):
+        pyspd.NotAnObject
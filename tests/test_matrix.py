@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_matrix
+----------------------------------
+
+Tests for the sparse matrix form of the Linear Program, cross checked
+against the pulp reference implementation.
+"""
+
+import numpy as np
+import pytest
+from pyspd import *
+
+from .conftest import sweep
+
+
+def test_matrix_shape(network):
+    spd = SPDModel(sweep(network, [0, 10, 20]))
+    spd.create_lp()
+    spd.create_matrix()
+
+    matrix = spd.matrix
+    assert matrix.num_rows == len(spd.lp.constraints)
+    assert matrix.num_cols == len(spd.lp.variables())
+    assert len(matrix.row_names()) == matrix.num_rows
+    assert len(matrix.column_names()) == matrix.num_cols
+
+
+def test_matrix_matches_pulp(network):
+    spd = SPDModel(sweep(network, [0, 10, 20]))
+    spd.create_lp()
+    spd.create_matrix()
+
+    matrix = spd.matrix
+    columns = dict(zip(matrix.column_names(), range(matrix.num_cols)))
+    A = matrix.A.toarray()
+
+    for row, name in enumerate(matrix.row_names()):
+        constraint = spd.lp.constraints[name]
+        expected = np.zeros(matrix.num_cols)
+        for var, coef in constraint.items():
+            expected[columns[var.name]] += coef
+        assert np.allclose(A[row], expected)
+
+        rhs = -constraint.constant
+        if constraint.sense >= 0:
+            assert matrix.row_lower[row] == pytest.approx(rhs)
+        if constraint.sense <= 0:
+            assert matrix.row_upper[row] == pytest.approx(rhs)
+
+
+def test_matrix_cost_matches_pulp(network):
+    spd = SPDModel(sweep(network, [0, 10, 20]))
+    spd.create_lp()
+    spd.create_matrix()
+
+    objective = dict((v.name, c) for v, c in spd.lp.objective.items())
+    for name, cost in zip(spd.matrix.column_names(), spd.matrix.cost):
+        assert objective.get(name, 0) == cost
+
+
+def test_matrix_split(network):
+    spd = SPDModel(sweep(network, [0, 10, 20]))
+    spd.create_matrix()
+
+    rows, cols, blocks = spd.matrix.split()
+    assert len(blocks) == 3
+    assert sum(b.num_rows for b in blocks) == spd.matrix.num_rows
+    assert sum(b.num_cols for b in blocks) == spd.matrix.num_cols
+    assert sum(b.A.nnz for b in blocks) == spd.matrix.A.nnz
@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_merit
+----------------------------------
+
+Tests for the `MeritOrder` fast dispatch path.
+"""
+
+import pytest
+from pyspd import *
+
+from .conftest import assert_same_dispatch, solve, sweep
+
+
+def riskless(operator):
+    """ Remove every reserve risk and add generation at Haywards so the
+    branch may congest
+    """
+    haywards = operator.nodes[1]
+    market = operator.stations[1].company
+    huntly = Station("Huntly", operator, haywards, market, capacity=300)
+    huntly.add_energy_offer(200, 300)
+    huntly.add_reserve_offer(0, 0, 0)
+
+    for station in operator.stations:
+        station.risk = False
+    operator.branches[0].risk = False
+    return operator
+
+
+def compare(network, reference_network):
+    engine = MeritOrder(network).full_run()
+    assert engine.status == "Optimal"
+    assert_same_dispatch(Analytics(engine),
+                         Analytics(solve(reference_network)))
+    return engine
+
+
+def test_merit_order_qualifies(network, reference_network):
+    for operator in riskless(network), riskless(reference_network):
+        sweep(operator)
+
+    engine = compare(network, reference_network)
+    assert engine.qualified.all()
+
+
+def test_merit_order_falls_back_on_congestion(network, reference_network):
+    for operator in riskless(network), riskless(reference_network):
+        operator.create_iterator(operator.branches[0], "capacity",
+                                 [50, 100, 1000])
+
+    engine = compare(network, reference_network)
+    assert list(engine.qualified) == [False, False, True]
+
+
+def test_merit_order_falls_back_on_risk(network, reference_network):
+    for operator in network, reference_network:
+        sweep(operator)
+
+    engine = compare(network, reference_network)
+    assert not engine.qualified.any()
+
+
+def test_store_requires_highs(network):
+    network.create_iterator()
+    with pytest.raises(ValueError):
+        SPDModel(network, store=network.parameters)
+
+
+def test_merit_order_without_iterator(network, reference_network):
+    # A single dispatch is solved when no iterator has been created
+    engine = compare(riskless(network), riskless(reference_network))
+    assert engine.qualified.all()
+
+
+def test_fallback_without_iterator(network, reference_network):
+    engine = compare(network, reference_network)
+    assert not engine.qualified.any()
+    assert len(engine.store) == 1
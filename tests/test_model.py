@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_model
+----------------------------------
+
+Tests for the `SPDModel` backends.
+"""
+
+import sys
+
+import numpy as np
+import pytest
+from pyspd import *
+
+from .conftest import solve, sweep
+
+
+def test_unknown_backend(network):
+    with pytest.raises(ValueError):
+        SPDModel(network, backend="simplex")
+
+
+def test_highs_solution_time(network):
+    spd = solve(sweep(network), "highs")
+
+    assert spd.status == "Optimal"
+    assert set(spd.solution_time) == set(['build', 'transfer', 'solve'])
+    assert all(t >= 0 for t in spd.solution_time.values())
+
+
+def test_highs_prices_match_pulp(network, reference_network):
+    highs = Analytics(solve(sweep(network), "highs"))
+    highs.create_price_df()
+    reference = Analytics(solve(sweep(reference_network), "pulp"))
+    reference.create_price_df()
+
+    assert np.allclose(highs.final_price_df.values,
+                       reference.final_price_df[
+                           highs.final_price_df.columns].values)
+
+
+def without_highspy(monkeypatch):
+    """ Solve the highs backend with scipy.optimize.linprog """
+    model = sys.modules[SPDModel.__module__]
+    monkeypatch.setattr(model, "highspy", None)
+    monkeypatch.setattr(model, "_highspy_loaded", True)
+
+
+def test_linprog_matches_highspy(network, reference_network, monkeypatch):
+    highs = Analytics(solve(sweep(network), "highs"))
+    without_highspy(monkeypatch)
+    fallback = Analytics(solve(sweep(reference_network), "highs"))
+    assert np.allclose(highs.final_price_df.values,
+                       fallback.final_price_df.values)
+
+
+def test_linprog_requires_scipy_highs(network, monkeypatch):
+    import scipy
+    without_highspy(monkeypatch)
+    monkeypatch.setattr(scipy, "__version__", "1.5.4")
+    with pytest.raises(ValueError):
+        solve(sweep(network), "highs")
+
+
+def test_changed_parameters(network):
+    spd = solve(sweep(network), "highs")
+    roxburgh = network.stations[1]
+    roxburgh.add_energy_offer(60, 250)
+
+    changes = [(a.name, p, old, new)
+               for a, p, old, new in spd.changed_parameters()]
+    assert changes == [("Roxburgh", "energy_price", 30, 60)]
+
+
+def test_resolve_matches_rebuild(network, reference_network):
+    spd = solve(sweep(network), "highs")
+    network.stations[1].add_energy_offer(60, 250)
+    network.stations[0].add_reserve_offer(100, 300, 0.5)
+    network.nodes[1].demand = 180
+    network.branches[0].capacity = 185
+    spd.resolve()
+
+    assert spd.changed_parameters() == []
+    patched = Analytics(spd)
+    patched.create_price_df()
+
+    reference_network.stations[1].add_energy_offer(60, 250)
+    reference_network.stations[0].add_reserve_offer(100, 300, 0.5)
+    reference_network.nodes[1].demand = 180
+    reference_network.branches[0].capacity = 185
+    rebuilt = Analytics(solve(sweep(reference_network), "highs"))
+    rebuilt.create_price_df()
+
+    assert np.allclose(patched.final_price_df.values,
+                       rebuilt.final_price_df.values)
+
+
+def test_resolve_after_profits(network):
+    spd = solve(sweep(network), "highs")
+    Analytics(spd).create_master()
+    # Replaces the energy price of each station with a result Series
+    for station in network.stations:
+        station.calculate_profits()
+    network.nodes[1].demand = 180
+
+    changes = [(a.name, p, old, new)
+               for a, p, old, new in spd.changed_parameters()]
+    assert changes == [("Haywards", "demand", 150, 180)]
+    spd.resolve()
+    assert spd.status == "Optimal"
+
+
+def test_resolve_structure_change(network):
+    spd = solve(sweep(network), "highs")
+    network.stations[1].risk = False
+    network.stations[1].add_energy_offer(60, 250)
+
+    with pytest.raises(ValueError):
+        spd.resolve()
+
+
+def test_store_model_leaves_operator(network):
+    spd = solve(sweep(network), "highs")
+    subset = SPDModel(network, backend="highs",
+                      store=network.parameters.take([0, 1]))
+    subset.full_run()
+    assert network.SPD is spd
+    assert subset.status == "Optimal"
+
+
+def test_decomposed_requires_highs(network):
+    with pytest.raises(ValueError):
+        SPDModel(network, backend="pulp", processes=2)
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_decomposed_matches_monolithic(network, reference_network,
+                                       processes):
+    spd = solve(sweep(network), processes=processes)
+    decomposed = Analytics(spd)
+    decomposed.create_master()
+
+    monolithic = Analytics(solve(sweep(reference_network), "highs"))
+    monolithic.create_master()
+
+    assert spd.status == "Optimal"
+    assert len(spd.instance_status) == 10
+    assert np.allclose(decomposed.master.values,
+                       monolithic.master[decomposed.master.columns].values)
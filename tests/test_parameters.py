@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_parameters
+----------------------------------
+
+Tests for the columnar `ParameterStore`.
+"""
+
+import numpy as np
+import pytest
+from pyspd import *
+
+
+def test_iterator_store(network):
+    manapouri = network.stations[0]
+    network.create_iterator(manapouri, "energy_price", np.arange(0, 50, 10))
+    store = network.parameters
+
+    assert len(store) == 5
+    assert store.index.name == "Manapouri Energy Price"
+    assert list(store.values['stations']['energy_price'][:, 0]) == \
+        [0, 10, 20, 30, 40]
+    assert list(store.values['stations']['energy_price'][:, 1]) == [30] * 5
+
+    # Unvaried parameters are a broadcast of a single row
+    assert store.values['nodes']['demand'].strides[0] == 0
+
+    # The actor itself is left alone
+    assert manapouri.energy_price == 25
+
+
+def test_instance_names(network):
+    network.create_iterator()
+    store = network.parameters
+
+    assert store.instance_names('reserve_providers') == [
+        'Single_Manapouri', 'Single_Roxburgh', 'Single_Tiwai', 'Single_NZST']
+
+
+def test_topology(network):
+    network.create_iterator()
+    store = network.parameters
+
+    assert list(store.station_node) == [0, 0]
+    assert list(store.load_zone) == [1, 0]
+    assert store.names['companies'] == ['Meridian', 'Market']
+    assert list(store.station_company) == [0, 1]
+
+
+def test_parameter_dicts(network):
+    manapouri = network.stations[0]
+    network.create_iterator(manapouri, "energy_price", [0, 10])
+    network.parameter_dicts()
+
+    assert network.energy_station_names[0] == \
+        'Manapouri_energy_price_0_Manapouri'
+    assert network.energy_station_price[
+        'Manapouri_energy_price_10_Manapouri'] == 10
+    assert manapouri.energy_price == 25
+
+
+def test_take(network):
+    manapouri = network.stations[0]
+    network.create_iterator(manapouri, "energy_price", [0, 10, 20])
+    subset = network.parameters.take([2, 0])
+
+    assert subset.instances == ['Manapouri_energy_price_20',
+                                'Manapouri_energy_price_0']
+    assert list(subset.values['stations']['energy_price'][:, 0]) == [20, 0]
+
+
+def test_unknown_override(network):
+    with pytest.raises(ValueError):
+        network.create_iterator(network.nodes[0], "energy_price", [0, 10])
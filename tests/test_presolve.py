@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_presolve
+----------------------------------
+
+Tests for the `Presolve` reduction of the sparse matrix form.
+"""
+
+import numpy as np
+import pytest
+from pyspd import *
+
+from .conftest import assert_same_dispatch, solve, sweep
+
+
+def idle(operator):
+    """ Add a station at Benmore offering neither energy nor reserve """
+    benmore = operator.nodes[0]
+    market = operator.stations[1].company
+    waitaki = Station("Waitaki", operator, benmore, market, capacity=100)
+    waitaki.add_energy_offer(10, 0)
+    waitaki.add_reserve_offer(5, 0, 1)
+    return sweep(operator)
+
+
+def test_presolve_requires_highs(network):
+    with pytest.raises(ValueError):
+        SPDModel(network, presolve=True)
+
+
+def test_presolve_report(network):
+    spd = solve(idle(network), presolve=True)
+
+    presolved = spd.presolved
+    report = presolved.report()
+    assert presolved.removed_rows == sum(report['rows'].values())
+    assert presolved.removed_cols == sum(report['columns'].values())
+    assert presolved.num_rows + presolved.removed_rows == spd.matrix.num_rows
+
+    # Waitaki can never be dispatched
+    assert report['columns']['Energy_Total'] == 10
+    assert report['columns']['Reserve_Total'] == 10
+    # The branch can carry more than every offer combined
+    assert report['rows']['Pos_flow'] == 10
+    assert report['rows']['Neg_flow'] == 10
+    assert report['rows']['Energy_Price'] == 0
+    assert report['rows']['Reserve_Price'] == 0
+
+
+@pytest.mark.parametrize("processes", [None, 2])
+def test_presolve_matches_full(network, reference_network, processes):
+    spd = solve(idle(network), presolve=True, processes=processes)
+    presolved = Analytics(spd)
+    full = Analytics(solve(idle(reference_network)))
+
+    assert spd.status == "Optimal"
+    assert_same_dispatch(presolved, full)
+    assert np.allclose(presolved.reserve_df.values,
+                       full.reserve_df.values, atol=1e-6)
+
+
+def test_presolve_keeps_price_without_stations(network, reference_network):
+    # The nodal balance of Haywards has a single element, its injection
+    presolved = Analytics(solve(idle(network), presolve=True))
+    full = Analytics(solve(idle(reference_network)))
+
+    haywards = presolved.family("Energy_Price")[:, 1]
+    assert np.allclose(haywards, full.family("Energy_Price")[:, 1])
+    assert (haywards > 0).all()
+
+
+def test_presolve_resolve(network, reference_network):
+    # Haywards has no stations, so the branch must carry its demand
+    spd = solve(idle(network), presolve=True)
+    network.branches[0].capacity = 200
+    spd.resolve()
+    assert spd.status == "Optimal"
+    assert spd.presolved.report()['rows']['Pos_flow'] == 0
+
+    reference_network.branches[0].capacity = 200
+    full = Analytics(solve(idle(reference_network)))
+    assert_same_dispatch(Analytics(spd), full)
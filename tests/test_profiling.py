@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_profiling
+----------------------------------
+
+Tests for the per phase `Profiler`.
+"""
+
+import json
+
+import numpy as np
+import pytest
+from pyspd import *
+
+
+def profiled(network, backend, profile=True):
+    manapouri = network.stations[0]
+    network.create_iterator(manapouri, "energy_price", np.arange(0, 30, 10))
+    spd = SPDModel(network, backend=backend, profile=profile)
+    spd.full_run()
+    Analytics(spd).final_price_df
+    return spd
+
+
+def test_unprofiled_model(network):
+    spd = profiled(network, "pulp", profile=False)
+    assert spd.profiler is None
+
+
+def test_profiler_pulp_phases(network):
+    spd = profiled(network, "pulp")
+    report = spd.profiler.report()
+
+    assert report.loc[("parameters", "_add_dispatch"), "count"] == 3
+    families = report.loc["create_lp"]
+    assert list(families.index[1:]) == list(SPDModel.steps)
+
+    # The rows and columns of each family sum to the whole problem
+    assert families["rows"].sum() == len(spd.lp.constraints)
+    assert families["columns"].sum() == len(spd.lp.variables())
+    assert families.loc["_nodal_demand", "rows"] == 2 * 3 * len(network.nodes)
+
+    assert report.loc[("solve", "solve_lp"), "count"] == 1
+    assert ("analytics", "final_price_df") in report.index
+    assert ("analytics", "family") in report.index
+
+
+def test_profiler_highs_phases(network):
+    spd = profiled(network, "highs")
+    report = spd.profiler.report()
+    families = report.loc["create_matrix"]
+    assert list(families.index) == list(LPMatrix.steps)
+    assert families["rows"].sum() == spd.matrix.num_rows
+    assert families["columns"].sum() == spd.matrix.num_cols
+
+
+def test_profiler_memory(network):
+    profiler = Profiler(memory=True)
+    try:
+        profiled(network, "highs", profile=profiler)
+    finally:
+        profiler.close()
+    if not profiler.memory:
+        pytest.skip("tracemalloc is not available")
+    assert profiler.frame()["allocated"].notnull().all()
+
+
+def test_profiler_trace(network, tmpdir):
+    spd = profiled(network, "pulp")
+    path = str(tmpdir.join("spd.trace.json"))
+    spd.profiler.trace(path)
+
+    with open(path) as f:
+        trace = json.load(f)
+    events = trace["traceEvents"]
+    assert len(events) == len(spd.profiler.events)
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+    instances = [e["args"]["instance"] for e in events
+                 if e["name"] == "_add_dispatch"]
+    assert instances == list(network.itinstances)
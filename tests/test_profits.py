@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_profits
+----------------------------------
+
+Tests for the batched `ProfitEngine`.
+"""
+
+import numpy as np
+from pyspd import *
+
+
+def solve(operator):
+    manapouri = operator.stations[0]
+    manapouri.add_energy_cost_func(QuadraticCost(0.01, 5))
+    operator.interruptible_loads[0].add_reseve_cost_func(lambda x: 2 * x)
+    operator.create_iterator(manapouri, "energy_price", np.arange(0, 100, 10))
+    SPD = SPDModel(operator)
+    SPD.full_run()
+    return Analytics(SPD)
+
+
+def test_matches_company_profits(network, reference_network):
+    engine = solve(network).profits
+
+    solve(reference_network)
+    for unit in reference_network.stations:
+        unit.calculate_profits()
+    for unit in reference_network.interruptible_loads:
+        unit.calculate_profits()
+
+    for company in reference_network.stations[0].company, \
+            reference_network.interruptible_loads[0].company:
+        company.calculate_profit()
+        frame = engine.company_frame(company.name)
+        assert np.allclose(frame[company.name, "Total Profit"].values,
+                           company.company_profits.values)
+        assert np.allclose(frame[company.name, "Total Revenue"].values,
+                           company.company_revenue.values)
+        for unit in company.stations + company.interruptible_loads:
+            assert np.allclose(frame[unit.name, "Total Cost"].values,
+                               unit.total_cost.values)
+
+
+def test_apply(network):
+    analysis = solve(network)
+    analysis.profits.apply()
+
+    company = network.stations[1].company
+    totals = analysis.profits.company_totals()
+    assert np.allclose(company.company_profits.values,
+                       totals[company.name, "Total Profit"].values)
+    assert list(company.unit_profit.columns) == [
+        "Roxburgh Total Profit", "Tiwai Total Profit", "NZST Total Profit"]
+
+
+def test_profits_cached(network):
+    analysis = solve(network)
+    assert analysis.profits is analysis.profits
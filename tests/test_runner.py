@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_runner
+----------------------------------
+
+Tests for the streaming `SweepRunner`.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pyspd import *
+
+
+def grid(operator):
+    manapouri = operator.stations[0]
+    return operator.create_grid([(manapouri, "energy_price",
+                                  np.arange(0, 50, 10))])
+
+
+@pytest.mark.parametrize("backend", ["pulp", "highs"])
+def test_runner_matches_single_solve(network, reference_network, backend):
+    chunks = list(SweepRunner(network, grid(network), chunksize=2,
+                              backend=backend))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert [(c.start, c.stop) for c in chunks] == [(0, 2), (2, 4), (4, 5)]
+    assert all(c.status == "Optimal" for c in chunks)
+
+    prices = pd.concat([c["final_price_df"] for c in chunks])
+
+    manapouri = reference_network.stations[0]
+    reference_network.create_iterator(manapouri, "energy_price",
+                                      np.arange(0, 50, 10))
+    spd = SPDModel(reference_network, backend=backend)
+    spd.full_run()
+    reference = Analytics(spd).final_price_df
+
+    assert list(prices.index) == list(reference.index)
+    assert np.allclose(prices.values, reference[prices.columns].values)
+
+
+def test_runner_releases_model(network):
+    runner = SweepRunner(network, grid(network), chunksize=2)
+    for chunk in runner:
+        assert network.SPD is None
+        assert network.Analysis is None
+        assert network.energy_station_names == []
+
+
+def test_runner_sink(network, tmpdir):
+    writer = ResultWriter(str(tmpdir))
+    runner = SweepRunner(network, grid(network), chunksize=2,
+                         backend="highs", frames=(), sink=writer)
+    chunks = list(runner)
+    assert all(not c.frames for c in chunks)
+    assert len(ResultSet(str(tmpdir))) == 5
+
+
+def test_runner_checkpoint_resumes(network, tmpdir):
+    checkpoint = str(tmpdir)
+    runner = SweepRunner(network, grid(network), chunksize=2,
+                         backend="highs", checkpoint=checkpoint)
+    first = next(iter(runner))
+    assert first.instance_status == ["Optimal", "Optimal"]
+    assert len(ResultSet(checkpoint)) == 2
+
+    # A new runner solves only the scenarios not yet recorded
+    resumed = list(SweepRunner(network, grid(network), chunksize=2,
+                               backend="highs", checkpoint=checkpoint))
+    assert [(c.start, c.stop) for c in resumed] == [(2, 4), (4, 5)]
+
+    results = ResultSet(checkpoint)
+    assert len(results) == 5
+    assert sorted(results.instances) == sorted(
+        name for scenarios in grid(network) for name in scenarios.instances)
+    assert set(results.status) == {"Optimal"}
+
+    # Nothing remains once every scenario is recorded
+    assert list(SweepRunner(network, grid(network), chunksize=2,
+                            backend="highs", checkpoint=checkpoint)) == []
+    assert len(ResultSet(checkpoint)) == 5
+
+
+def test_runner_checkpoint_records_infeasible(network, tmpdir):
+    checkpoint = str(tmpdir)
+    node = network.nodes[0]
+    demands = network.create_grid([(node, "demand", [0, 1e9])])
+    chunks = list(SweepRunner(network, demands, backend="highs",
+                              checkpoint=checkpoint))
+    assert len(chunks) == 1
+    assert chunks[0].instance_status[0] == "Optimal"
+    assert chunks[0].instance_status[1] != "Optimal"
+
+    status = ResultSet(checkpoint).completed
+    assert len(status) == 2
+
+    # The infeasible scenario is not attempted again
+    assert list(SweepRunner(network, demands, backend="highs",
+                            checkpoint=checkpoint)) == []
+
+
+def test_runner_checkpoint_detects_changes(network, tmpdir):
+    checkpoint = str(tmpdir)
+    runner = SweepRunner(network, grid(network), chunksize=2,
+                         backend="highs", checkpoint=checkpoint)
+    next(iter(runner))
+
+    # The same scenario names now describe different dispatches
+    network.nodes[1].demand += 10
+    with pytest.raises(ValueError):
+        list(SweepRunner(network, grid(network), chunksize=2,
+                         backend="highs", checkpoint=checkpoint))
+    assert len(ResultSet(checkpoint)) == 2
+
+
+@pytest.mark.parametrize("backend", ["pulp", "highs"])
+def test_runner_isolates_with_own_backend(network, tmpdir, backend):
+    node = network.nodes[0]
+    demands = network.create_grid([(node, "demand", [0, 1e9])],
+                                  chunksize=5)
+    sink = []
+    runner = SweepRunner(network, demands, chunksize=2, backend=backend,
+                         sink=sink, checkpoint=str(tmpdir))
+    chunk = list(runner)[0]
+    assert demands.chunksize == 5
+    assert [analysis.SPD.backend for analysis in sink] == [backend]
+
+    # Only highs separates the scenarios of a failed chunk
+    if backend == "highs":
+        assert chunk.instance_status[0] == "Optimal"
+    assert chunk.instance_status[1] != "Optimal"
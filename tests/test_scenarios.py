@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_scenarios
+----------------------------------
+
+Tests for the lazily generated scenario grids.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pyspd import *
+
+
+def axes(operator):
+    manapouri = operator.stations[0]
+    haywards = operator.nodes[1]
+    return [(manapouri, "energy_price", [0, 50, 90]),
+            (haywards, "demand", [150, 160])]
+
+
+def test_grid_chunks(network):
+    grid = network.create_grid(axes(network), chunksize=4)
+    chunks = list(grid)
+
+    assert len(grid) == 6
+    assert [len(c) for c in chunks] == [4, 2]
+
+    index = chunks[0].index.append(chunks[1].index)
+    assert list(index.names) == ["Manapouri Energy Price", "Haywards Demand"]
+    assert list(index) == [(0, 150), (0, 160), (50, 150), (50, 160),
+                           (90, 150), (90, 160)]
+    assert chunks[0].instances[1] == \
+        "Manapouri_energy_price_0_Haywards_demand_160"
+
+
+def test_table_chunks(network):
+    columns = [(a, v) for a, v, values in axes(network)]
+    rows = ((price, 150 + price / 10.) for price in range(5))
+    chunks = list(ScenarioTable(columns, rows, chunksize=2))
+
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert list(chunks[2].values[1]) == [150.4]
+
+
+def test_sweep_leaves_actors(network):
+    manapouri = network.stations[0]
+    grid = network.create_grid(axes(network), chunksize=4)
+
+    for scenarios in network.sweep(grid):
+        network.parameter_dicts()
+        assert manapouri.energy_price == 25
+        assert network.nodes[1].demand == 150
+
+
+def test_sweep_matches_product(network, reference_network):
+    grid = network.create_grid(axes(network), chunksize=4)
+    swept = []
+    for scenarios in network.sweep(grid):
+        SPD = SPDModel(network, backend="highs")
+        SPD.full_run()
+        swept.append(Analytics(SPD).final_price_df)
+    swept = pd.concat(swept)
+
+    for (price, demand), row in swept.iterrows():
+        reference_network.stations[0].add_energy_offer(price, 125)
+        reference_network.nodes[1].demand = demand
+        reference_network.create_iterator()
+        SPD = SPDModel(reference_network)
+        SPD.full_run()
+        expected = Analytics(SPD).final_price_df.iloc[0]
+        assert np.allclose(row.values, expected[row.index].values)
+
+
+def scenario_table():
+    return pd.DataFrame({("Haywards", "demand"): [150, 180, np.nan],
+                         ("Roxburgh", "energy_price"): [30, np.nan, 60],
+                         ("Manapouri", "energy_offer"): [125, 100, np.nan],
+                         ("Benmore_Haywards", "capacity"): [np.nan, 185,
+                                                            1000]},
+                        index=pd.Index(["Base", "Peak", "Dry"],
+                                       name="Scenario"))
+
+
+def test_create_scenarios(network):
+    network.create_scenarios(scenario_table())
+    store = network.parameters
+
+    assert list(store.index) == ["Base", "Peak", "Dry"]
+    assert list(store.values['nodes']['demand'][:, 1]) == [150, 180, 150]
+    assert list(store.values['stations']['energy_price'][:, 1]) == \
+        [30, 30, 60]
+    assert list(store.values['branches']['capacity'][:, 0]) == \
+        [1000, 185, 1000]
+    assert network.nodes[1].demand == 150
+
+
+def test_create_scenarios_unknown_column(network):
+    with pytest.raises(ValueError):
+        network.create_scenarios(pd.DataFrame({("Nowhere", "demand"): [1]}))
+    with pytest.raises(ValueError):
+        network.create_scenarios(pd.DataFrame({("Haywards", "price"): [1]}))
+
+
+def test_scenarios_match_pulp(network, reference_network):
+    network.create_scenarios(scenario_table())
+    SPD = SPDModel(network, backend="highs")
+    SPD.full_run()
+    highs = Analytics(SPD).final_price_df
+
+    reference_network.create_scenarios(scenario_table())
+    SPD = SPDModel(reference_network)
+    SPD.full_run()
+    reference = Analytics(SPD).final_price_df
+
+    assert list(highs.index) == ["Base", "Peak", "Dry"]
+    assert np.allclose(highs.values, reference[highs.columns].values)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_sensitivity
+----------------------------------
+
+Tests for the dual based `Sensitivity` report.
+"""
+
+import sys
+
+import numpy as np
+import pytest
+from pyspd import *
+
+from .conftest import solve, sweep
+
+
+def analyse(operator, backend="highs"):
+    operator.create_iterator()
+    return Analytics(solve(operator, backend))
+
+
+def test_sensitivity_requires_highs(network):
+    analysis = analyse(network, "pulp")
+    with pytest.raises(ValueError):
+        analysis.sensitivity
+
+
+def test_demand_marginal_is_price(network):
+    analysis = analyse(network)
+    frame = analysis.sensitivity.frame("demand")
+
+    prices = analysis.family("Energy_Price").ravel()
+    assert np.allclose(frame["marginal"].values, prices, atol=1e-6)
+    assert list(frame["value"].values) == [140, 150]
+
+
+def test_dispatched_reduced_cost(network):
+    analysis = analyse(network)
+    frame = analysis.sensitivity.frame(["energy_price", "energy_offer"])
+    assert len(frame) == 2 * len(network.stations)
+
+    # A station dispatched between its limits has no reduced cost
+    dispatch = analysis.family("Energy_Total").ravel()
+    offer = frame.xs("energy_offer", level="parameter")["value"].values
+    partial = (dispatch > 1e-6) & (dispatch < offer - 1e-6)
+    marginal = frame.xs("energy_price", level="parameter")["marginal"]
+    assert np.allclose(marginal.values[partial], 0, atol=1e-6)
+
+
+def test_demand_range_keeps_prices(network, reference_network):
+    analysis = analyse(network)
+    sensitivity = analysis.sensitivity
+    assert sensitivity.ranged
+
+    demand = sensitivity.values['demand']
+    value, upper = demand['value'][0, 1], demand['upper'][0, 1]
+    assert demand['lower'][0, 1] <= value <= upper
+
+    reference_network.nodes[1].demand = (value + min(upper, value + 100)) / 2
+    moved = analyse(reference_network)
+    assert np.allclose(moved.final_price_df.values,
+                       analysis.final_price_df.values, atol=1e-6)
+
+
+def test_ranging_requires_highspy(network, monkeypatch):
+    analysis = analyse(network)
+    model = sys.modules[SPDModel.__module__]
+    monkeypatch.setattr(model, "highspy", None)
+    monkeypatch.setattr(model, "_highspy_loaded", True)
+    with pytest.raises(ValueError):
+        analysis.sensitivity
+
+    # The marginals and slacks do not need the ranging
+    sensitivity = Sensitivity(analysis, ranging=False)
+    assert not sensitivity.ranged
+    frame = sensitivity.frame("demand")
+    assert np.isnan(frame["lower"].values).all()
+    assert np.allclose(frame["marginal"].values,
+                       analysis.family("Energy_Price").ravel(), atol=1e-6)
+
+
+def test_ranging_requires_single_solve(network):
+    spd = solve(sweep(network, [0, 10]), processes=1)
+    with pytest.raises(ValueError):
+        Sensitivity(Analytics(spd))
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_storage
+----------------------------------
+
+Tests for the columnar `ResultWriter` and memory mapped `ResultSet`.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pyspd import *
+
+from .conftest import solve, sweep
+
+
+def analyse(operator, varrange):
+    return Analytics(solve(sweep(operator, varrange)))
+
+
+def test_save_and_reload(network, tmpdir):
+    analysis = analyse(network, np.arange(0, 50, 10))
+    analysis.save(str(tmpdir))
+
+    results = ResultSet(str(tmpdir))
+    assert len(results) == 5
+    assert results.instances == network.parameters.instances
+
+    frame = results.frame()
+    expected = analysis.result_frame()
+    assert list(frame.columns) == list(expected.columns)
+    assert list(frame.index) == list(expected.index)
+    assert frame.index.name == expected.index.name
+    assert np.allclose(frame.values, expected.values)
+
+    profits = results.profits(companies=True)
+    assert np.allclose(profits.values,
+                       analysis.profits.company_totals().values)
+
+
+def test_blocks_and_ranges(network, tmpdir):
+    writer = ResultWriter(str(tmpdir))
+    first = analyse(network, [0, 10, 20])
+    writer.append(first)
+    second = analyse(network, [30, 40])
+    writer.append(second)
+
+    results = ResultSet(str(tmpdir))
+    assert len(results) == 5
+    assert list(results.index(2, 4)) == [20, 30]
+
+    prices = results.family("Energy_Total", start=2, stop=4,
+                            actors=["Manapouri"])
+    assert prices.shape == (2, 1)
+    assert prices[0, 0] == first.family("Energy_Total")[2, 0]
+    assert prices[1, 0] == second.family("Energy_Total")[0, 0]
+
+    frame = results.frame(["Energy_Price"], actors=["Haywards"])
+    assert list(frame.columns) == [("Haywards", "Energy Price")]
+
+
+def test_reload_is_memory_mapped(network, tmpdir):
+    analyse(network, [0, 10]).save(str(tmpdir), profits=False)
+    results = ResultSet(str(tmpdir))
+    results.family("Reserve_Price")
+    assert all(isinstance(m, np.memmap) for m in results._maps.values())
+
+    with pytest.raises(ValueError):
+        results.profits()
+
+
+def test_datetime_index(network, tmpdir):
+    index = pd.date_range("2013-01-01", periods=3, freq="30min",
+                          name="period")
+    table = pd.DataFrame({("Haywards", "demand"): [150, 160, 170]},
+                         index=index)
+    network.create_scenarios(table)
+    spd = solve(network)
+
+    writer = ResultWriter(str(tmpdir))
+    writer.append(Analytics(spd))
+    writer.append(Analytics(spd))
+
+    results = ResultSet(str(tmpdir))
+    assert len(results) == 6
+    assert isinstance(results.index(), pd.DatetimeIndex)
+    assert list(results.index(0, 3)) == list(index)
+    assert results.index().name == "period"
+
+
+def test_manifest_is_appended(network, tmpdir):
+    writer = ResultWriter(str(tmpdir))
+    writer.append(analyse(network, [0, 10]))
+    writer.append(analyse(network, [20]))
+
+    path = str(tmpdir.join(ResultSet.manifest_name))
+    with open(path) as f:
+        lines = f.readlines()
+    assert len(lines) == 3
+
+    # A block interrupted while being appended is ignored and replaced
+    with open(path, "a") as f:
+        f.write(lines[-1][:20])
+    assert len(ResultSet(str(tmpdir))) == 3
+
+    ResultWriter(str(tmpdir)).append(analyse(network, [30]))
+    results = ResultSet(str(tmpdir))
+    assert len(results) == 4
+    assert list(results.index()) == [0, 10, 20, 30]
+
+
+def test_append_checks_manifest(network, tmpdir):
+    writer = ResultWriter(str(tmpdir))
+    writer.append(analyse(network, [0, 10]))
+
+    other = synthetic_network(nodes=3, seed=1)
+    spd = solve(other)
+    with pytest.raises(ValueError):
+        ResultWriter(str(tmpdir)).append(Analytics(spd))
+    with pytest.raises(ValueError):
+        ResultWriter(str(tmpdir), profits=False)
+    assert len(ResultSet(str(tmpdir))) == 2
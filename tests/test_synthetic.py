@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_synthetic
+----------------------------------
+
+Tests for the seeded `synthetic_network` generator.
+"""
+
+import numpy as np
+import pytest
+from pyspd import *
+
+
+def describe(operator):
+    return ([(n.name, n.demand) for n in operator.nodes],
+            [(s.name, s.capacity, s.energy_price) for s in operator.stations],
+            [(b.name, b.capacity, b.risk) for b in operator.branches])
+
+
+def test_synthetic_network_size():
+    operator = synthetic_network(nodes=12, stations_per_node=3,
+                                 reserve_zones=3, risk_branches=2, seed=4)
+    assert len(operator.nodes) == 12
+    assert len(operator.stations) == 36
+    assert len(operator.reserve_zones) == 3
+    assert len(operator.interruptible_loads) == 3
+    assert sum(b.risk for b in operator.branches) == 2
+    assert all(b.sending_node.RZ is not b.receiving_node.RZ
+               for b in operator.branches if b.risk)
+
+
+def test_synthetic_network_seeded():
+    first = synthetic_network(nodes=8, seed=7)
+    second = synthetic_network(nodes=8, seed=7)
+    other = synthetic_network(nodes=8, seed=8)
+    assert describe(first) == describe(second)
+    assert describe(first) != describe(other)
+
+
+@pytest.mark.parametrize("backend", ["pulp", "highs"])
+def test_synthetic_network_feasible(backend):
+    operator = synthetic_network(nodes=10, stations_per_node=2,
+                                 reserve_zones=2, risk_branches=2, seed=1)
+    operator.create_iterator(operator.stations[0], "energy_price",
+                             np.arange(0, 150, 50))
+    spd = SPDModel(operator, backend=backend)
+    spd.full_run()
+    assert spd.status == "Optimal"
+
+
+def test_synthetic_network_invalid():
+    with pytest.raises(ValueError):
+        synthetic_network(nodes=4, reserve_zones=1, risk_branches=1)
+    with pytest.raises(ValueError):
+        synthetic_network(nodes=2, reserve_zones=3)